@@ -15,7 +15,6 @@ import os
 import sys
 
 import matplotlib.pyplot as plt
-import numpy as np
 import pandas as pd
 import seaborn as sb
 
@@ -29,17 +28,6 @@ models = [0, 1, 2, 10, 11, 20, 21, 30]
 sims = [0]
 reference_model = 0
 
-
-def pe(correct, est):
-    """Calculate the percent error.
-
-    :param correct: correct value
-    :param est: estimated value
-    :return: percent error
-    """
-    return 100 * abs(est - correct) / correct
-
-
 if reference_model not in models:
     models.append(reference_model)
 
@@ -58,22 +46,11 @@ for sim in sims:
     data.append(q.threshold_data())
 data = pd.concat(data)
 
-# %% Calculate error values
-data['error'] = np.nan
-for i in range(len(data)):
-    row = data.iloc[i]
-    est = float(row.threshold)
-    correct = float(
-        data[
-            (data["model"] == reference_model)
-            & (data["sample"] == row["sample"])
-            & (data["index"] == row["index"])
-            & (data["sim"] == row['sim'])
-            & (data["nsim"] == row['nsim'])
-        ]['threshold']
-    )
-    data.iloc[i, -1] = pe(correct, est)
+# %% Calculate error values (percent error of each threshold relative to the same fiber in the reference model)
+errors = Query.threshold_errors(data, reference={'model': reference_model})
 
+# summary of the error for each model, i.e., each set of convergence parameters
+print(errors.groupby(['sample', 'model', 'sim', 'nsim'])['error'].agg(['mean', 'std', 'max']).reset_index())
 
 # %% Generate convergence plot
 g = sb.catplot(
@@ -82,7 +59,7 @@ g = sb.catplot(
     hue='model',
     col="nsim",
     palette='colorblind',
-    data=data,
+    data=errors,
     kind="strip",
     height=5,
     aspect=0.4,
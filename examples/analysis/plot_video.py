@@ -18,6 +18,8 @@ import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib.animation import FuncAnimation
 
+from src.core import Recording
+
 samples = [200, 201, 205]
 models = [0]
 sims = [0, 1, 2]
@@ -32,16 +34,15 @@ outpath = 'out/analysis/videos'
 # define initializer function for animation
 def _init():
     """Initialize the animation."""  # noqa: DAR
-    flat_data = data.flatten()
-    ax.set_ylim(np.min(flat_data), np.max(flat_data))
+    ax.set_ylim(np.min(recording.values), np.max(recording.values))
     return (ln,)
 
 
 # define update function for each frame of animation
 def _update(frame):
     """Update the animation."""  # noqa: DAR
-    time_text.set_text('time: ' + str(data[frame][0]))
-    ln.set_data(np.arange(0, len(data[0]) - 1), data[frame][1:])
+    time_text.set_text('time: ' + str(recording.index[frame]))
+    ln.set_data(np.arange(0, recording.values.shape[1]), recording.values[frame])
     return ln, time_text
 
 
@@ -70,17 +71,13 @@ for sample in samples:
                     'outputs',
                 )
 
-                data = np.loadtxt(
-                    os.path.join(
-                        data_path,
-                        f'Vm_time_inner{inner}_fiber{fiber}_amp{amp}.dat',
-                    ),
-                    skiprows=1,
-                )[:, 0:]
+                # binary recordings (Sim "saving"->"binary") are memory mapped, so frames are read as they are drawn
+                vm_path = os.path.join(data_path, f'Vm_time_inner{inner}_fiber{fiber}_amp{amp}')
+                recording = Recording(vm_path + '.bin' if os.path.isfile(vm_path + '.bin') else vm_path + '.dat')
 
                 # initialize plot
                 fig, ax = plt.subplots()
-                (ln,) = plt.plot(np.arange(0, len(data[0])), data[0])
+                (ln,) = plt.plot(np.arange(0, recording.values.shape[1]), recording.values[0])
                 time_text = ax.text(0.5, 0.5, '', fontsize=15)
 
                 # build and save animation
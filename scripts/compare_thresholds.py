@@ -0,0 +1,80 @@
+#!/usr/bin/env python3.7
+
+"""Compares the thresholds of Sims that differ only in how NEURON runs (e.g., CVODE vs. fixed time step).
+
+The copyrights of this software are owned by Duke University.
+Please refer to the LICENSE and README.md files for licensing
+instructions. The source code can be found on the following GitHub
+repository: https://github.com/wmglab-duke/ascent
+"""
+
+import os
+import sys
+
+import pandas as pd
+
+from src.core import Query
+from src.utils import Configurable
+
+
+def compare_thresholds(data: pd.DataFrame, reference_sim: int, sim: int) -> pd.DataFrame:
+    """Compare the threshold of each fiber in a Sim to the threshold of the same fiber in a reference Sim.
+
+    :param data: thresholds of both Sims, as returned by Query.threshold_data()
+    :param reference_sim: index of the reference Sim (e.g., fixed time step)
+    :param sim: index of the Sim to compare (e.g., CVODE)
+    :return: one row per sample, model, and n_sim, with the number of fibers and the mean and max absolute
+        percent difference in threshold
+    """
+    keys = ['sample', 'model', 'nsim', 'inner', 'fiber']
+    merged = pd.merge(
+        data.loc[data['sim'] == reference_sim, keys + ['threshold']],
+        data.loc[data['sim'] == sim, keys + ['threshold']],
+        on=keys,
+        suffixes=('_reference', ''),
+    )
+    merged['percent_difference'] = (
+        100 * (merged['threshold'] - merged['threshold_reference']).abs() / merged['threshold_reference']
+    )
+
+    return (
+        merged.groupby(['sample', 'model', 'nsim'])['percent_difference']
+        .agg(n_fibers='count', mean_percent_difference='mean', max_percent_difference='max')
+        .reset_index()
+    )
+
+
+def run(args):
+    """Compare thresholds and exit with an error if any fiber differs by more than the tolerance.
+
+    :param args: command line arguments
+    """
+    query = Query(
+        {
+            'partial_matches': True,
+            'include_downstream': True,
+            'indices': {'sample': [args.sample], 'model': [args.model], 'sim': [args.reference_sim, args.sim]},
+        }
+    ).run()
+    comparison = compare_thresholds(query.threshold_data(), args.reference_sim, args.sim)
+
+    # label each n_sim with its fiber model, so that each supported fiber model can be checked in one Sim
+    sim_dir = os.path.join('samples', str(args.sample), 'models', str(args.model), 'sims', str(args.reference_sim))
+    comparison.insert(
+        3,
+        'fiber_model',
+        [
+            Configurable.load(os.path.join(sim_dir, 'n_sims', str(nsim), f'{nsim}.json'))['fibers']['mode']
+            for nsim in comparison['nsim']
+        ],
+    )
+
+    print(comparison.to_string(index=False))
+
+    failed = comparison[comparison['max_percent_difference'] > args.tolerance]
+    if len(failed) > 0:
+        sys.exit(
+            f'Thresholds of sim {args.sim} differ from sim {args.reference_sim} by more than {args.tolerance}% '
+            f'for n_sim(s) {list(failed["nsim"])}'
+        )
+    print(f'All thresholds of sim {args.sim} are within {args.tolerance}% of sim {args.reference_sim}')
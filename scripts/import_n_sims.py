@@ -62,6 +62,16 @@ def run(args):
                                 f' skipping import for run {argument} sample {sample} model {model} sim {sim}'
                             )
                             continue
+                    # the inputs of each n_sim must be the ones written by the pipeline (see n_sim manifest.json)
+                    if not Simulation.n_sims_intact(sample, model, sim, os.path.join(nsim_source, 'n_sims')):
+                        if args.force is True:
+                            print('Force argument passed, continuing with import')
+                        else:
+                            print(
+                                'At least one n_sim input does not match its manifest,'
+                                f' skipping import for run {argument} sample {sample} model {model} sim {sim}'
+                            )
+                            continue
                     Simulation.import_n_sims(
                         sample,
                         model,
@@ -20,6 +20,7 @@ from src.core.waveform import Waveform
 from src.core.fiberset import FiberSet
 from src.core.hocwriter import HocWriter
 from src.core.query import Query
+from src.core.recording import Recording
 from src.core.model import Model
 from src.core import plotter
 
@@ -39,5 +40,6 @@ __all__ = [
     'FiberSet',
     'HocWriter',
     'Query',
+    'Recording',
     'plotter',
 ]
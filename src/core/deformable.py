@@ -9,6 +9,7 @@ repository: https://github.com/wmglab-duke/ascent
 """
 
 import sys
+from copy import deepcopy
 from typing import List, Tuple
 
 import numpy as np
@@ -17,6 +18,7 @@ import pymunk.pygame_util
 from pygame.colordict import THECOLORS
 from pygame.locals import DOUBLEBUF, HWSURFACE, K_ESCAPE, KEYDOWN, QUIT, RESIZABLE
 from shapely.geometry import LineString, Point
+from shapely.geometry.base import BaseGeometry
 
 from src.core import Slide, Trace
 from src.utils import ReshapeNerveMode
@@ -139,6 +141,7 @@ class Deformable:
         minimum_distance: float = 0.0,
         ratio: float = None,
         progress_bar: bool = True,
+        tolerance: float = None,
     ) -> Tuple[List[tuple], List[float]]:
         """Run the main deformation algorithm.
 
@@ -149,6 +152,8 @@ class Deformable:
         :param minimum_distance: separation between original inputs
         :param ratio: deform ratio
         :param progress_bar: whether to print a progress bar during deformation
+        :param tolerance: if not None, end the final settling of the physics (after the last boundary update) once no
+            fascicle moves more than this distance in a single physics step
         :return: tuple of a list of total movement vectors and total angle rotated for each fascicle
         """
         # copy the "contents" so multiple deformations are possible
@@ -159,10 +164,16 @@ class Deformable:
                 seg.group = 1
             space.add(*morph_step)
 
-        def step_physics(space: pymunk.Space, count: int):
+        def step_physics(space: pymunk.Space, count: int, tolerance: float = None):
             dt = 1.0 / 60.0
+            positions = self.body_positions(fascicles)
             for _ in range(count):
                 space.step(dt)
+                if tolerance is not None:
+                    # stop once the fascicles have settled
+                    previous, positions = positions, self.body_positions(fascicles)
+                    if np.max(np.linalg.norm(positions - previous, axis=1), initial=0) < tolerance:
+                        break
 
         # setup
         morph_steps, space, fascicles = self.deform_initialize(minimum_distance, morph_count, ratio)
@@ -198,7 +209,7 @@ class Deformable:
             if morph_index != len(morph_steps) - 1:
                 space.remove(*morph_step)
 
-        step_physics(space, 500)
+        step_physics(space, 500, tolerance)
         # get end positions
         for body, _ in fascicles:
             self.end_positions.append(np.array(body.position))
@@ -209,6 +220,15 @@ class Deformable:
         rotations = [end - start for start, end in zip(self.start_rotations, self.end_rotations)]
         return movements, rotations
 
+    @staticmethod
+    def body_positions(fascicles: List[Tuple[pymunk.Body, pymunk.Poly]]) -> np.ndarray:
+        """Get the current positions of the fascicle bodies.
+
+        :param fascicles: list of (body, shape) pairs
+        :return: nx2 array of body positions
+        """
+        return np.array([tuple(body.position) for body, _ in fascicles]).reshape(-1, 2)
+
     @staticmethod
     def deform_steps(
         start: Trace,
@@ -234,55 +254,55 @@ class Deformable:
         start_intersection = ray.intersection(start.polygon().boundary)
         end_intersection = ray.intersection(end.polygon().boundary)
 
-        start_distances = [Point(point[:2]).distance(start_intersection) for point in start.points]
-        end_distances = [Point(point[:2]).distance(end_intersection) for point in end.points]
+        start_distances = Deformable.point_distances(start.points, start_intersection)
+        end_distances = Deformable.point_distances(end.points, end_intersection)
 
         # Use point on major axis as the first point on old_nerve, find closest point on new_nerve
         # and assign as first point
-
-        # Sweep CW assigning consecutive points
-        start_initial_index = np.where(np.array(start_distances == np.min(start_distances)))[0][0]
-        end_initial_index = np.where(np.array(end_distances == np.min(end_distances)))[0][0]
-
-        start_i = start_initial_index
-        end_i = end_initial_index
-        associated_points = [(0, 0)] * len(start.points)
-
-        # Match pre and post-deformation nerve points. Increment one, decrement the other
-        # to match rotation of trace points.
-        while True:
-            associated_points[start_i] = (start.points[start_i], end.points[end_i])
-
-            if start_i == len(start.points) - 1:
-                start_i = 0
-            else:
-                start_i += 1
-
-            if end_i == 0:
-                end_i = len(end.points) - 1
-            else:
-                end_i -= 1
-
-            if start_i == start_initial_index and end_i == end_initial_index:
-                break
+        start_initial_index = np.argmin(start_distances)
+        end_initial_index = np.argmin(end_distances)
+
+        # Match pre and post-deformation nerve points. Sweep CW assigning consecutive points: increment one index,
+        # decrement the other to match rotation of trace points. Both indices return to their initial values after
+        # lcm(n_start, n_end) matches; only the last match made for each start point is kept.
+        n_start, n_end = len(start.points), len(end.points)
+        match_count = np.lcm(n_start, n_end)
+        sweep = np.arange(match_count - n_start, match_count)
+        start_indices = (start_initial_index + sweep) % n_start
+        end_indices = (end_initial_index - sweep) % n_end
 
         # Find vector between old_nerve and new_nerve associated points
-        vectors = [second - first for first, second in associated_points]
+        vectors = np.zeros_like(start.points)
+        vectors[start_indices] = end.points[end_indices] - start.points[start_indices]
 
-        # Save incremental steps of nerve
+        # Save incremental steps of nerve (only those up to the deform ratio are used)
         ratios = np.linspace(0, 1, count)
-        traces = []
-        for ratio in ratios:
-            trace = start.deepcopy()
-            for i, point in enumerate(trace.points):
-                point += vectors[i] * ratio
-            traces.append(trace)
         if deform_ratio != 0:
-            def_traces = traces[: int((deform_ratio if deform_ratio is not None else 1) * count)]
+            ratios = ratios[: int((deform_ratio if deform_ratio is not None else 1) * count)]
         else:  # still need fascicle sep physics with deform_ratio = 0, so pass starting trace only
-            def_traces = [traces[0]]
+            ratios = ratios[:1]
+
+        def_traces = []
+        for ratio in ratios:
+            trace = deepcopy(start)
+            trace.points = None
+            trace.append(start.points + vectors * ratio)
+            def_traces.append(trace)
         return def_traces
 
+    @staticmethod
+    def point_distances(points: np.ndarray, geometry: BaseGeometry) -> np.ndarray:
+        """Calculate the distance from each point to a geometry.
+
+        :param points: nx3 array of points
+        :param geometry: shapely geometry, typically the (Multi)Point intersection of a ray with a trace
+        :return: array of distances from each point to the geometry
+        """
+        if geometry.geom_type in ['Point', 'MultiPoint'] and not geometry.is_empty:
+            targets = np.array([point.coords[0][:2] for point in getattr(geometry, 'geoms', [geometry])])
+            return np.min(np.linalg.norm(points[:, None, :2] - targets[None, :, :], axis=2), axis=1)
+        return np.array([Point(point[:2]).distance(geometry) for point in points])
+
     @staticmethod
     def from_slide(slide: Slide, mode: ReshapeNerveMode, sep_nerve: float = None) -> 'Deformable':
         """Create a Deformable object from a Slide object.
@@ -275,27 +275,27 @@ class Fascicle:
 
     @staticmethod
     def to_list(
-        inner_img_path: str,
-        outer_img_path: str,
+        inner_img_path: Union[str, np.ndarray],
+        outer_img_path: Union[str, np.ndarray],
         contour_mode,
         z: float = 0,
     ) -> List['Fascicle']:
         """Convert a set of inner and outer images to a list of fascicles.
 
         :param z: z-coordinate of the slide this fascicle is on
-        :param outer_img_path: path to outer image, if None, only inners are returned
+        :param outer_img_path: path to outer image (or the loaded image), if None, only inners are returned
             (stored as outers until perineurium is generated)
-        :param inner_img_path: path to inner image
+        :param inner_img_path: path to inner image (or the loaded image)
         :param contour_mode: contour mode to use for cv2.findContours
         :return: list of Fascicles derived from the image(s)
         """
 
-        def build_traces(path: str) -> List[Trace]:
+        def build_traces(path: Union[str, np.ndarray]) -> List[Trace]:
             # default findContours params
             params = [cv2.RETR_TREE, contour_mode.value]
             # default findContours params
 
-            img = np.flipud(cv2.imread(path, -1))
+            img = np.flipud(cv2.imread(path, -1) if isinstance(path, str) else path)
 
             if len(img.shape) > 2 and img.shape[2] > 1:
                 img = img[:, :, 0]
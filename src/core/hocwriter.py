@@ -26,6 +26,7 @@ from src.utils import (
     SearchAmplitudeIncrementMode,
     SetupMode,
     TerminationCriteriaMode,
+    ThresholdSearchMode,
     WriteMode,
 )
 
@@ -85,11 +86,15 @@ class HocWriter(Configurable, Saveable):
             self.write_classification_checkpoints(file_object)
 
             file_object.write("}\n")
-            file_object.write("\nload_file(\"../../HOC_Files/Wrapper.hoc\")\n")
+            # bulletin_board.py loads Wrapper.hoc itself, after setting the amplitudes of each fiber
+            file_object.write("\nif (!name_declared(\"bb_driver\")) {\n")
+            file_object.write("    load_file(\"../../HOC_Files/Wrapper.hoc\")\n")
+            file_object.write("}\n")
 
     def write_base_parameters(self, file_object, n_tsteps):
         """Write base parameters to launch.hoc.
 
+        :raises ValueError: If CVODE is combined with saving at fixed time steps.
         :param file_object: File object to write to.
         :param n_tsteps: Number of time steps in simulation.
         """
@@ -104,6 +109,20 @@ class HocWriter(Configurable, Saveable):
         file_object.write(f"t_initSS  = {self.search(Config.SIM, 'protocol', 'initSS'):0.0f} // [ms]\n")
         file_object.write(f"dt_initSS = {self.search(Config.SIM, 'protocol', 'dt_initSS'):0.0f} // [ms]\n")
 
+        # variable time step integration (CVODE), off unless "cvode" -> "use" is true in Sim "protocol"
+        cvode: dict = self.search(Config.SIM, 'protocol', 'cvode', optional=True)
+        use_cvode = cvode is not None and cvode.get('use') is True
+        if use_cvode:
+            saving_space: dict = self.search(Config.SIM, 'saving', 'space', optional=True) or {}
+            if saving_space.get('vm') is True or saving_space.get('gating') is True:
+                raise ValueError(
+                    "Sim protocol->cvode cannot be used with saving->space, "
+                    "which records at fixed time steps (use saving->time instead)"
+                )
+        file_object.write(f"flag_cvode = {int(use_cvode):0.0f} // 0 for fixed dt; 1 for variable time step (CVODE)\n")
+        if use_cvode:
+            file_object.write(f"cvode_atol = {cvode.get('atol', 1e-3)} // [absolute tolerance]\n")
+
     def write_fiber_parameters(self, file_object):
         """Write fiber parameters to launch.hoc.
 
@@ -186,7 +205,28 @@ class HocWriter(Configurable, Saveable):
         file_object.write("// Check times in milliseconds\n")
         for time_ind in range(n_checktimes):
             file_object.write(f"checktime_values_ms.x[{time_ind}] = {checktimes[time_ind]} \n")
-        checknodes = self.search(Config.SIM, "saving", "time", "locs")
+        locs = self.search(Config.SIM, "saving", "time", "locs")
+        # "locs" may be given for each quantity (e.g., fewer nodes for gating params than for Vm), else shared
+        if isinstance(locs, dict):
+            checknodes = locs.get('vm', locs.get('gating'))
+            gating_checknodes = locs.get('gating', checknodes)
+        else:
+            checknodes = gating_checknodes = locs
+
+        if gating_checknodes == 'all':
+            file_object.write("\nNchecknodes_gating = axonnodes\n")
+        else:
+            file_object.write(f"\nNchecknodes_gating = {len(gating_checknodes):0.0f}\n")
+        file_object.write("objref checknode_gating_values\n")
+        file_object.write("checknode_gating_values = new Vector(Nchecknodes_gating,0)\n")
+        if gating_checknodes == 'all':
+            file_object.write("for i = 0, axonnodes - 1 {\n")
+            file_object.write("\tchecknode_gating_values.x[i] = i\n")
+            file_object.write("}\n")
+        else:
+            for node_ind, loc in enumerate(gating_checknodes):
+                file_object.write(f"checknode_gating_values.x[{node_ind}] = int((axonnodes-1)*deltaz*{loc}/deltaz)\n")
+
         if checknodes == 'all':
             file_object.write("\nNchecknodes = axonnodes\n")
         else:
@@ -269,6 +309,18 @@ class HocWriter(Configurable, Saveable):
                 file_object.write(f"\nrel_thresh_resoln = {res / 100:0.4f}\n")
             file_object.write(f"termination_flag = {termination_flag:0.0f} // \n")
 
+            search_mode_name: str = self.search(Config.SIM, "protocol", "threshold_search", "mode", optional=True)
+            # the config member of the enum names the config key, it is not a search mode
+            search_modes = [mode.name for mode in ThresholdSearchMode if mode.name != 'config']
+            if (search_mode_name or 'BISECTION') not in search_modes:
+                raise ValueError(
+                    f'Invalid protocol->threshold_search->mode "{search_mode_name}", must be one of {search_modes}'
+                )
+            search_mode: ThresholdSearchMode = ThresholdSearchMode[search_mode_name or 'BISECTION']
+            if search_mode == ThresholdSearchMode.ILLINOIS and protocol_mode == NeuronRunMode.BLOCK_THRESHOLD:
+                raise ValueError("protocol->threshold_search->mode ILLINOIS is only supported for ACTIVATION_THRESHOLD")
+            file_object.write(f"search_flag = {search_mode.value:0.0f} // \n")
+
             max_iter = self.search(Config.SIM, "protocol", "bounds_search").get("max_steps", 100)
             file_object.write(f"max_iter = {max_iter:0.0f} // \n")
 
@@ -346,6 +398,17 @@ class HocWriter(Configurable, Saveable):
         file_object.write(
             f"saveflag_Istim        = {int(self.search(Config.SIM, 'saving', 'time', 'istim') is True):0.0f}\n"
         )
+        file_object.write(
+            f"saveflag_binary       = {int(self.search(Config.SIM, 'saving', 'binary', optional=True) is True):0.0f}\n"
+        )
+
+        # record every dt unless a longer interval is given, for all quantities or for each (rounded to steps of dt)
+        dt = self.search(Config.SIM, 'waveform', 'global', 'dt')
+        record_dt = self.search(Config.SIM, 'saving', 'time', 'dt', optional=True)
+        for quantity, name in [('vm', 'Vm'), ('gating', 'gating'), ('istim', 'Istim')]:
+            interval = record_dt.get(quantity) if isinstance(record_dt, dict) else record_dt
+            record_step = 1 if interval is None else max(1, round(interval / dt))
+            file_object.write(f"record_step_{name} = {record_step:0.0f} // record every {record_step} time steps\n")
         if 'runtimes' not in self.configs[Config.SIM.value]['saving']:
             file_object.write(f"saveflag_runtime      = {0}\n")
         else:
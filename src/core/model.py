@@ -10,9 +10,10 @@ from copy import deepcopy
 
 import numpy as np
 from quantiphy import Quantity
-from shapely.geometry import Point
+from shapely.geometry import Point, Polygon
+from shapely.geometry.polygon import orient
 
-from src.core import Sample, Waveform
+from src.core import Sample, Trace, Waveform
 from src.utils import (
     Config,
     Configurable,
@@ -148,29 +149,62 @@ class Model(Configurable, Saveable):
                         "CENTROID PLACEMENT VIOLATED REQUIRED CUFF BUFFER DISTANCE\n"
                     )
 
-                center_x = 0
-                center_y = 0
                 step = 1  # [um] STEP SIZE
                 x_step = step * np.cos(-theta_c + np.pi)  # STEP VECTOR X-COMPONENT
                 y_step = step * np.sin(-theta_c + np.pi)  # STEP VECTOR X-COMPONENT
 
-                # shift nerve within cuff until one step within the minimum separation from cuff
-                while nerve_copy.polygon().boundary.distance(id_boundary.boundary) >= cuff_r_buffer:
-                    nerve_copy.shift([x_step, y_step, 0])
-                    center_x -= x_step
-                    center_y -= y_step
+                # number of steps to shift nerve within cuff until one step within the minimum separation from cuff
+                n_steps = self.trace_boundary_steps(nerve_copy, id_boundary, cuff_r_buffer, (x_step, y_step))
 
                 # to maintain minimum separation from cuff, reverse last step
-                center_x += x_step
-                center_y += y_step
-
-                x_shift, y_shift = center_x, center_y
+                x_shift, y_shift = -(n_steps - 1) * x_step, -(n_steps - 1) * y_step
 
         self.configs[Config.MODEL.value]['cuff']['shift']['x'] = x_shift
         self.configs[Config.MODEL.value]['cuff']['shift']['y'] = y_shift
 
         return self
 
+    @staticmethod
+    def trace_boundary_steps(trace: Trace, boundary: Polygon, buffer: float, step: tuple) -> int:
+        """Count the steps a trace can be shifted toward a boundary until it is within a buffer distance of it.
+
+        The count includes the step which brings the trace within the buffer distance (0 if it starts there).
+        For a trace inside a convex boundary (e.g., the cuff), the distance between boundaries is the minimum over
+        trace vertices and boundary edges of the vertex-to-edge-line distance, each of which changes linearly with
+        the number of steps, so the count is solved for directly. Otherwise, the trace is stepped until the
+        buffer is violated.
+
+        :param trace: trace to shift (not modified)
+        :param boundary: boundary polygon to shift the trace toward
+        :param buffer: minimum separation between the trace and the boundary
+        :param step: (x, y) step vector
+        :return: number of steps
+        """
+        step = np.array(step, dtype=float)
+
+        if not trace.polygon().within(boundary):
+            trace = trace.deepcopy()
+            n_steps = 0
+            while trace.polygon().boundary.distance(boundary.boundary) >= buffer:
+                trace.shift(list(step) + [0])
+                n_steps += 1
+            return n_steps
+
+        # outward unit normals and offsets of the lines through each boundary edge
+        coords = np.array(orient(boundary).exterior.coords)
+        edges = np.diff(coords, axis=0)
+        normals = np.column_stack([edges[:, 1], -edges[:, 0]]) / np.linalg.norm(edges, axis=1)[:, None]
+        offsets = np.sum(normals * coords[:-1], axis=1)
+
+        # distance from each trace vertex to each edge line, and its decrease per step
+        distances = offsets[None, :] - trace.points[:, :2] @ normals.T
+        approach = normals @ step
+        closing = approach > 0
+
+        # first step at which any vertex-edge distance drops below the buffer
+        thresholds = (distances[:, closing] - buffer) / approach[closing]
+        return max(0, int(np.floor(np.min(thresholds))) + 1)
+
     def get_cuff_shift_parameters(self, cuff_config, deform_ratio, nerve_copy, sample_config, slide):
         """Calculate parameters for cuff shift.
 
@@ -14,8 +14,9 @@ import matplotlib.pyplot as plt
 import matplotlib.ticker as tick
 import numpy as np
 import pandas as pd
+from matplotlib.collections import PolyCollection
 
-from src.core import Query
+from src.core import Query, Slide
 from src.utils import Config, Object
 
 
@@ -95,7 +96,8 @@ class _HeatmapPlotter:
               suprathresh_color is used. Otherwise, subthresh_color is used.
 
         :param sample_object: Sample object to use for plotting. Automatically loaded if not provided.
-        :param sim_object: Simulation object to use for plotting. Automatically loaded if not provided.
+        :param sim_object: Simulation object to take fiber locations from. If not provided, they are read from the
+            Sim's metadata sidecar (see ``Query.get_metadata()``), without loading the Simulation object.
         :param missing_color: Color to use for missing data.
         :param suprathresh_color: Color to use for suprathresh data.
         :param subthresh_color: Color to use for subthresh data.
@@ -117,6 +119,8 @@ class _HeatmapPlotter:
         self.mappable = None
         self.fiber_colors = self.inner_colors = None
         self.sample_index = self.sim_index = self.model_index = self.n_sim_index = None
+        self.fiberset_index = 0
+        self.fiber_indices = None
         self.plot_outers = plot_outers
         self.cmap = cmap
         self.min_max_ticks = min_max_ticks
@@ -164,25 +168,39 @@ class _HeatmapPlotter:
     def plot_inners_fibers(self, ax):
         """Plot inners and fibers using the colors determined in determine_colors().
 
+        All inners are drawn as one PolyCollection and all fibers as one scatter, so the number of artists does not
+        grow with the number of inners or fibers.
+
         :param ax: axis to plot on
         """
-        self.sample.slides[0].plot(
-            final=False,
-            fix_aspect_ratio=True,
-            fascicle_colors=self.inner_colors,
-            ax=ax,
-            outers_flag=self.plot_outers,
-            inner_format='k-',
-            line_kws=self.line_kws,
-        )
-        if np.any([bool(x) for x in self.fiber_colors]):
-            self.scatter_kws['c'] = self.fiber_colors
-            self.sim.fibersets[0].plot(ax=ax, scatter_kws=self.scatter_kws)
+        slide: Slide = self.sample.slides[0]
+        ax.set_aspect('equal', 'datalim')
+
+        if not slide.monofasc():
+            slide.nerve.plot(plot_format='k-', ax=ax, linewidth=1.5, line_kws=self.line_kws)
+
+        # translate line keywords (as for matplotlib.pyplot.plot) to their collection equivalents
+        line_kws = dict(self.line_kws)
+        collection_kws = {'edgecolors': line_kws.pop('color', 'k'), 'linewidths': line_kws.pop('linewidth', 1)}
+        collection_kws.update(line_kws)
+
+        if self.plot_outers:
+            outers = [fascicle.outer.points[:, :2] for fascicle in slide.fascicles]
+            ax.add_collection(PolyCollection(outers, facecolors='none', **collection_kws))
+
+        inners = [inner.points[:, :2] for fascicle in slide.fascicles for inner in fascicle.inners]
+        ax.add_collection(PolyCollection(inners, facecolors=self.inner_colors, **collection_kws))
+        ax.autoscale_view()
+
+        if self.fiber_colors is not None:
+            fibers_xy = self.get_fibers_xy()[self.fiber_indices]
+            scatter_kws = {'marker': 'o', **self.scatter_kws, 'c': self.fiber_colors}
+            ax.scatter(fibers_xy[:, 0], fibers_xy[:, 1], **scatter_kws)
 
     def create_cmap(self):
         """Create color map and mappable for assigning colorbar and ticks."""
         if self.cmap is None:
-            cmap = plt.cm.get_cmap('viridis')
+            cmap = plt.get_cmap('viridis')
             cmap.set_bad(color='w')
             cmap = cmap.reversed()
             self.cmap = cmap
@@ -209,49 +227,55 @@ class _HeatmapPlotter:
     def determine_colors(self, threshdf):
         """Determine colors for inners and fibers based on user selected mode.
 
+        The mean threshold of each inner and fiber is computed with a groupby, and mapped to colors with a single
+        colormap evaluation.
+
         :param threshdf: DataFrame of thresholds.
         """
+        inner_thresh = self._mean_thresholds(threshdf, 'inner')
+        fiber_thresh = self._mean_thresholds(threshdf, 'index')
+        if inner_thresh.isna().any() or fiber_thresh.isna().any():
+            warnings.warn(
+                'Missing at least one fiber threshold, color will appear as missing color (defaults to red).',
+                stacklevel=2,
+            )
 
-        def _mapthresh(thresh):
-            return tuple(self.cmap((thresh - self.min_thresh) / (self.max_thresh - self.min_thresh)))
-
-        inner_color_list = []
-        fiber_color_list = []
-        for inner in pd.unique(threshdf.inner):
-            # get inner threshold and add the appropriate color to the list
-            innerthresh = np.mean(threshdf.query(f'inner=={inner}').threshold)
-            if innerthresh is np.nan:
-                inner_color_list.append(self.missing_color)
-                warnings.warn(
-                    'Missing at least one fiber threshold, color will appear as missing color (defaults to red).',
-                    stacklevel=2,
-                )
-            elif self.mode == 'inners':
-                inner_color_list.append(_mapthresh(innerthresh))
-            elif self.mode == 'inners_on_off':
-                inner_color_list.append(
-                    self.suprathresh_color if innerthresh > self.cutoff_thresh else self.subthresh_color
-                )
-            else:
-                inner_color_list.append(None)
-        for fiber_index in pd.unique(threshdf['index']):
-            # get fiber threshold and add the appropriate color to the list
-            fiberthresh = np.mean(threshdf.query(f'index=={fiber_index}').threshold)
-            if fiberthresh is np.nan:
-                warnings.warn(
-                    'Missing fiber threshold, color will appear as missing color (defaults to red).', stacklevel=2
-                )
-                fiber_color_list.append(self.missing_color)
-            elif self.mode == 'fibers':
-                fiber_color_list.append(_mapthresh(fiberthresh))
-            elif self.mode == 'fibers_on_off':
-                fiber_color_list.append(
-                    self.suprathresh_color if fiberthresh > self.cutoff_thresh else self.subthresh_color
-                )
-            else:
-                fiber_color_list.append(None)
-        # set colors for inners and fibers
-        self.inner_colors, self.fiber_colors = inner_color_list, fiber_color_list
+        # inners without data (or all inners in fiber modes) are left unfilled, but missing data is always shown
+        n_inners = sum(len(fascicle.inners) for fascicle in self.sample.slides[0].fascicles)
+        inner_colors = np.zeros((n_inners, 4))
+        if self.mode in ['inners', 'inners_on_off']:
+            inner_colors[inner_thresh.index] = self._map_colors(inner_thresh.to_numpy())
+        else:
+            missing = inner_thresh.index[inner_thresh.isna()]
+            inner_colors[missing] = mplcolors.to_rgba(self.missing_color)
+        self.inner_colors = inner_colors
+
+        if self.mode in ['fibers', 'fibers_on_off']:
+            self.fiber_indices = fiber_thresh.index.to_numpy()
+            self.fiber_colors = self._map_colors(fiber_thresh.to_numpy())
+        else:
+            self.fiber_indices = self.fiber_colors = None
+
+    @staticmethod
+    def _mean_thresholds(threshdf, key):
+        # mean threshold of each group, which is NaN (i.e., missing) if any threshold of the group is missing
+        grouped = threshdf.threshold.groupby(threshdf[key], sort=False)
+        means = grouped.mean()
+        means[threshdf.threshold.isna().groupby(threshdf[key], sort=False).any()] = np.nan
+        return means
+
+    def _map_colors(self, thresholds: np.ndarray) -> np.ndarray:
+        # RGBA color for each threshold, for the current mode
+        if self.mode.endswith('on_off'):
+            colors = np.where(
+                (thresholds > self.cutoff_thresh)[:, None],
+                mplcolors.to_rgba(self.suprathresh_color),
+                mplcolors.to_rgba(self.subthresh_color),
+            )
+        else:
+            colors = self.mappable.to_rgba(thresholds)
+        colors[np.isnan(thresholds)] = mplcolors.to_rgba(self.missing_color)
+        return colors
 
     def add_colorbar(self, ax):
         """Add colorbar to heatmap plot.
@@ -269,11 +293,19 @@ class _HeatmapPlotter:
         cb.ax.set_title(cb_label)
 
     def get_objects(self):
-        """Get sample and sim objects for plotting."""
+        """Get sample object for plotting."""
         if self.sample is None:
             self.sample = Query.get_object(Object.SAMPLE, [self.sample_index])
-        if self.sim is None:
-            self.sim = Query.get_object(Object.SIMULATION, [self.sample_index, self.model_index, self.sim_index])
+
+    def get_fibers_xy(self) -> np.ndarray:
+        """Get the xy coordinates of every fiber in the plotted fiberset.
+
+        :return: array of fiber xy coordinates, indexed by master fiber index
+        """
+        if self.sim is not None:
+            return np.array(self.sim.fibersets[self.fiberset_index].xy_points())
+        metadata = Query.get_metadata([self.sample_index, self.model_index, self.sim_index])
+        return np.array(metadata['fibersets'][self.fiberset_index]['xy'])
 
     def validate(self, data):
         """Check that data is valid for plotting.
@@ -289,6 +321,8 @@ class _HeatmapPlotter:
                 len(pd.unique(data[index])) == 1
             ), f'Only one {index} allowed for this plot. Append something like q.threshold_data.query(\'{index}==0\')'
             setattr(self, index + '_index', pd.unique(data[index])[0])
+        if 'fiberset_index' in data:
+            self.fiberset_index = pd.unique(data['fiberset_index'])[0]
 
     def plot_cuff_orientation(self, ax):
         """Plot the orientation of the cuff.
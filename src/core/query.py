@@ -8,16 +8,19 @@ instructions. The source code can be found on the following GitHub
 repository: https://github.com/wmglab-duke/ascent
 """
 
+import functools
+import json
 import os
 import pickle
 import warnings
-from typing import List, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Union
 
 import numpy as np
 import pandas as pd
 from scipy import stats as stats
 
-from src.core import Sample, Simulation, Slide
+from src.core import Sample, Simulation
 from src.utils import Config, Configurable, Object, Saveable, SetupMode
 
 
@@ -27,6 +30,9 @@ class Query(Configurable, Saveable):
     IMPORTANT: MUST BE RUN FROM PROJECT LEVEL
     """
 
+    # flattened parameters of every config seen by Query.run, keyed by config path (see Query.catalog_parameters)
+    CATALOG_PATH = os.path.join('samples', '.catalog.json')
+
     def __init__(self, criteria: Union[str, dict]):
         """Set up Query object.
 
@@ -46,6 +52,9 @@ class Query(Configurable, Saveable):
 
         self._result = None  # begin with empty result
 
+        self._catalog: dict = {}
+        self._catalog_changed: bool = False
+
     def run(self):  # noqa C901
         """Build query result using criteria.
 
@@ -74,10 +83,27 @@ class Query(Configurable, Saveable):
             if indices is not None and not all([isinstance(i, int) for i in indices]):
                 raise TypeError('Encountered a non-integer index. Check your search criteria.')
 
-        # criteria for each layer
-        sample_criteria = self.search(Config.CRITERIA, 'sample', optional=True)
-        model_criteria = self.search(Config.CRITERIA, 'model', optional=True)
-        sim_criteria = self.search(Config.CRITERIA, 'sim', optional=True)
+        # criteria for each layer, flattened to match the catalog parameters
+        sample_criteria, model_criteria, sim_criteria = [
+            None if criteria is None else self.flatten(criteria)
+            for criteria in [self.search(Config.CRITERIA, level, optional=True) for level in ['sample', 'model', 'sim']]
+        ]
+
+        # configs are only parsed if they changed since the last query, and each is matched at most once per run
+        self._catalog = self.load_catalog()
+        self._catalog_changed = False
+        matches: Dict[str, bool] = {}
+
+        def match(criteria: dict, config_path: str) -> bool:
+            """Check a config against the criteria of its level.
+
+            :param criteria: flattened criteria
+            :param config_path: path to the config
+            :return: True if the config matches
+            """
+            if config_path not in matches:
+                matches[config_path] = self._match(criteria, self.catalog_parameters(config_path))
+            return matches[config_path]
 
         # control if missing sim criteria or both sim and model criteria
         include_downstream = self.search(Config.CRITERIA, 'include_downstream', optional=True)
@@ -96,9 +122,8 @@ class Query(Configurable, Saveable):
                 continue
 
             # if applicable, check against sample criteria
-            if sample_criteria is not None and not self._match(
-                sample_criteria,
-                self.load(os.path.join(samples_dir, sample, 'sample.json')),
+            if sample_criteria is not None and not match(
+                sample_criteria, os.path.join(samples_dir, sample, 'sample.json')
             ):
                 continue
 
@@ -128,9 +153,8 @@ class Query(Configurable, Saveable):
                     continue
 
                 # if applicable, check against model criteria
-                if model_criteria is not None and not self._match(
-                    model_criteria,
-                    self.load(os.path.join(models_dir, model, 'model.json')),
+                if model_criteria is not None and not match(
+                    model_criteria, os.path.join(models_dir, model, 'model.json')
                 ):
                     continue
 
@@ -153,9 +177,8 @@ class Query(Configurable, Saveable):
                         continue
 
                     # if applicable, check against model criteria
-                    if sim_criteria is not None and not self._match(
-                        sim_criteria,
-                        self.load(os.path.join('config', 'user', 'sims', sim + '.json')),
+                    if sim_criteria is not None and not match(
+                        sim_criteria, os.path.join('config', 'user', 'sims', sim + '.json')
                     ):
                         continue
 
@@ -172,6 +195,9 @@ class Query(Configurable, Saveable):
             if len(result[samples_key][-1][models_key]) == 0:
                 result[samples_key].pop(-1)
 
+        if self._catalog_changed:
+            self.save_catalog(self._catalog)
+
         if len(result['samples']) == 0:
             raise IndexError("Query run did not return any sample results. Check your indices and try again.")
 
@@ -206,14 +232,47 @@ class Query(Configurable, Saveable):
     def get_object(mode: Object, indices: List[int]) -> Union[Sample, Simulation]:
         """Load pickled object for given mode and indices.
 
+        Objects are cached by path and modification time, so repeated calls for the same indices unpickle only once
+        (and a re-saved object is picked up). The cached object is shared between callers; do not modify it.
+
         :param mode: mode of object (e.g. Object.SAMPLE)
         :param indices: indices of object (e.g. [0, 0, 0]). These are the sample, model, and sim indices, respectively.
             For a sample, pass only [sample_index]. For a model, pass [sample_index, model_index].
         :return: object
         """
-        with open(Query.build_path(mode, indices), 'rb') as obj:
+        path = Query.build_path(mode, indices)
+        return Query._load_object(path, os.path.getmtime(path))
+
+    @staticmethod
+    @functools.lru_cache(maxsize=8)
+    def _load_object(path: str, mtime: float) -> Union[Sample, Simulation]:
+        with open(path, 'rb') as obj:
             return pickle.load(obj)
 
+    @staticmethod
+    def get_metadata(indices: List[int]) -> dict:
+        """Load the metadata sidecar of a sim, which avoids unpickling the full Simulation for most analysis.
+
+        The sidecar is (re)written from the pickled Simulation if it is missing or older than sim.obj. Like
+        get_object(), the result is cached and shared between callers; do not modify it.
+
+        :param indices: sample, model, and sim indices (e.g. [0, 0, 0])
+        :return: metadata as a dict (see Simulation.metadata)
+        """
+        obj_path = Query.build_path(Object.SIMULATION, indices)
+        metadata_path = Simulation.metadata_path(os.path.dirname(obj_path))
+        if not os.path.isfile(metadata_path) or os.path.getmtime(metadata_path) < os.path.getmtime(obj_path):
+            sim_object: Simulation = Query.get_object(Object.SIMULATION, indices)
+            sim_object.save_metadata(metadata_path)
+
+        return Query._load_metadata(metadata_path, os.path.getmtime(metadata_path))
+
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _load_metadata(path: str, mtime: float) -> dict:
+        with open(path, 'r') as f:
+            return json.load(f)
+
     @staticmethod
     def build_path(
         mode: Union[Config, Object],
@@ -265,7 +324,74 @@ class Query(Configurable, Saveable):
 
         return result
 
+    @staticmethod
+    def flatten(config: dict, prefix: str = None) -> dict:
+        """Flatten nested dicts to a single level, joining keys with '->'.
+
+        e.g., {'cuff': {'rotate': {'add_ang': 0}}} becomes {'cuff->rotate->add_ang': 0}. Lists are kept as values.
+
+        :param config: dict to flatten
+        :param prefix: joined keys of the parent dict, if any
+        :return: flattened dict
+        """
+        flat = {}
+        for key, value in config.items():
+            name = key if prefix is None else f'{prefix}->{key}'
+            if isinstance(value, dict):
+                flat.update(Query.flatten(value, name))
+            else:
+                flat[name] = value
+        return flat
+
+    @staticmethod
+    def load_catalog() -> dict:
+        """Load the catalog of flattened config parameters.
+
+        :return: catalog as a dict of config path to {'stat': [mtime_ns, size], 'parameters': {...}}, or an empty
+            dict if there is no (readable) catalog yet
+        """
+        try:
+            with open(Query.CATALOG_PATH, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def save_catalog(catalog: dict):
+        """Save the catalog of flattened config parameters, dropping configs that no longer exist.
+
+        :param catalog: catalog to save (see Query.load_catalog)
+        """
+        catalog = {path: entry for path, entry in catalog.items() if os.path.isfile(path)}
+        # write then rename, so concurrent queries never read a partial catalog
+        temp_path = f'{Query.CATALOG_PATH}.{os.getpid()}'
+        with open(temp_path, 'w') as f:
+            json.dump(catalog, f)
+        os.replace(temp_path, Query.CATALOG_PATH)
+
+    def catalog_parameters(self, config_path: str) -> dict:
+        """Get the flattened parameters of a config from the catalog, parsing the config only if it changed.
+
+        :param config_path: path to the config
+        :return: flattened parameters (see Query.flatten)
+        """
+        stat = os.stat(config_path)
+        config_stat = [stat.st_mtime_ns, stat.st_size]
+        entry = self._catalog.get(config_path)
+        if entry is None or entry['stat'] != config_stat:
+            entry = {'stat': config_stat, 'parameters': self.flatten(self.load(config_path))}
+            self._catalog[config_path] = entry
+            self._catalog_changed = True
+        return entry['parameters']
+
     def _match(self, criteria: dict, data: dict) -> bool:
+        """Check flattened config parameters against flattened criteria (see Query.flatten).
+
+        :param criteria: flattened criteria
+        :param data: flattened config parameters
+        :raises KeyError: If a criterion key is not in the config parameters
+        :return: True if all criteria are satisfied
+        """
         for key in criteria.keys():
             # ensure key is valid in data
             if key not in data:
@@ -277,13 +403,8 @@ class Query(Configurable, Saveable):
 
             # now lots of control flow - dependent on the types of the variables
 
-            # if c_val is a dict, recurse
-            if type(c_val) is dict:
-                if not self._match(c_val, d_val):
-                    return False
-
             # neither c_val nor d_val are list
-            elif not any([type(v) is list for v in (c_val, d_val)]):
+            if not any([type(v) is list for v in (c_val, d_val)]):
                 if c_val != d_val:
                     return False
 
@@ -306,22 +427,45 @@ class Query(Configurable, Saveable):
 
         return True
 
+    @staticmethod
+    def get_outputs(indices: List[int], workers: int = None, refresh: bool = False) -> Dict[str, np.ndarray]:
+        """Load the consolidated NEURON outputs table for a sim, building it first if missing or out of date.
+
+        :param indices: sample, model, and sim indices (e.g. [0, 0, 0])
+        :param workers: number of threads used to read n_sim outputs if the table must be built
+        :param refresh: also rebuild the table if any output file was overwritten in place since it was built, which
+            checks every output file (see Simulation.outputs_source_mtime)
+        :return: table as a dict of column name to array (see Simulation.consolidate_outputs)
+        """
+        sim_dir = Query.build_path(Object.SIMULATION, indices, just_directory=True)
+        if Simulation.outputs_table_stale(sim_dir, refresh=refresh):
+            sim_object: Simulation = Query.get_object(Object.SIMULATION, indices)
+            sim_object.consolidate_outputs(sim_dir, workers=workers)
+
+        with np.load(Simulation.outputs_table_path(sim_dir)) as table:
+            return {column: table[column] for column in table.files if column != 'source_mtime'}
+
     def threshold_data(
         self,
         sim_indices: List[int] = None,
         ignore_missing=False,
         meanify=False,
+        workers: int = None,
+        refresh: bool = False,
     ):
         """Obtain threshold data as a pandas DataFrame.
 
         :param sim_indices: list of simulation indices to include in the threshold data.
         :param ignore_missing: if True, missing threshold data will not cause an error.
         :param meanify: if True, the threshold data will be returned as a mean of each nsim.
+        :param workers: maximum number of threads reading files concurrently: the sims are loaded concurrently if
+            there are several (each reading its n_sims serially), else the n_sims of the sim are. Defaults to None,
+            which uses the ThreadPoolExecutor default. Pass 1 to load serially.
+        :param refresh: check every output file for changes in place (see Query.get_outputs). Defaults to False.
         :raises LookupError: If no results (called before Query.run())
+        :raises FileNotFoundError: If a threshold is missing and ignore_missing is False
         :return: pandas DataFrame of thresholds.
         """
-        # quick helper class for storing data values
-
         # validation
         if self._result is None:
             raise LookupError("No query results, Query.run() must be called before calling analysis methods.")
@@ -329,124 +473,101 @@ class Query(Configurable, Saveable):
         if sim_indices is None:
             sim_indices = self.search(Config.CRITERIA, 'indices', 'sim')
 
-        alldat = []
+        nsim_columns = ['nsim', 'fiberset_index', 'waveform_index', 'active_src_index']
+        fiber_columns = ['nsim', 'inner', 'fiber', 'index', 'fiberset_index', 'waveform_index', 'active_src_index']
 
-        # loop samples
-        sample_results: dict
-        for sample_results in self._result.get('samples', []):
-            sample_index = sample_results['index']
-            sample_object: Sample = self.get_object(Object.SAMPLE, [sample_index])
-            slide: Slide = sample_object.slides[0]
-            n_inners = sum(len(fasc.inners) for fasc in slide.fascicles)
+        sims = [
+            [sample_results['index'], model_results['index'], sim_index]
+            for sample_results in self._result.get('samples', [])
+            for model_results in sample_results.get('models', [])
+            for sim_index in sim_indices
+        ]
 
-            # loop models
-            for model_results in sample_results.get('models', []):
-                model_index = model_results['index']
+        # loading is dominated by file system latency, so fetch the sims concurrently (results stay in order); a
+        # single pool bounds the threads: across sims if there are several, else across the n_sims of the one sim
+        if len(sims) == 1:
+            all_outputs = [self.get_outputs(sims[0], workers=workers, refresh=refresh)]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                all_outputs = list(
+                    executor.map(lambda indices: self.get_outputs(indices, workers=1, refresh=refresh), sims)
+                )
 
-                for sim_index in sim_indices:
-                    sim_object = self.get_object(Object.SIMULATION, [sample_index, model_index, sim_index])
-
-                    # whether the comparison key is for 'fiber' or 'wave', the nsims will always be in order!
-                    # this realization allows us to simply loop through the factors in sim.factors[key] and treat the
-                    # indices as if they were the nsim indices
-                    for nsim_index, (
-                        potentials_product_index,
-                        waveform_index,
-                    ) in enumerate(sim_object.master_product_indices):
-                        (
-                            active_src_index,
-                            fiberset_index,
-                        ) = sim_object.potentials_product[potentials_product_index]
-                        # fetch outer->inner->fiber and out->inner maps
-                        out_in_fib, out_in = sim_object.fiberset_map_pairs[fiberset_index]
-
-                        # build base dirs for fetching thresholds
-                        sim_dir = self.build_path(
-                            Object.SIMULATION,
-                            [sample_index, model_index, sim_index],
-                            just_directory=True,
-                        )
-                        n_sim_dir = os.path.join(sim_dir, 'n_sims', str(nsim_index))
+        alldat = []
+        for (sample_index, model_index, sim_index), outputs in zip(sims, all_outputs):
+            thresholds = np.abs(outputs['threshold'])
+
+            n_missing = np.count_nonzero(np.isnan(thresholds))
+            if n_missing > 0:
+                message = (
+                    f'Missing {n_missing} threshold(s) for sample {sample_index}, model {model_index}, sim {sim_index}'
+                )
+                if not ignore_missing:
+                    raise FileNotFoundError(message)
+                warnings.warn(f'{message}, but continuing.', stacklevel=2)
+
+            data = pd.DataFrame({column: outputs[column] for column in fiber_columns})
+            data['threshold'] = thresholds
+            data.insert(0, 'sim', sim_index)
+            data.insert(0, 'model', model_index)
+            data.insert(0, 'sample', sample_index)
+
+            if meanify is True:
+                # NaN thresholds (ignore_missing) propagate into the statistics of their nsim
+                data = (
+                    data.groupby(['sample', 'model', 'sim', *nsim_columns], sort=True)['threshold']
+                    .agg(
+                        mean=lambda x: np.mean(x.to_numpy()),
+                        std=lambda x: np.std(x.to_numpy(), ddof=1),
+                        sem=lambda x: stats.sem(x.to_numpy()),
+                    )
+                    .reset_index()
+                )
+            alldat.append(data)
 
-                        # init thresholds container for this model, sim, nsim
-                        thresholds: List[float] = []
+        if len(alldat) == 0:
+            return pd.DataFrame()
 
-                        # fetch all thresholds
-                        for inner in range(n_inners):
-                            outer = [index for index, inners in enumerate(out_in) if inner in inners][0]
+        return pd.concat(alldat, ignore_index=True)
 
-                            for local_fiber_index, _ in enumerate(out_in_fib[outer][out_in[outer].index(inner)]):
-                                master_index = sim_object.indices_n_to_fib(fiberset_index, inner, local_fiber_index)
+    @staticmethod
+    def threshold_errors(
+        data: pd.DataFrame,
+        reference: dict,
+        keys: List[str] = None,
+        by: List[str] = None,
+    ) -> pd.DataFrame:
+        """Calculate the percent error of each threshold with respect to a reference (e.g., for convergence studies).
+
+        Every row is matched to the reference row with equal key values in a single merge, so the cost is linear in
+        the number of thresholds.
+
+        :param data: thresholds, as returned by threshold_data() (possibly concatenated across queries)
+        :param reference: column values selecting the reference thresholds (e.g., {'model': 0})
+        :param keys: columns identifying the same fiber in the reference and the other rows. Defaults to sample,
+            sim, nsim, and (master fiber) index.
+        :param by: if provided, columns to group errors by (e.g., ['sample', 'model', 'nsim']); the mean, std, and max
+            error of each group are returned instead of the error of each threshold.
+        :return: data with reference_threshold and error (percent) columns, or the grouped error summary.
+            Rows without a matching reference have NaN error.
+        """
+        keys = ['sample', 'sim', 'nsim', 'index'] if keys is None else list(keys)
 
-                                thresh_path = os.path.join(
-                                    n_sim_dir,
-                                    'data',
-                                    'outputs',
-                                    f'thresh_inner{inner}_fiber{local_fiber_index}.dat',
-                                )
-                                if ignore_missing:
-                                    try:
-                                        threshold = np.loadtxt(thresh_path)
-                                    except IOError:
-                                        threshold = np.array(np.nan)
-                                        warnings.warn('Missing threshold, but continuing.', stacklevel=2)
-                                else:
-                                    threshold = np.loadtxt(thresh_path)
-
-                                if threshold.size > 1:
-                                    threshold = threshold[-1]
-                                if meanify is True:
-                                    thresholds.append(abs(threshold))
-                                else:
-                                    alldat.append(
-                                        {
-                                            'sample': sample_results['index'],
-                                            'model': model_results['index'],
-                                            'sim': sim_index,
-                                            'nsim': nsim_index,
-                                            'inner': inner,
-                                            'fiber': local_fiber_index,
-                                            'index': master_index,
-                                            'fiberset_index': fiberset_index,
-                                            'waveform_index': waveform_index,
-                                            'active_src_index': active_src_index,
-                                            'threshold': abs(threshold),
-                                        }
-                                    )
-
-                        if meanify is True:
-                            if len(thresholds) == 0:
-                                alldat.append(
-                                    {
-                                        'sample': sample_results['index'],
-                                        'model': model_results['index'],
-                                        'sim': sim_index,
-                                        'nsim': nsim_index,
-                                        'fiberset_index': fiberset_index,
-                                        'waveform_index': waveform_index,
-                                        'active_src_index': active_src_index,
-                                        'mean': np.nan,
-                                    }
-                                )
-                            else:
-                                thresholds: np.ndarray = np.array(thresholds)
-
-                                alldat.append(
-                                    {
-                                        'sample': sample_results['index'],
-                                        'model': model_results['index'],
-                                        'sim': sim_index,
-                                        'nsim': nsim_index,
-                                        'fiberset_index': fiberset_index,
-                                        'waveform_index': waveform_index,
-                                        'active_src_index': active_src_index,
-                                        'mean': np.mean(thresholds),
-                                        'std': np.std(thresholds, ddof=1),
-                                        'sem': stats.sem(thresholds),
-                                    }
-                                )
+        is_reference = np.logical_and.reduce([data[column] == value for column, value in reference.items()])
+        reference_data = data.loc[is_reference, keys + ['threshold']].rename(
+            columns={'threshold': 'reference_threshold'}
+        )
+
+        # many_to_one raises if the keys do not identify a single reference threshold
+        errors = data.merge(reference_data, on=keys, how='left', validate='many_to_one')
+        errors['error'] = (
+            100 * (errors['threshold'] - errors['reference_threshold']).abs() / errors['reference_threshold']
+        )
+
+        if by is None:
+            return errors
 
-        return pd.DataFrame(alldat)
+        return errors.groupby(list(by))['error'].agg(['mean', 'std', 'max']).reset_index()
 
     def excel_output(  # noqa: C901
         self,
@@ -458,8 +579,15 @@ class Query(Configurable, Saveable):
         config_paths: bool = True,
         column_width: int = None,
         console_output: bool = True,
+        file_format: str = 'xlsx',
+        threshold_stats: bool = False,
+        workers: int = None,
     ):
-        """Output summary of query.
+        """Output summary of query, with one row per nsim and one sheet (or file) per sim.
+
+        The rows of each sim are built from its metadata (see Query.get_metadata), so every n_sim gets a row, even
+        one without outputs. Threshold statistics are read from the consolidated outputs table (see
+        Query.get_outputs) only if requested.
 
         NOTE: for all key lists, the values themselves are lists, functioning as a JSON pointer.
 
@@ -471,19 +599,44 @@ class Query(Configurable, Saveable):
         :param: config_paths: Include column for each config path. Defaults to True.
         :param: column_width: Column width for Excel document. Defaults to None (system default).
         :param: console_output: Print progress to console. Defaults to False.
+        :param: file_format: 'xlsx' for one workbook with a sheet per sim, or 'csv' or 'parquet' for one file per sim
+            (named <filepath without extension>_sim<index>.<file_format>), which is faster for very large exports.
+            Parquet requires pyarrow or fastparquet. Defaults to 'xlsx'.
+        :param: threshold_stats: Include the mean, standard deviation, and standard error of the thresholds of each
+            nsim (missing thresholds are skipped). Defaults to False.
+        :param: workers: number of threads reading n_sim outputs if a consolidated outputs table must be built
+        :raises ValueError: If file_format is not 'xlsx', 'csv', or 'parquet', or if a factor key has the same name
+            as another column of its sim
         """
-        sims: dict = {}
+        if file_format not in ['xlsx', 'csv', 'parquet']:
+            raise ValueError(f'Invalid file_format "{file_format}", must be one of "xlsx", "csv", or "parquet".')
+
+        sims: Dict[int, List[pd.DataFrame]] = {}
         sample_keys: List[list] = sample_keys if sample_keys else []
         model_keys: List[list] = model_keys if model_keys else []
         sim_keys: List[list] = sim_keys if sim_keys else []
 
+        def config_columns(mode: Config, name: str, index: int, keys: List[list]) -> dict:
+            """Build the index and key columns of a config (each a single value, broadcast over the nsim rows).
+
+            :param mode: Config enum of the loaded config
+            :param name: name of the config, used as the column prefix
+            :param index: index of the config
+            :param keys: keys to output
+            :return: dict of column name to value
+            """
+            columns = {f'{name.capitalize()} Index': index} if individual_indices else {}
+            for key in keys:
+                columns['->'.join([name] + key)] = self.search(mode, *key)
+            return columns
+
         # SAMPLE
         sample_results: dict
         for sample_results in self._result.get('samples', []):
             sample_index: int = sample_results['index']
             sample_config_path: str = self.build_path(Config.SAMPLE, [sample_index])
-            sample_config: dict = self.load(sample_config_path)
-            self.add(SetupMode.OLD, Config.SAMPLE, sample_config)
+            self.add(SetupMode.OLD, Config.SAMPLE, self.load(sample_config_path))
+            sample_columns = config_columns(Config.SAMPLE, 'sample', sample_index, sample_keys)
 
             if console_output:
                 print(f'sample: {sample_index}')
@@ -493,126 +646,99 @@ class Query(Configurable, Saveable):
             for model_results in sample_results.get('models', []):
                 model_index = model_results['index']
                 model_config_path: str = self.build_path(Config.MODEL, [sample_index, model_index])
-                model_config: dict = self.load(model_config_path)
-                self.add(SetupMode.OLD, Config.MODEL, model_config)
+                self.add(SetupMode.OLD, Config.MODEL, self.load(model_config_path))
+                model_columns = config_columns(Config.MODEL, 'model', model_index, model_keys)
 
                 if console_output:
                     print(f'\tmodel: {model_index}')
 
                 # SIM
                 for sim_index in model_results.get('sims', []):
+                    indices = [sample_index, model_index, sim_index]
                     sim_config_path = self.build_path(Config.SIM, indices=[sim_index])
-                    sim_config = self.load(sim_config_path)
-                    self.add(SetupMode.OLD, Config.SIM, sim_config)
-                    sim_object: Simulation = self.get_object(Object.SIMULATION, [sample_index, model_index, sim_index])
-                    sim_dir = self.build_path(
-                        Object.SIMULATION,
-                        [sample_index, model_index, sim_index],
-                        just_directory=True,
-                    )
+                    self.add(SetupMode.OLD, Config.SIM, self.load(sim_config_path))
+                    sim_columns = config_columns(Config.SIM, 'sim', sim_index, sim_keys)
+                    sim_metadata: dict = self.get_metadata(indices)
+                    sim_dir = self.build_path(Object.SIMULATION, indices, just_directory=True)
 
                     if console_output:
                         print(f'\t\tsim: {sim_index}')
 
-                    # init sheet if necessary
-                    if str(sim_index) not in sims.keys():
-                        # base header
-                        sample_parts = [
-                            'Sample Index',
-                            *['->'.join(['sample'] + key) for key in sample_keys],
-                        ]
-                        model_parts = [
-                            'Model Index',
-                            *['->'.join(['model'] + key) for key in model_keys],
-                        ]
-                        sim_parts = [
-                            'Sim Index',
-                            *['->'.join(['sim'] + key) for key in sim_keys],
-                        ]
-                        header = [
-                            'Indices',
-                            *(sample_parts if individual_indices else sample_parts[1:]),
-                            *(model_parts if individual_indices else model_parts[1:]),
-                            *(sim_parts if individual_indices else sim_parts[1:]),
-                        ]
-                        if individual_indices:
-                            header += ['Nsim Index']
-                        # populate with nsim factors
-                        for fib_key_name in sim_object.fiberset_key:
-                            header.append(fib_key_name)
-                        for wave_key_name in sim_object.wave_key:
-                            header.append(wave_key_name)
-                        # add paths
-                        if config_paths:
-                            header += [
-                                'Sample Config Path',
-                                'Model Config Path',
-                                'Sim Config Path',
-                                'NSim Path',
-                            ]
-                        # set header as first row
-                        sims[str(sim_index)] = [header]
-
-                    # NSIM
-                    for nsim_index, (
-                        potentials_product_index,
-                        waveform_index,
-                    ) in enumerate(sim_object.master_product_indices):
-                        nsim_dir = os.path.join(sim_dir, 'n_sims', str(nsim_index))
-                        (
-                            active_src_index,
-                            fiberset_index,
-                        ) = sim_object.potentials_product[potentials_product_index]
-                        # fetch additional sample, model, and sim values
-                        # that's one juicy list comprehension right there
-                        values = [
-                            [self.search(config, *key) for key in category]
-                            for category, config in zip(
-                                [sample_keys, model_keys, sim_keys],
-                                [Config.SAMPLE, Config.MODEL, Config.SIM],
-                            )
-                        ]
-                        # base row data
-                        sample_parts = [sample_index, *values[0]]
-                        model_parts = [model_index, *values[1]]
-                        sim_parts = [sim_index, *values[2]]
-                        row = [
-                            f'{sample_index}_{model_index}_{sim_index}_{nsim_index}',
-                            *(sample_parts if individual_indices else sample_parts[1:]),
-                            *(model_parts if individual_indices else model_parts[1:]),
-                            *(sim_parts if individual_indices else sim_parts[1:]),
-                        ]
-                        if individual_indices:
-                            row += [nsim_index]
-                        # populate factors (same order as header)
-                        for fib_key_value in sim_object.fiberset_product[fiberset_index]:
-                            row.append(fib_key_value)
-                        for wave_key_value in sim_object.wave_product[waveform_index]:
-                            row.append(wave_key_value)
-                        # add paths
-                        if config_paths:
-                            row += [
-                                sample_config_path,
-                                model_config_path,
-                                sim_config_path,
-                                nsim_dir,
-                            ]
-                        # add to sim sheet
-                        sims[str(sim_index)].append(row)
+                    # NSIM (one row per n_sim of the sim, whether or not it has any outputs)
+                    nsim_indices = np.arange(len(sim_metadata['master_product_indices']))
+                    potentials_product_indices, waveform_indices = (
+                        np.array(sim_metadata['master_product_indices'], dtype=int).reshape(-1, 2).T
+                    )
+                    fiberset_indices = [
+                        sim_metadata['potentials_product'][index][1] for index in potentials_product_indices
+                    ]
+
+                    # config values may be lists, so broadcast them to all nsim rows explicitly
+                    sheet = {
+                        'Indices': [f'{sample_index}_{model_index}_{sim_index}_{nsim}' for nsim in nsim_indices],
+                        **{
+                            name: [value] * len(nsim_indices)
+                            for name, value in {**sample_columns, **model_columns, **sim_columns}.items()
+                        },
+                    }
+                    if individual_indices:
+                        sheet['Nsim Index'] = nsim_indices
+                    # populate factors, each product is a tuple of values (one per key)
+                    for products_key, keys_key, product_indices in [
+                        ('fiberset_product', 'fiberset_key', fiberset_indices),
+                        ('wave_product', 'wave_key', waveform_indices),
+                    ]:
+                        products = sim_metadata[products_key]
+                        factors = [products[index] for index in product_indices]
+                        for i, key_name in enumerate(sim_metadata[keys_key]):
+                            if key_name in sheet:
+                                raise ValueError(
+                                    f'Factor "{key_name}" of sim {sim_index} would overwrite an existing column '
+                                    f'of the same name.'
+                                )
+                            sheet[key_name] = [factor[i] for factor in factors]
+                    if threshold_stats:
+                        outputs = self.get_outputs(indices, workers=workers)
+                        # n_sims without any thresholds are left as NaN
+                        stats = (
+                            pd.Series(np.abs(outputs['threshold']), index=outputs['nsim'])
+                            .groupby(level=0)
+                            .agg(['mean', 'std', 'sem'])
+                            .reindex(nsim_indices)
+                        )
+                        sheet['Threshold Mean'] = stats['mean'].to_numpy()
+                        sheet['Threshold Std'] = stats['std'].to_numpy()
+                        sheet['Threshold SEM'] = stats['sem'].to_numpy()
+                    # add paths
+                    if config_paths:
+                        sheet['Sample Config Path'] = [sample_config_path] * len(nsim_indices)
+                        sheet['Model Config Path'] = [model_config_path] * len(nsim_indices)
+                        sheet['Sim Config Path'] = [sim_config_path] * len(nsim_indices)
+                        sheet['NSim Path'] = [os.path.join(sim_dir, 'n_sims', str(nsim)) for nsim in nsim_indices]
+
+                    sims.setdefault(sim_index, []).append(pd.DataFrame(sheet))
 
                     # "prune" old configs
                     self.remove(Config.SIM)
                 self.remove(Config.MODEL)
             self.remove(Config.SAMPLE)
 
-        # build Excel file, with one sim per sheet
-        writer = pd.ExcelWriter(filepath)
-        for sim_index, sheet_data in sims.items():
-            sheet_name = f'Sim {sim_index}'
-            pd.DataFrame(sheet_data).to_excel(writer, sheet_name=sheet_name, header=False, index=False)
-            if column_width is not None:
-                writer.sheets[sheet_name].set_column(0, 256, column_width)
-            else:
-                writer.sheets[sheet_name].set_column(0, 256)
+        sheets = {sim_index: pd.concat(frames, ignore_index=True) for sim_index, frames in sims.items()}
 
-        writer.save()
+        if file_format != 'xlsx':
+            # one file per sim, next to the requested filepath
+            root, _ = os.path.splitext(filepath)
+            for sim_index, sheet in sheets.items():
+                sim_filepath = f'{root}_sim{sim_index}.{file_format}'
+                if file_format == 'csv':
+                    sheet.to_csv(sim_filepath, index=False)
+                else:
+                    sheet.to_parquet(sim_filepath, index=False)
+            return
+
+        # build Excel file, with one sim per sheet
+        with pd.ExcelWriter(filepath, engine='xlsxwriter') as writer:
+            for sim_index, sheet in sheets.items():
+                sheet_name = f'Sim {sim_index}'
+                sheet.to_excel(writer, sheet_name=sheet_name, index=False)
+                writer.sheets[sheet_name].set_column(0, sheet.shape[1] - 1, column_width)
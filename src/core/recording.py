@@ -0,0 +1,75 @@
+#!/usr/bin/env python3.7
+
+"""Defines Recording class.
+
+The copyrights of this software are owned by Duke University.
+Please refer to the LICENSE and README.md files for licensing
+instructions. The source code can be found on the following GitHub
+repository: https://github.com/wmglab-duke/ascent
+"""
+
+from typing import List, Union
+
+import numpy as np
+
+
+class Recording:
+    """Reader for NEURON recordings (Vm, gating, Ve, Istim) saved by SaveTimeCourse.hoc or SaveSpatialDist.hoc.
+
+    Each recording is a table whose first column is the row index (time in ms for time courses, node number for
+    spatial distributions) and whose other columns are the recorded values (one per node or per check time).
+
+    Text recordings (.dat) are loaded in full. Binary recordings (.bin, saved if "binary" is true in Sim "saving") have
+    a two line text header ("#ASCENT_BINARY <dtype> <n_rows> <n_columns>", then the column labels), followed by each
+    column as raw values in native byte order. They are memory mapped, so only the values that are sliced are read.
+    """
+
+    BINARY_TAG = '#ASCENT_BINARY'
+
+    def __init__(self, path: str):
+        """Open a recording.
+
+        :param path: path to the recording (.dat or .bin)
+        """
+        self.path = path
+
+        with open(path, 'rb') as f:
+            first_line = f.readline().decode()
+            binary = first_line.startswith(self.BINARY_TAG)
+            if binary:
+                _, dtype, n_rows, n_columns = first_line.split()
+                self.labels: List[str] = f.readline().decode().split()
+                offset = f.tell()
+            else:
+                self.labels: List[str] = first_line.split()
+
+        if binary:
+            # columns are stored one after another, so the transposed view has one row per time step (or node)
+            table = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(int(n_columns), int(n_rows))).T
+        else:
+            table = np.loadtxt(path, skiprows=1, ndmin=2)
+
+        self.index: np.ndarray = np.array(table[:, 0])
+        self.values: np.ndarray = table[:, 1:]
+
+    def select(
+        self,
+        start: float = None,
+        stop: float = None,
+        columns: Union[int, slice, List[int]] = None,
+    ) -> np.ndarray:
+        """Get the values for a range of the index (i.e., a time window or a range of nodes).
+
+        :param start: first index value (e.g., time in ms) to include. Defaults to the first row.
+        :param stop: last index value to include. Defaults to the last row.
+        :param columns: positions of the value columns to include (e.g., nodes of a time course). Defaults to all.
+        :return: array of shape (rows, columns), or (rows,) if columns is an int
+        """
+        first = 0 if start is None else np.searchsorted(self.index, start, side='left')
+        last = len(self.index) if stop is None else np.searchsorted(self.index, stop, side='right')
+
+        values = self.values[first:last]
+        if columns is not None:
+            values = values[:, columns]
+
+        return np.array(values)
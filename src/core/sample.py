@@ -11,7 +11,8 @@ import math
 import os
 import shutil
 import warnings
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
 
 import cv2
 import matplotlib.pyplot as plt
@@ -132,7 +133,7 @@ class Sample(Configurable, Saveable):
 
         return self
 
-    def im_preprocess(self, path):
+    def im_preprocess(self, path) -> np.ndarray:
         """Perform cleaning operations on the input image, and convert to uint8.
 
         Important that at the very least image is converted to uint8
@@ -140,6 +141,7 @@ class Sample(Configurable, Saveable):
         :raises ValueError: if object removal area is negative
         :raises MaskError: if the mask is not binary
         :param path: path to image which will be processed
+        :return: the processed image, as written back to path
         """
         img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
         if len(np.unique(img)) != 2:
@@ -162,6 +164,7 @@ class Sample(Configurable, Saveable):
             img = morphology.remove_small_objects(img.astype(bool), removal_size)
         imgout = (255 * (img / np.amax(img))).astype(np.uint8)
         cv2.imwrite(path, imgout)
+        return imgout
 
     @staticmethod
     def get_factor(
@@ -322,14 +325,15 @@ class Sample(Configurable, Saveable):
         """
         return os.path.exists(mask_file_name.value)
 
-    def calculate_orientation(self, slide):
+    def calculate_orientation(self, slide, masks: Dict[str, np.ndarray]):
         """Calculate orientation angle from a.tif.
 
         :param slide: Slide object
+        :param masks: preprocessed mask images (see mask_validation)
         :raises MaskError: If the mask has an invalid number of objects
         :return: Slide object
         """
-        img = np.flipud(cv2.imread(MaskFileNames.ORIENTATION.value, -1))
+        img = np.flipud(masks[MaskFileNames.ORIENTATION.value])
 
         if len(img.shape) > 2 and img.shape[2] > 1:
             img = img[:, :, 0]
@@ -358,35 +362,40 @@ class Sample(Configurable, Saveable):
 
         return slide
 
-    def mask_validation(self):
-        """Validate mask file dimensions.
+    def mask_validation(self) -> Dict[str, np.ndarray]:
+        """Validate mask file dimensions and preprocess the masks.
+
+        Masks are read and preprocessed concurrently, one thread per mask, and are returned so that later steps do not
+        read them from disk again.
 
         :raises MaskError: If mask dimensions are not equal
         :raises FileNotFoundError: If mask file is not found
+        :return: preprocessed mask images, keyed by mask file name (e.g., 'i.tif')
         """
-        mask_dims = []
-        for mask in ["COMPILED", "INNERS", "OUTERS", "NERVE", "ORIENTATION"]:
-            maskfile = getattr(MaskFileNames, mask)
-            if self.mask_exists(maskfile):
-                mask_dims.append(cv2.imread(maskfile.value).shape)
-                self.im_preprocess(maskfile.value)
-        if len(mask_dims) == 0:
+        maskfiles = [getattr(MaskFileNames, mask) for mask in ["COMPILED", "INNERS", "OUTERS", "NERVE", "ORIENTATION"]]
+        paths = [maskfile.value for maskfile in maskfiles if self.mask_exists(maskfile)]
+        if len(paths) == 0:
             raise FileNotFoundError("No input morphology masks found")
+        with ThreadPoolExecutor(max_workers=len(paths)) as executor:
+            masks = dict(zip(paths, executor.map(self.im_preprocess, paths)))
+        mask_dims = [img.shape[:2] for img in masks.values()]
         if not np.all(np.array(mask_dims) == mask_dims[0]):
             raise MaskError("Input morphology masks do not have identical dimensions")
         scalemask = MaskFileNames.SCALE_BAR
         if self.mask_exists(scalemask):
-            mask_dims.append(cv2.imread(scalemask.value).shape)
+            mask_dims.append(cv2.imread(scalemask.value).shape[:2])
             if not np.all(np.array(mask_dims) == mask_dims[0]):
                 print(
                     'WARNING: Scale bar mask has a different resolution than morphology masks. \n'
                     'Program will continue and assume that the scale bar mask microns/pixel ratio is correct.'
                 )
+        return masks
 
-    def get_fascicles_from_masks(self, mask_input_mode):
+    def get_fascicles_from_masks(self, mask_input_mode, masks: Dict[str, np.ndarray]):
         """Generate fascicle traces from input masks.
 
         :param mask_input_mode: MaskInputMode
+        :param masks: preprocessed mask images (see mask_validation)
         :raises FileNotFoundError: if a mask file is not found
         :raises ValueError: if mask input mode is not recognized
         :return: list of fascicles
@@ -396,22 +405,24 @@ class Sample(Configurable, Saveable):
             raise ValueError("Invalid MaskInputMode in Sample.")
 
         if mask_input_mode == MaskInputMode.INNER_AND_OUTER_COMPILED:
-            if self.mask_exists(MaskFileNames.COMPILED):
+            if MaskFileNames.COMPILED.value in masks:
                 # first generate outer and inner images
-                inner_mask = os.path.split(MaskFileNames.COMPILED.value)[0] + 'i_from_c.tif'
-                outer_mask = os.path.split(MaskFileNames.COMPILED.value)[0] + 'o_from_c.tif'
-                self.io_from_compiled(MaskFileNames.COMPILED.value, inner_mask, outer_mask)
+                inner_path = os.path.split(MaskFileNames.COMPILED.value)[0] + 'i_from_c.tif'
+                outer_path = os.path.split(MaskFileNames.COMPILED.value)[0] + 'o_from_c.tif'
+                inner_mask, outer_mask = self.io_from_compiled(
+                    masks[MaskFileNames.COMPILED.value], inner_path, outer_path
+                )
 
             else:
                 raise FileNotFoundError("Compiled masks required for input mode INNER_AND_OUTER_COMPILED.")
         else:
-            if not self.mask_exists(MaskFileNames.INNERS):
+            if MaskFileNames.INNERS.value not in masks:
                 raise FileNotFoundError("Inner mask required for input mode INNERS.")
-            inner_mask = MaskFileNames.INNERS.value
+            inner_mask = masks[MaskFileNames.INNERS.value]
             if mask_input_mode == MaskInputMode.INNER_AND_OUTER_SEPARATE:
-                if not self.mask_exists(MaskFileNames.OUTERS):
+                if MaskFileNames.OUTERS.value not in masks:
                     raise FileNotFoundError("Inner AND outer masks required for input mode INNER_AND_OUTER_SEPARATE.")
-                outer_mask = MaskFileNames.OUTERS.value
+                outer_mask = masks[MaskFileNames.OUTERS.value]
             else:  # INNERS mode
                 outer_mask = None
 
@@ -419,15 +430,16 @@ class Sample(Configurable, Saveable):
         fascicles = Fascicle.to_list(inner_mask, outer_mask, self.contour_mode)
         return fascicles
 
-    def get_epineurium_from_mask(self):
+    def get_epineurium_from_mask(self, masks: Dict[str, np.ndarray]):
         """Generate epineurium trace from mask.
 
+        :param masks: preprocessed mask images (see mask_validation)
         :raises FileNotFoundError: if epineurium mask is not found
         :return: Nerve object
         """
-        if not self.mask_exists(MaskFileNames.NERVE):
+        if MaskFileNames.NERVE.value not in masks:
             raise FileNotFoundError("NerveMode is PRESENT, but no nerve mask was found.")
-        img_nerve = cv2.imread(MaskFileNames.NERVE.value, -1)
+        img_nerve = masks[MaskFileNames.NERVE.value]
 
         if len(img_nerve.shape) > 2 and img_nerve.shape[2] > 1:
             img_nerve = img_nerve[:, :, 0]
@@ -458,13 +470,13 @@ class Sample(Configurable, Saveable):
         [os.rename(x, os.path.splitext(x)[0] + '.tif') for x in os.listdir('.')]
 
         # preprocess binary masks
-        self.mask_validation()
+        masks = self.mask_validation()
         # get fascicle objects
-        fascicles = self.get_fascicles_from_masks(self.mask_input_mode)
+        fascicles = self.get_fascicles_from_masks(self.mask_input_mode, masks)
 
         # get nerve object if present
         if self.nerve_mode == NerveMode.PRESENT:
-            nerve = self.get_epineurium_from_mask()
+            nerve = self.get_epineurium_from_mask(masks)
         else:
             if len(fascicles) > 1:
                 raise IncompatibleParametersError(
@@ -483,8 +495,8 @@ class Sample(Configurable, Saveable):
         slide.validate()
 
         # get orientation angle (used later to calculate pos_ang for model.json)
-        if self.mask_exists(MaskFileNames.ORIENTATION):
-            slide = self.calculate_orientation(slide)
+        if MaskFileNames.ORIENTATION.value in masks:
+            slide = self.calculate_orientation(slide, masks)
 
         slide = self.correct_shrinkage(slide)
 
@@ -646,6 +658,7 @@ class Sample(Configurable, Saveable):
             render=render_deform,
             minimum_distance=sep_fascicles,
             ratio=deform_ratio,
+            tolerance=self.search(Config.SAMPLE, 'deform_tolerance', optional=True),
         )
 
         partially_deformed_nerve = Deformable.deform_steps(deformable.start, deformable.end, morph_count, deform_ratio)[
@@ -657,7 +670,8 @@ class Sample(Configurable, Saveable):
             fascicle.rotate(angle)
 
         if deform_ratio != 1 and partially_deformed_nerve is not None:
-            partially_deformed_nerve.shift(-np.asarray(list(partially_deformed_nerve.centroid()) + [0]))
+            # fascicle movements are relative to the start boundary, so shift the nerve by the start centroid
+            partially_deformed_nerve.shift(-np.asarray(list(deformable.start.centroid()) + [0]))
             slide.nerve = partially_deformed_nerve
             slide.nerve.offset(distance=sep_nerve)
         else:
@@ -771,11 +785,12 @@ class Sample(Configurable, Saveable):
     def io_from_compiled(imgin, i_out, o_out):
         """Generate inner and outer mask from compiled mask.
 
-        :param imgin: path to input image (hint: c.tif)
+        :param imgin: path to input image (hint: c.tif), or the loaded image
         :param i_out: full path to desired output inner mask
         :param o_out: full path to desired output outer mask
+        :return: inner and outer mask images
         """
-        compiled = cv2.imread(imgin, -1)
+        compiled = cv2.imread(imgin, -1) if isinstance(imgin, str) else imgin.copy()
 
         imgnew = cv2.bitwise_not(compiled)
 
@@ -789,6 +804,8 @@ class Sample(Configurable, Saveable):
 
         cv2.imwrite(o_out, compiled + imgnew)
 
+        return imgnew, compiled + imgnew
+
     def write(self, mode: WriteMode) -> 'Sample':
         """Write entire list of slides.
 
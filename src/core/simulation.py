@@ -10,6 +10,7 @@ repository: https://github.com/wmglab-duke/ascent
 
 import copy
 import distutils.dir_util as du
+import hashlib
 import itertools
 import json
 import os
@@ -17,7 +18,10 @@ import pickle
 import re
 import shutil
 import sys
+import threading
 import warnings
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple
 
 import numpy as np
@@ -72,6 +76,8 @@ class Simulation(Configurable, Saveable):
         self.fiberset_key = []
         self.fiberset_map_pairs: List[Tuple[List, List]] = []
         self.ss_fiberset_map_pairs: List[Tuple[List, List]] = []
+        self._fib_to_n: List[dict] = []  # per fiberset: fiber index -> (inner, local fiber index)
+        self._n_to_fib: List[dict] = []  # per fiberset: (inner, local fiber index) -> fiber index
         self.src_product = []
         self.src_key = []
         self.potentials_product = []
@@ -169,6 +175,8 @@ class Simulation(Configurable, Saveable):
             self.fiberset_map_pairs.append((fiberset.out_to_fib, fiberset.out_to_in))
             self.fibersets.append(fiberset)
 
+        self.build_index_maps()
+
         if self.search(Config.SIM, 'supersampled_bases', 'generate', optional=True):
             ss_fibercoords_directory = os.path.join(sim_directory, 'ss_coords')
             os.makedirs(ss_fibercoords_directory, exist_ok=True)
@@ -463,6 +471,7 @@ class Simulation(Configurable, Saveable):
             src_bases_indices = self.srcs_mapping(sim_dir)
 
             fiberset_directory = os.path.join(sim_dir, str(sim_num), 'fibersets', str(fiberset_ind))
+            manifest_fibers = []
 
             for fname_prefix, weights, bases_indices in zip([''], [active_src_vals], [src_bases_indices]):
                 if not any(np.isnan(weights)):
@@ -505,6 +514,15 @@ class Simulation(Configurable, Saveable):
                                     header=str(len(neuron_potentials_input)),
                                     comments='',
                                 )
+                                manifest_fibers.append(
+                                    {
+                                        'inner': inner_index,
+                                        'fiber': fiber_index,
+                                        'master_index': master_fiber_index,
+                                        'input': f'data/inputs/{filename_dat}',
+                                        'n_coords': len(neuron_potentials_input),
+                                    }
+                                )
                             elif file == 'diams.txt':
                                 make_inner_fiber_diam_key(
                                     fiberset_ind,
@@ -513,6 +531,8 @@ class Simulation(Configurable, Saveable):
                                     file,
                                 )
 
+            self.save_manifest(os.path.join(sim_dir, str(sim_num), 'n_sims', str(t)), fiberset_ind, manifest_fibers)
+
         return self
 
     def srcs_mapping(self, sim_dir):
@@ -573,6 +593,38 @@ class Simulation(Configurable, Saveable):
 
         return weighted_potentials
 
+    def build_index_maps(self) -> 'Simulation':
+        """Build lookup tables between fiber indices and (inner, local fiber) indices for every fiberset.
+
+        Called when fibers are written and after unpickling, so indices_fib_to_n() and indices_n_to_fib() are O(1).
+
+        :return: self
+        """
+        self._fib_to_n = []
+        self._n_to_fib = []
+        for out_fib, out_in in self.fiberset_map_pairs:
+            fib_to_n = {}
+            n_to_fib = {}
+            for outer_fibers, outer_inners in zip(out_fib, out_in):
+                for inner_fibers, inner_index in zip(outer_fibers, outer_inners):
+                    for local_fiber_index, fiber_index in enumerate(inner_fibers):
+                        # keep the first match, as a search in map order would
+                        fib_to_n.setdefault(fiber_index, (inner_index, local_fiber_index))
+                        n_to_fib.setdefault((inner_index, local_fiber_index), fiber_index)
+            self._fib_to_n.append(fib_to_n)
+            self._n_to_fib.append(n_to_fib)
+
+        return self
+
+    def index_maps(self) -> Tuple[List[dict], List[dict]]:
+        """Get the lookup tables between fiber indices and (inner, local fiber) indices, building them if needed.
+
+        :return: for each fiberset, map of fiber index to (inner, local fiber) and map of (inner, local fiber) to fiber
+        """
+        if len(self._fib_to_n) != len(self.fiberset_map_pairs):
+            self.build_index_maps()
+        return self._fib_to_n, self._n_to_fib
+
     def indices_fib_to_n(self, fiberset_ind, fiber_ind) -> Tuple[int, int]:
         """Get inner and fiber indices from fiber index and fiberset_index.
 
@@ -580,19 +632,10 @@ class Simulation(Configurable, Saveable):
         :param fiber_ind: fiber index within fiberset
         :return: (l, k) as in "inner<l>_fiber<k>.dat" for NEURON sim
         """
+        fib_to_n, _ = self.index_maps()
+        return fib_to_n[fiberset_ind][fiber_ind]
 
-        def search(arr, target) -> Tuple[int, int, int]:
-            for a, outer in enumerate(arr):
-                for b, inner in enumerate(outer):
-                    for c, fib in enumerate(inner):
-                        if fib == target:
-                            return a, b, c
-
-        out_fib, out_in = self.fiberset_map_pairs[fiberset_ind]
-        i, j, k = search(out_fib, fiber_ind)
-        return out_in[i][j], k
-
-    def indices_n_to_fib(self, fiberset_index, inner_index, local_fiber_index) -> Tuple[int, int]:
+    def indices_n_to_fib(self, fiberset_index, inner_index, local_fiber_index) -> int:
         """Get fiber index from inner and local fiber indices.
 
         :param fiberset_index: fiberset index
@@ -600,16 +643,26 @@ class Simulation(Configurable, Saveable):
         :param local_fiber_index: local fiber index
         :return: fiber index within fiberset
         """
+        _, n_to_fib = self.index_maps()
+        return n_to_fib[fiberset_index][(inner_index, local_fiber_index)]
 
-        def search(arr, target) -> Tuple[int, int]:
-            for a, outer in enumerate(arr):
-                for b, inner in enumerate(outer):
-                    if inner == target:
-                        return a, b
+    def __getstate__(self) -> dict:
+        """Drop the index lookup tables from pickles, since they are rebuilt on load.
+
+        :return: state to pickle
+        """
+        state = self.__dict__.copy()
+        state.pop('_fib_to_n', None)
+        state.pop('_n_to_fib', None)
+        return state
 
-        out_fib, out_in = self.fiberset_map_pairs[fiberset_index]
-        i, j = search(out_in, inner_index)
-        return out_fib[i][j][local_fiber_index]
+    def __setstate__(self, state: dict):
+        """Restore a pickled Simulation and rebuild its index lookup tables.
+
+        :param state: pickled state
+        """
+        self.__dict__.update(state)
+        self.build_index_maps()
 
     @staticmethod
     def _build_file_structure(sim_obj_dir, t):
@@ -769,16 +822,135 @@ class Simulation(Configurable, Saveable):
         """
         print(f'sample: {sample}, model: {model}, sim: {sim}, sim_dir: {sim_dir}, source: {source}')
 
-        sim_dir = os.path.join(sim_dir, 'n_sims')
+        n_sims_dir = os.path.join(sim_dir, 'n_sims')
 
+        imported = False
         for dirname in [f for f in os.listdir(source) if os.path.isdir(os.path.join(source, f))]:
             this_sample, this_model, this_sim, product_index = tuple(dirname.split('_'))
             if sample == int(this_sample) and model == int(this_model) and sim == int(this_sim):
-                if os.path.isdir(os.path.join(sim_dir, product_index)):
-                    shutil.rmtree(os.path.join(sim_dir, product_index))
-                shutil.copytree(os.path.join(source, dirname), os.path.join(sim_dir, product_index))
+                if os.path.isdir(os.path.join(n_sims_dir, product_index)):
+                    shutil.rmtree(os.path.join(n_sims_dir, product_index))
+                shutil.copytree(os.path.join(source, dirname), os.path.join(n_sims_dir, product_index))
                 if delete:
                     shutil.rmtree(os.path.join(source, dirname))
+                imported = True
+
+        # copytree preserves the timestamps of the source directories, so always rebuild the outputs table here (or,
+        # without the pickled Simulation, on the next query)
+        if imported:
+            Simulation.mark_outputs_updated(sim_dir)
+        sim_obj_path = os.path.join(sim_dir, 'sim.obj')
+        if imported and os.path.isfile(sim_obj_path):
+            with open(sim_obj_path, 'rb') as f:
+                sim_object: Simulation = pickle.load(f)
+            sim_object.consolidate_outputs(sim_dir)
+
+    @staticmethod
+    def manifest_path(nsim_dir: str) -> str:
+        """Get the path to the manifest of an n_sim.
+
+        :param nsim_dir: n_sim directory (i.e., sims/<sim>/n_sims/<n_sim>, or its exported copy)
+        :return: path to the manifest
+        """
+        return os.path.join(nsim_dir, 'manifest.json')
+
+    @staticmethod
+    def file_checksum(path: str) -> str:
+        """Compute the SHA-256 checksum of a file.
+
+        :param path: path to the file
+        :return: hex digest of the file contents
+        """
+        checksum = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                checksum.update(chunk)
+        return checksum.hexdigest()
+
+    def save_manifest(self, nsim_dir: str, fiberset_ind: int, fibers: List[dict]) -> 'Simulation':
+        """Save the manifest of an n_sim, listing its fibers and the checksums of its input files.
+
+        :param nsim_dir: n_sim directory (i.e., sims/<sim>/n_sims/<n_sim>)
+        :param fiberset_ind: index of the fiberset of the n_sim
+        :param fibers: inner, fiber, master_index, input (path relative to nsim_dir), and n_coords of each fiber
+        :return: self
+        """
+        inputs_dir = os.path.join(nsim_dir, 'data', 'inputs')
+        checksums = {
+            f'data/inputs/{file}': self.file_checksum(os.path.join(inputs_dir, file))
+            for file in sorted(os.listdir(inputs_dir))
+        }
+        with open(self.manifest_path(nsim_dir), 'w') as f:
+            json.dump(
+                {
+                    'fiberset_index': fiberset_ind,
+                    'fibers': sorted(fibers, key=lambda fiber: (fiber['inner'], fiber['fiber'])),
+                    'checksums': checksums,
+                },
+                f,
+                indent=2,
+            )
+
+        return self
+
+    @staticmethod
+    def n_sim_fibers(nsim_dir: str) -> List[Tuple[int, int]]:
+        """Get the (inner, fiber) indices of the fibers of an n_sim, from its manifest if it has one.
+
+        :param nsim_dir: n_sim directory (i.e., sims/<sim>/n_sims/<n_sim>, or its exported copy)
+        :return: (inner, fiber) of each fiber
+        """
+        if os.path.isfile(Simulation.manifest_path(nsim_dir)):
+            with open(Simulation.manifest_path(nsim_dir)) as f:
+                return [(fiber['inner'], fiber['fiber']) for fiber in json.load(f)['fibers']]
+
+        # n_sims built before manifests were written
+        fibers = []
+        for file in os.listdir(os.path.join(nsim_dir, 'data', 'inputs')):
+            match = re.match('inner([0-9]+)_fiber([0-9]+)\\.dat', file)
+            if match:
+                fibers.append((int(match.group(1)), int(match.group(2))))
+        return sorted(fibers)
+
+    @staticmethod
+    def verify_manifest(nsim_dir: str) -> List[str]:
+        """Check that the input files of an n_sim match the checksums in its manifest.
+
+        :param nsim_dir: n_sim directory (i.e., sims/<sim>/n_sims/<n_sim>, or its exported copy)
+        :return: the input files that are missing or changed (empty if all match, or if there is no manifest)
+        """
+        if not os.path.isfile(Simulation.manifest_path(nsim_dir)):
+            return []
+        with open(Simulation.manifest_path(nsim_dir)) as f:
+            checksums = json.load(f)['checksums']
+
+        problems = []
+        for file, checksum in checksums.items():
+            path = os.path.join(nsim_dir, *file.split('/'))
+            if not os.path.isfile(path):
+                problems.append(f'{path} (missing)')
+            elif Simulation.file_checksum(path) != checksum:
+                problems.append(f'{path} (checksum mismatch)')
+        return problems
+
+    @staticmethod
+    def n_sims_intact(sample: int, model: int, sim: int, source: str):
+        """Check that the inputs of every n_sim in the source directory match their manifests.
+
+        :param sample: Sample index
+        :param model: Model index
+        :param sim: Sim index
+        :param source: Source directory (where n_sims are located)
+        :return: True if all inputs match, False otherwise
+        """
+        intact = True
+        for dirname in [f for f in os.listdir(source) if os.path.isdir(os.path.join(source, f))]:
+            this_sample, this_model, this_sim, product_index = tuple(dirname.split('_'))
+            if sample == int(this_sample) and model == int(this_model) and sim == int(this_sim):
+                for problem in Simulation.verify_manifest(os.path.join(source, dirname)):
+                    print(f'Input does not match manifest: {problem}')
+                    intact = False
+        return intact
 
     @staticmethod
     def thresholds_exist(sample: int, model: int, sim: int, source: str):
@@ -796,18 +968,18 @@ class Simulation(Configurable, Saveable):
             if sample == int(this_sample) and model == int(this_model) and sim == int(this_sim):
                 nsim_dir = os.path.join(source, dirname)
                 outdir = os.path.join(nsim_dir, 'data', 'outputs')
-                indir = os.path.join(nsim_dir, 'data', 'inputs')
-                for file in [f for f in os.listdir(indir) if f.startswith('inner') and f.endswith('.dat')]:
-                    if not os.path.exists(os.path.join(outdir, 'thresh_' + file)):
-                        print(f"Missing threshold {os.path.join(outdir, 'thresh_' + file)}")
+                # list once instead of probing the file system for every fiber
+                present = set(os.listdir(outdir)) if os.path.isdir(outdir) else set()
+                for inner, fiber in Simulation.n_sim_fibers(nsim_dir):
+                    if f'thresh_inner{inner}_fiber{fiber}.dat' not in present:
+                        print(f"Missing threshold {os.path.join(outdir, f'thresh_inner{inner}_fiber{fiber}.dat')}")
                         allthresh = False
         return allthresh
 
     @staticmethod
-    def activations_exist(sample: int, model: int, sim: int, sim_dir: str, source: str, n_amps: int):
+    def activations_exist(sample: int, model: int, sim: int, source: str, n_amps: int):
         """Check if the activations (Ap times) exist in the source directory.
 
-        :param sim_dir: Simulation directory
         :param sample: Sample index
         :param model: Model index
         :param sim: Sim index
@@ -821,15 +993,259 @@ class Simulation(Configurable, Saveable):
             if sample == int(this_sample) and model == int(this_model) and sim == int(this_sim):
                 nsim_dir = os.path.join(source, dirname)
                 outdir = os.path.join(nsim_dir, 'data', 'outputs')
-                indir = os.path.join(nsim_dir, 'data', 'inputs')
-                for file in [f for f in os.listdir(indir) if f.startswith('inner') and f.endswith('.dat')]:
+                present = set(os.listdir(outdir)) if os.path.isdir(outdir) else set()
+                for inner, fiber in Simulation.n_sim_fibers(nsim_dir):
                     for amp in range(n_amps):
-                        target = os.path.join(outdir, 'activation_' + file.replace('.dat', f'_amp{amp}.dat'))
-                        if not os.path.exists(target):
-                            print(f'Missing finite amp {target}')
+                        target = f'activation_inner{inner}_fiber{fiber}_amp{amp}.dat'
+                        if target not in present:
+                            print(f'Missing finite amp {os.path.join(outdir, target)}')
                             allamp = False
         return allamp
 
+    def metadata(self) -> dict:
+        """Summarize what analysis needs from the simulation, without fiber z coordinates or the Sample.
+
+        :return: factor keys and products, n_sim product indices, fiberset maps, and fiber xy and diameters
+        """
+        return {
+            'fiberset_key': self.fiberset_key,
+            'fiberset_product': self.fiberset_product,
+            'wave_key': self.wave_key,
+            'wave_product': self.wave_product,
+            'potentials_product': self.potentials_product,
+            'master_product_indices': self.master_product_indices,
+            'fiberset_map_pairs': self.fiberset_map_pairs,
+            'fibersets': [
+                {
+                    'xy': fiberset.xy_points() if fiberset.fibers else [],
+                    'diameters': [
+                        fiber.get('diam') if isinstance(fiber, dict) else None for fiber in (fiberset.fibers or [])
+                    ],
+                }
+                for fiberset in self.fibersets
+            ],
+        }
+
+    @staticmethod
+    def metadata_path(sim_dir: str) -> str:
+        """Get the path to the metadata sidecar of a simulation.
+
+        :param sim_dir: Simulation directory (i.e., samples/<sample>/models/<model>/sims/<sim>)
+        :return: path to the sidecar
+        """
+        return os.path.join(sim_dir, 'sim_meta.json')
+
+    def save_metadata(self, path: str) -> 'Simulation':
+        """Save the simulation metadata (see Simulation.metadata) as JSON, next to the pickled simulation.
+
+        :param path: path to save the metadata to
+        :return: self
+        """
+        with open(path, 'w') as f:
+            # numpy scalars (e.g., sampled fiber diameters) are not JSON serializable
+            json.dump(self.metadata(), f, default=lambda value: value.item())
+
+        return self
+
+    @staticmethod
+    def outputs_table_path(sim_dir: str) -> str:
+        """Get the path to the consolidated NEURON outputs table of a simulation.
+
+        :param sim_dir: Simulation directory (i.e., samples/<sample>/models/<model>/sims/<sim>)
+        :return: path to the table
+        """
+        return os.path.join(sim_dir, 'outputs.npz')
+
+    @staticmethod
+    def outputs_marker_path(sim_dir: str) -> str:
+        """Get the path to the marker file touched whenever n_sim outputs are changed in place (e.g., by an import).
+
+        :param sim_dir: Simulation directory (i.e., samples/<sample>/models/<model>/sims/<sim>)
+        :return: path to the marker
+        """
+        return os.path.join(sim_dir, 'outputs_updated')
+
+    @staticmethod
+    def mark_outputs_updated(sim_dir: str):
+        """Touch the outputs marker of a simulation, so that its consolidated outputs table is rebuilt.
+
+        :param sim_dir: Simulation directory (i.e., samples/<sample>/models/<model>/sims/<sim>)
+        """
+        marker_path = Simulation.outputs_marker_path(sim_dir)
+        with open(marker_path, 'a'):
+            os.utime(marker_path, None)
+
+    @staticmethod
+    def outputs_source_mtime(sim_dir: str, refresh: bool = False) -> float:
+        """Get the latest modification time of the n_sim outputs of a simulation.
+
+        Includes the n_sims directory and each outputs directory (changed when files are added or removed) and the
+        outputs marker (see Simulation.mark_outputs_updated). Output files overwritten in place by other means are only
+        found with refresh, which also checks every output file.
+
+        :param sim_dir: Simulation directory (i.e., samples/<sample>/models/<model>/sims/<sim>)
+        :param refresh: also check the modification time of each output file
+        :return: latest modification time, 0 if there are no n_sims
+        """
+        n_sims_dir = os.path.join(sim_dir, 'n_sims')
+        if not os.path.isdir(n_sims_dir):
+            return 0.0
+
+        marker_path = Simulation.outputs_marker_path(sim_dir)
+        latest = max(os.path.getmtime(n_sims_dir), os.path.getmtime(marker_path) if os.path.isfile(marker_path) else 0)
+        for nsim in os.listdir(n_sims_dir):
+            outputs_dir = os.path.join(n_sims_dir, nsim, 'data', 'outputs')
+            if not os.path.isdir(outputs_dir):
+                continue
+            latest = max(latest, os.path.getmtime(outputs_dir))
+            if refresh:
+                with os.scandir(outputs_dir) as entries:
+                    for entry in entries:
+                        latest = max(latest, entry.stat().st_mtime)
+        return latest
+
+    @staticmethod
+    def outputs_table_stale(sim_dir: str, refresh: bool = False) -> bool:
+        """Check if the consolidated outputs table is missing, unreadable, or older than the n_sim outputs.
+
+        :param sim_dir: Simulation directory (i.e., samples/<sample>/models/<model>/sims/<sim>)
+        :param refresh: also check the modification time of each output file (see Simulation.outputs_source_mtime)
+        :return: True if the table must be (re)built, False otherwise
+        """
+        table_path = Simulation.outputs_table_path(sim_dir)
+        if not os.path.isfile(table_path):
+            return True
+
+        # compare with the outputs as they were when the table was built, not with when the table was saved
+        try:
+            with np.load(table_path) as table:
+                source_mtime = float(table['source_mtime'])
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+            return True
+        return Simulation.outputs_source_mtime(sim_dir, refresh=refresh) > source_mtime
+
+    def consolidate_outputs(self, sim_dir: str, workers: int = None) -> str:
+        """Collect the per-fiber NEURON outputs of all n_sims into a single columnar table.
+
+        The table has one row per (nsim, inner, fiber), sorted in that order, with columns nsim, inner, fiber, index,
+        fiberset_index, waveform_index, active_src_index, threshold, x, y, and diameter, plus a 2D activations column
+        (one entry per amplitude, for FINITE_AMPLITUDES). Missing outputs and diameters are stored as NaN. The table
+        also holds source_mtime, the latest modification time of the outputs (checking every file, see
+        Simulation.outputs_source_mtime) when it was built.
+
+        :param sim_dir: Simulation directory (i.e., samples/<sample>/models/<model>/sims/<sim>)
+        :param workers: number of threads reading n_sim outputs concurrently (None for the ThreadPoolExecutor default,
+            1 to read them serially in the calling thread)
+        :return: path to the saved table
+        """
+
+        def read_last(path: str) -> float:
+            """Read the last value saved in a NEURON output file.
+
+            :param path: path to the output file
+            :return: last value in the file
+            """
+            return float(np.atleast_1d(np.loadtxt(path))[-1])
+
+        def read_nsim(nsim_index: int) -> Tuple[List[tuple], List[List[float]]]:
+            """Read the outputs of one n_sim.
+
+            :param nsim_index: index of the n_sim
+            :return: table rows and activations of the n_sim
+            """
+            potentials_product_index, waveform_index = self.master_product_indices[nsim_index]
+            active_src_index, fiberset_index = self.potentials_product[potentials_product_index]
+            fiberset: FiberSet = self.fibersets[fiberset_index]
+            fibers_xy = fiberset.xy_points()
+
+            outputs_dir = os.path.join(sim_dir, 'n_sims', str(nsim_index), 'data', 'outputs')
+            # list once instead of probing the file system for every fiber
+            present = set(os.listdir(outputs_dir)) if os.path.isdir(outputs_dir) else set()
+
+            nsim_rows = []
+            nsim_activations = []
+            for (inner_index, local_fiber_index), master_index in sorted(n_to_fib[fiberset_index].items()):
+                thresh_file = f'thresh_inner{inner_index}_fiber{local_fiber_index}.dat'
+                threshold = read_last(os.path.join(outputs_dir, thresh_file)) if thresh_file in present else np.nan
+
+                fiber_activations = []
+                for amp in range(n_amps):
+                    activation_file = f'activation_inner{inner_index}_fiber{local_fiber_index}_amp{amp}.dat'
+                    fiber_activations.append(
+                        read_last(os.path.join(outputs_dir, activation_file)) if activation_file in present else np.nan
+                    )
+                nsim_activations.append(fiber_activations)
+
+                fiber = fiberset.fibers[master_index]
+                diameter = fiber.get('diam') if isinstance(fiber, dict) else None
+
+                nsim_rows.append(
+                    (
+                        nsim_index,
+                        inner_index,
+                        local_fiber_index,
+                        master_index,
+                        fiberset_index,
+                        waveform_index,
+                        active_src_index,
+                        threshold,
+                        *fibers_xy[master_index],
+                        np.nan if diameter is None else diameter,
+                    )
+                )
+
+            return nsim_rows, nsim_activations
+
+        _, n_to_fib = self.index_maps()
+        amplitudes = self.search(Config.SIM, 'protocol', 'amplitudes', optional=True)
+        n_amps = len(amplitudes) if amplitudes is not None else 0
+
+        columns = [
+            'nsim',
+            'inner',
+            'fiber',
+            'index',
+            'fiberset_index',
+            'waveform_index',
+            'active_src_index',
+            'threshold',
+            'x',
+            'y',
+            'diameter',
+        ]
+
+        # outputs changed while reading are newer than this, so the table is rebuilt on the next query (the marker is
+        # created first, so that it can be touched by whatever changes outputs in place later)
+        if not os.path.isfile(self.outputs_marker_path(sim_dir)):
+            self.mark_outputs_updated(sim_dir)
+        source_mtime = self.outputs_source_mtime(sim_dir, refresh=True)
+
+        # reading many small files is latency bound, so the n_sims are read concurrently (results stay in order)
+        if workers == 1:
+            nsims = [read_nsim(nsim_index) for nsim_index in range(len(self.master_product_indices))]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                nsims = list(executor.map(read_nsim, range(len(self.master_product_indices))))
+        rows = [row for nsim_rows, _ in nsims for row in nsim_rows]
+        activations = [fiber for _, nsim_activations in nsims for fiber in nsim_activations]
+
+        table = {
+            column: np.array(values, dtype=float if column in ('threshold', 'x', 'y', 'diameter') else int)
+            for column, values in zip(columns, zip(*rows) if rows else [[]] * len(columns))
+        }
+        table['activations'] = np.array(activations, dtype=float).reshape(len(rows), n_amps)
+
+        table['source_mtime'] = np.array(source_mtime)
+
+        # write then rename, so an interrupted or concurrent consolidation never leaves a partial table
+        table_path = self.outputs_table_path(sim_dir)
+        temp_path = f'{table_path}.{os.getpid()}.{threading.get_ident()}'
+        with open(temp_path, 'wb') as f:
+            np.savez_compressed(f, **table)
+        os.replace(temp_path, table_path)
+
+        return table_path
+
     def bases_potentials_exist(self, sim_dir: str) -> bool:
         """Return bool deciding if fibersets bases potentials have already been written for each fiberset.
 
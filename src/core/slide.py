@@ -7,13 +7,16 @@ Please refer to the LICENSE and README.md files for licensing
 instructions. The source code can be found on the following GitHub
 repository: https://github.com/wmglab-duke/ascent
 """
-import itertools
 import os
-from typing import List, Optional, Tuple
+import warnings
+from typing import Iterator, List, Optional, Tuple
 
 import matplotlib.pyplot as plt
 import numpy as np
 from quantiphy import Quantity
+from shapely.errors import ShapelyDeprecationWarning
+from shapely.geometry import box
+from shapely.strtree import STRtree
 
 from src.utils import MethodError, MorphologyError, NerveMode, ReshapeNerveMode, WriteMode
 
@@ -168,9 +171,9 @@ class Slide:
         if tolerance is None:
             return False
         else:
-            pairs = itertools.combinations(self.fascicles, 2)
-            return any([first.min_distance(second) < tolerance for first, second in pairs]) or any(
-                [fascicle.min_distance(self.nerve) < tolerance for fascicle in self.fascicles]
+            pairs = self.fascicle_pairs(distance=tolerance)
+            return any(first.min_distance(second)[0] < tolerance for first, second in pairs) or any(
+                fascicle.min_distance(self.nerve)[0] < tolerance for fascicle in self.fascicles
             )
 
     def fascicles_too_small(self) -> bool:
@@ -193,8 +196,29 @@ class Slide:
         if self.monofasc():
             raise MethodError("Method fascicle_fascicle_intersection does not apply for monofascicle nerves")
 
-        pairs = itertools.combinations(self.fascicles, 2)
-        return any([first.intersects(second) for first, second in pairs])
+        return any(first.intersects(second) for first, second in self.fascicle_pairs())
+
+    def fascicle_pairs(self, distance: float = 0) -> Iterator[Tuple[Fascicle, Fascicle]]:
+        """Find the pairs of fascicles that could lie within a distance of each other.
+
+        Candidates are found with an STRtree of the fascicle outer bounding boxes, so only pairs whose
+        bounding boxes (expanded by distance) overlap are returned for exact checking. Pairs are yielded
+        in the same order as itertools.combinations(self.fascicles, 2).
+
+        :param distance: separation distance to expand each bounding box by
+        :yield: candidate (first, second) fascicle pairs
+        """
+        boxes = [box(*fascicle.outer.bounds()) for fascicle in self.fascicles]
+        with warnings.catch_warnings():
+            # shapely 1.8 warns about the 2.0 STRtree API on every construction
+            warnings.simplefilter('ignore', ShapelyDeprecationWarning)
+            tree = STRtree(boxes, items=range(len(boxes)))
+
+        for i, first in enumerate(self.fascicles):
+            min_x, min_y, max_x, max_y = boxes[i].bounds
+            query = box(min_x - distance, min_y - distance, max_x + distance, max_y + distance)
+            for j in sorted(j for j in tree.query_items(query) if j > i):
+                yield first, self.fascicles[j]
 
     def fascicle_nerve_intersection(self) -> bool:
         """Check for intersection between the fascicles and nerve.
@@ -197,14 +197,16 @@ class Trace:
         :param mode: decide whether to KEEP only the points on steps, or REMOVE only those points
         :param step: spacing between each selected point (both keep and remove)
         """
-        ii = list(range(step - 1, self.count(), step))
+        # boolean mask of the points on steps (avoids O(n^2) list membership checks)
+        on_step = np.zeros(self.count(), dtype=bool)
+        on_step[step - 1 :: step] = True
 
         if mode == DownSampleMode.KEEP:
             pass  # nothing here; just showing the case for readability
         else:  # mode == DownSampleMode.REMOVE:
-            ii = [i for i in list(range(0, self.count())) if i not in ii]
+            on_step = ~on_step
 
-        self.points = self.points[ii, :]
+        self.points = self.points[on_step, :]
 
         # required for mutating method
         self.__update()
@@ -568,9 +570,7 @@ class Trace:
         :param space: pymunk space to add segments to
         :return: returns a list of static line segments that cannot be moved
         """
-        copy = self.deepcopy()
-
-        points = np.vstack((copy.points, copy.points[0]))
+        points = np.vstack((self.points, self.points[0]))
 
         segments: List[pymunk.Segment] = []
 
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3.7
+
+"""Runs all fibers of an n_sim within one NEURON job, distributed across MPI ranks by a ParallelContext bulletin board.
+
+Started by submit.py (--bulletin-board) from the n_sim directory, i.e.,
+mpiexec -n <cpus> ./special -mpi -python ../../bulletin_board.py
+The fibers to run are read from bb_tasks.json (written by submit.py). Each fiber is run by loading launch.hoc and
+Wrapper.hoc with the same parameters as the start script of the fiber, so the outputs are identical.
+
+The copyrights of this software are owned by Duke University.
+Please refer to the LICENSE and README.md files for licensing
+instructions. The source code can be found on the following GitHub
+repository: https://github.com/wmglab-duke/ascent
+"""
+
+import json
+import time
+
+from neuron import h
+
+TASKS_FILE = 'bb_tasks.json'
+
+pc = h.ParallelContext()
+
+with open(TASKS_FILE) as handle:
+    bb_data = json.load(handle)
+
+# launch.hoc does not load Wrapper.hoc while bb_driver is declared, so that each fiber can set its parameters first
+h('bb_driver = 1')
+h('strdef sim_path')
+h.sim_path = bb_data['sim_path']
+
+
+def run_fiber(task_index: int):
+    """Run the NEURON simulation of one fiber (called on a worker rank).
+
+    :param task_index: index of the fiber in bb_tasks.json
+    :return: task_index, the run time of the fiber in seconds, and whether its threshold search failed
+    """
+    task = bb_data['tasks'][task_index]
+    start = time.time()
+
+    for name, value in task['parameters'].items():
+        h(f'{name} = {value}')
+    # for backwards compatibility, overwritten in launch.hoc if 1
+    h('saveflag_end_ap_times = 0')
+    h('saveflag_runtime = 0')
+    h('saveflag_ap_loctime = 0')
+
+    # force reloading, since load_file skips files that were loaded for a previous fiber
+    h.load_file(1, 'launch.hoc')
+
+    # reset the amplitudes run for this fiber, which persist from the previous fiber on this rank
+    amp_start, amp_stop = task['amp_range'] if task['amp_range'] is not None else (0, int(h.Namp))
+    h(f'amp_start = {amp_start}')
+    h(f'amp_stop = {amp_stop}')
+
+    h.load_file(1, '../../HOC_Files/Wrapper.hoc')
+
+    return task_index, time.time() - start, bool(h.thresh_failed)
+
+
+def main():
+    """Submit every fiber to the bulletin board and wait for the workers to run them (on rank 0)."""
+    tasks = bb_data['tasks']
+    print(f'Running {len(tasks)} fibers on {int(pc.nhost())} ranks')
+
+    for task_index in range(len(tasks)):
+        pc.submit(run_fiber, task_index)
+
+    failed = []
+    while pc.working():
+        task_index, runtime, thresh_failed = pc.pyret()
+        task = tasks[task_index]
+        if thresh_failed:
+            failed.append(task)
+            print(
+                f'FAILED NEURON simulation for inner {task["inner"]} fiber {task["fiber"]}: '
+                f'threshold bounds not found within max_iter steps ({runtime:.1f} s)'
+            )
+        else:
+            print(f'Completed NEURON simulation for inner {task["inner"]} fiber {task["fiber"]} ({runtime:.1f} s)')
+
+    if failed:
+        print(
+            f'{len(failed)} of {len(tasks)} fibers failed (no outputs saved): '
+            + ', '.join(f'inner {task["inner"]} fiber {task["fiber"]}' for task in failed)
+        )
+
+
+# worker ranks stay in runworker until done is called; the master rank returns immediately
+pc.runworker()
+main()
+pc.done()
+h.quit()
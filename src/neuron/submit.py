@@ -9,6 +9,8 @@ repository: https://github.com/wmglab-duke/ascent
 """
 
 import argparse
+import getpass
+import heapq
 import json
 import multiprocessing
 import os
@@ -134,10 +136,39 @@ submit_context_group.add_argument(
     help='Set submission context to cluster, overrides run.json',
 )
 
+parser.add_argument(
+    '-B',
+    '--bulletin-board',
+    action='store_true',
+    help='Run all fibers of each n_sim in one MPI NEURON job (ParallelContext bulletin board) instead of one job per '
+    'fiber. Locally uses mpiexec with --num-cpu ranks, on a cluster submits one job with --num-jobs tasks per n_sim',
+)
+parser.add_argument(
+    '-Q',
+    '--max-queued-jobs',
+    type=int,
+    help='For cluster submission: wait to submit until fewer jobs are queued (from squeue), overrides '
+    'slurm_params.json',
+)
+parser.add_argument(
+    '-M',
+    '--max-memory',
+    type=int,
+    help='For local submission: total memory (in MB) of the fibers run at once, defaults to the memory available at '
+    'submission',
+)
 parser.add_argument('-v', '--verbose', action='store_true', help='Print detailed submission info')
 
 OS = 'UNIX-LIKE' if any([s in sys.platform for s in ['darwin', 'linux']]) else 'WINDOWS'
 
+# memory estimate of a local fiber simulation: NEURON process, model sections, and recorded values (8 byte doubles)
+FIBER_BASE_MEMORY_MB = 60
+SEGMENT_MEMORY_KB = 4
+N_GATING_PARAMS = 4  # m, h, mp, s of MRG fibers
+PEAK_RSS_FILE = os.path.join('logs', 'peak_rss.csv')
+WAIT_POLL_INTERVAL = 0.1  # seconds between checks for finished local fibers
+MANIFEST_FILE = 'manifest.json'  # written for each n_sim by Simulation.build_n_sims
+
 
 # %% Set up utility functions
 
@@ -161,6 +192,97 @@ class WarnOnlyOnce:
             cls.warnings.add(h)
 
 
+class SlurmThrottle:
+    """Rate limit sbatch calls by scheduler backpressure, instead of sleeping for a fixed time after each call.
+
+    Before each submission, waits until the number of jobs in the queue (from squeue, counting each array task) leaves
+    room for the new jobs, if a maximum number of queued jobs is set. sbatch calls that fail because the scheduler is
+    busy or a submission limit is reached are retried with exponential backoff.
+    """
+
+    # sbatch errors after which the submission may succeed if retried
+    TRANSIENT_ERRORS = (
+        'Resource temporarily unavailable',
+        'Socket timed out',
+        'Unable to contact slurm controller',
+        'MaxSubmit',
+        'try again',
+    )
+
+    def __init__(self, max_queued: int = None, max_retries: int = 5, backoff: float = 1.0, max_backoff: float = 60.0):
+        """Initialize the throttle.
+
+        :param max_queued: the maximum number of jobs queued (pending or running) for this user, None for no limit
+        :param max_retries: the number of times a failed sbatch call is retried
+        :param backoff: the first wait (in seconds) before polling squeue again or retrying sbatch
+        :param max_backoff: the longest wait (in seconds) between polls or retries
+        """
+        self.max_queued = max_queued
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.queued = None
+        self.sleep = time.sleep
+
+    def queued_jobs(self):
+        """Count the jobs queued for this user.
+
+        :raises RuntimeError: if squeue fails
+        :return: the number of queued jobs (each array task counts as a job)
+        """
+        exit_data = subprocess.run(
+            ['squeue', '-h', '-r', '-u', getpass.getuser(), '-o', '%i'], capture_output=True, text=True
+        )
+        if exit_data.returncode != 0:
+            raise RuntimeError(f'squeue failed: {exit_data.stderr}')
+        return len(exit_data.stdout.split())
+
+    def wait_for_capacity(self, n_jobs: int):
+        """Wait until n_jobs more jobs fit in the queue.
+
+        The queue is only polled when the jobs counted at the last poll, plus the jobs submitted since, do not leave
+        room. A submission larger than max_queued waits for an empty queue.
+
+        :param n_jobs: the number of jobs to be submitted
+        """
+        if self.max_queued is None:
+            return
+        wait = self.backoff
+        if self.queued is None or self.queued + n_jobs > self.max_queued:
+            self.queued = self.queued_jobs()
+        while self.queued > 0 and self.queued + n_jobs > self.max_queued:
+            if args.verbose:
+                print(f'{self.queued} jobs queued (max {self.max_queued}), waiting {wait:.0f} s to submit {n_jobs}')
+            self.sleep(wait)
+            wait = min(2 * wait, self.max_backoff)
+            self.queued = self.queued_jobs()
+
+    def submit(self, command: list, n_jobs: int = 1):
+        """Run sbatch once there is room in the queue, retrying if the scheduler is temporarily unavailable.
+
+        :param command: the sbatch command
+        :param n_jobs: the number of jobs submitted by the command (e.g., array tasks)
+        :return: the CompletedProcess of the last sbatch call
+        """
+        self.wait_for_capacity(n_jobs)
+        wait = self.backoff
+        for attempt in range(self.max_retries + 1):
+            exit_data = subprocess.run(command, capture_output=True, text=True)
+            if exit_data.returncode == 0:
+                if self.queued is not None:
+                    self.queued += n_jobs
+                break
+            if attempt == self.max_retries or not any(error in exit_data.stderr for error in self.TRANSIENT_ERRORS):
+                break
+            print(f'sbatch failed ({exit_data.stderr.strip()}), retrying in {wait:.0f} s')
+            self.sleep(wait)
+            wait = min(2 * wait, self.max_backoff)
+            # the queue may have filled while the scheduler was unavailable
+            self.queued = None
+            self.wait_for_capacity(n_jobs)
+        return exit_data
+
+
 def print_progress_bar(iteration, total, prefix='', suffix='', decimals=1, length=100, fill='█'):
     """Print or update a progress bar in the terminal.
 
@@ -361,6 +483,185 @@ def get_thresh_bounds(sim_dir: str, sim_name: str, inner_ind: int):
     return top, bottom
 
 
+def get_amp_ranges(protocol: dict):
+    """Get the amplitudes run by each job of a fiber, splitting FINITE_AMPLITUDES into groups if requested.
+
+    :param protocol: the "protocol" of the n_sim configuration
+    :raises ValueError: if "amplitudes_per_job" is not a positive integer
+    :return: list of (first, last + 1) amplitude indices for each job, or [None] if the fiber runs as a single job
+    """
+    if protocol['mode'] != 'FINITE_AMPLITUDES' or 'amplitudes_per_job' not in protocol:
+        return [None]
+
+    n_amp = len(protocol['amplitudes'])
+    amps_per_job = protocol['amplitudes_per_job']
+    if not isinstance(amps_per_job, int) or amps_per_job < 1:
+        raise ValueError('protocol->amplitudes_per_job must be a positive integer')
+    if amps_per_job >= n_amp:
+        return [None]
+
+    return [(start, min(start + amps_per_job, n_amp)) for start in range(0, n_amp, amps_per_job)]
+
+
+def get_n_tsteps(sim_config: dict):
+    """Get the number of time steps of an n_sim.
+
+    :param sim_config: the n_sim configuration
+    :return: the number of time steps
+    """
+    return int(round(sim_config['waveform']['global']['stop'] / sim_config['waveform']['global']['dt']))
+
+
+def read_n_fiber_coords(fiber_ve_path: str):
+    """Read the number of coordinates of a fiber from the header (first line) of its Ve file.
+
+    :param fiber_ve_path: the path to the inner<i>_fiber<j>.dat file
+    :return: the number of coordinates (segments) of the fiber
+    """
+    with open(fiber_ve_path) as f:
+        return int(float(f.readline()))
+
+
+def get_n_sim_fibers(sim_path: str):
+    """Get the fibers of an n_sim from its manifest (written by Simulation.build_n_sims).
+
+    For n_sims without a manifest, the fibers are found from the names of the Ve files in data/inputs.
+
+    :param sim_path: the string path to the n_sim
+    :return: dict of (inner, fiber) -> number of coordinates of the fiber (None if there is no manifest)
+    """
+    manifest_path = os.path.join(sim_path, MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        return {(fiber['inner'], fiber['fiber']): fiber['n_coords'] for fiber in load(manifest_path)['fibers']}
+
+    n_fiber_coords = {}
+    for filename in os.listdir(os.path.join(sim_path, 'data', 'inputs')):
+        match = re.match('inner([0-9]+)_fiber([0-9]+)\\.dat', filename)
+        if match:
+            n_fiber_coords[(int(match.group(1)), int(match.group(2)))] = None
+    return n_fiber_coords
+
+
+def get_previous_runtimes(sim_dir: str, nsim_list: list):
+    """Get the runtimes of fibers in the other n_sims of the same Sim that have the same fibers, for every n_sim.
+
+    The runtime files of each n_sim are read once for the whole Sim. The runtimes of the n_sims with the same fibers
+    are summed, and the sums of each n_sim are subtracted again to leave the runtimes of the other n_sims.
+
+    :param sim_dir: the string path to the n_sims directory
+    :param nsim_list: the names of the n_sims of the Sim
+    :return: dict of n_sim name -> dict of (inner, fiber) -> mean runtime (in seconds) of one run (amplitude) per time
+        step in the other n_sims
+    """
+    # n_sim name -> (fibers configuration, (inner, fiber) -> [sum, count] of runtimes per time step)
+    nsim_runtimes = {}
+    for sim_name in nsim_list:
+        output_path = os.path.join(sim_dir, sim_name, 'data', 'outputs')
+        sim_config = load(os.path.join(sim_dir, sim_name, f"{sim_name.split('_')[-1]}.json"))
+        runtimes = {}
+        if os.path.exists(output_path):
+            n_tsteps = get_n_tsteps(sim_config)
+            for filename in os.listdir(output_path):
+                match = re.match('runtime_inner([0-9]+)_fiber([0-9]+)_amp[0-9]+\\.dat', filename)
+                if match:
+                    runtime = float(np.loadtxt(os.path.join(output_path, filename), ndmin=1)[0])
+                    total = runtimes.setdefault((int(match.group(1)), int(match.group(2))), [0.0, 0])
+                    total[0] += runtime / n_tsteps
+                    total[1] += 1
+        nsim_runtimes[sim_name] = (json.dumps(sim_config['fibers'], sort_keys=True), runtimes)
+
+    # fibers configuration -> (inner, fiber) -> [sum, count] of runtimes per time step
+    fibers_runtimes = {}
+    for fibers, runtimes in nsim_runtimes.values():
+        for key, (runtime, count) in runtimes.items():
+            total = fibers_runtimes.setdefault(fibers, {}).setdefault(key, [0.0, 0])
+            total[0] += runtime
+            total[1] += count
+
+    previous_runtimes = {}
+    for sim_name, (fibers, runtimes) in nsim_runtimes.items():
+        previous_runtimes[sim_name] = {}
+        for key, (runtime, count) in fibers_runtimes.get(fibers, {}).items():
+            own_runtime, own_count = runtimes.get(key, (0.0, 0))
+            if count > own_count:
+                previous_runtimes[sim_name][key] = (runtime - own_runtime) / (count - own_count)
+
+    return previous_runtimes
+
+
+def predict_costs(tasks: list, n_fiber_coords: dict, n_tsteps: int, previous_runtimes: dict, protocol: dict):
+    """Predict the runtime of each fiber task of an n_sim.
+
+    Fibers run in a previous n_sim of the same Sim are predicted from their runtime per time step. Others are
+    predicted from their number of segments x time steps, scaled to seconds by the previous runtimes if there are any
+    (else in arbitrary units).
+
+    :param tasks: the list of fiber data for submission
+    :param n_fiber_coords: dict of (inner, fiber) -> number of coordinates (segments) of the fiber
+    :param n_tsteps: the number of time steps of the n_sim
+    :param previous_runtimes: dict of (inner, fiber) -> runtime of one run per time step, from get_previous_runtimes
+    :param protocol: the "protocol" of the n_sim configuration
+    :return: the predicted cost of each task
+    """
+    # seconds per segment per time step, from the fibers that have run before (the segments of fibers that are not
+    # submitted may not have been read, i.e., None)
+    scale = [
+        runtime / n_fiber_coords[key]
+        for key, runtime in previous_runtimes.items()
+        if n_fiber_coords.get(key) is not None
+    ]
+    seconds_per_segment = float(np.median(scale)) if len(scale) > 0 else 1
+
+    costs = []
+    for task in tasks:
+        key = (task['inner'], task['fiber'])
+        if key in previous_runtimes:
+            cost = previous_runtimes[key] * n_tsteps
+        else:
+            cost = seconds_per_segment * n_fiber_coords[key] * n_tsteps
+        # a threshold search is a similar number of runs for every fiber, but amplitudes may be split across jobs
+        if protocol['mode'] == 'FINITE_AMPLITUDES':
+            amp_range = task.get('amp_range', (0, len(protocol['amplitudes'])))
+            cost *= amp_range[1] - amp_range[0]
+        costs.append(cost)
+
+    return costs
+
+
+def predict_makespan(costs: list, n_workers: int):
+    """Predict the time to run tasks in the given order, each starting as soon as one of the workers is free.
+
+    :param costs: the predicted cost of each task, in submission order
+    :param n_workers: the number of tasks run at once
+    :return: the predicted makespan (in the units of costs)
+    """
+    finish_times = [0.0] * max(1, min(n_workers, len(costs)))
+    for cost in costs:
+        heapq.heapreplace(finish_times, finish_times[0] + cost)
+    return max(finish_times)
+
+
+def report_makespan(runfibers: list, sim_name: str, n_workers: int):
+    """Print the predicted makespan of the fibers of an n_sim in longest-first order, compared to file order.
+
+    :param runfibers: the list of fiber data for submission, in submission order
+    :param sim_name: the string name of the n_sim
+    :param n_workers: the number of fibers run at once
+    """
+    if any('predicted_cost' not in task for task in runfibers):
+        return
+    file_order = sorted(
+        runfibers, key=lambda task: (task['inner'], task['fiber'], (task.get('amp_range') or (0, 0))[0])
+    )
+    makespan = predict_makespan([task['predicted_cost'] for task in runfibers], n_workers)
+    file_order_makespan = predict_makespan([task['predicted_cost'] for task in file_order], n_workers)
+    if file_order_makespan > 0:
+        print(
+            f'n_sim {sim_name}: predicted makespan on {n_workers} workers is '
+            f'{100 * (1 - makespan / file_order_makespan):.1f}% shorter with longest-first ordering'
+        )
+
+
 def make_task(
     sub_con: str,
     my_os: str,
@@ -373,6 +674,7 @@ def make_task(
     diam: float,
     deltaz: float,
     axonnodes: int,
+    amp_range: tuple = None,
 ):
     """Create shell script used to run a fiber simulation.
 
@@ -387,7 +689,11 @@ def make_task(
     :param diam: the diameter of the fiber
     :param deltaz: the deltaz for the fiber
     :param axonnodes: the number of axon nodes
+    :param amp_range: first and last + 1 indices of the amplitudes to run (FINITE_AMPLITUDES), None for all
     """
+    # run only part of the amplitudes, if the amplitudes of this fiber are split across jobs
+    amp_args = '' if amp_range is None else '-c \"amp_start={}\" -c \"amp_stop={}\" '.format(*amp_range)
+
     with open(start_p, 'w+') as handle:
         if my_os == 'UNIX-LIKE':
             lines = [
@@ -404,6 +710,7 @@ def make_task(
                 f'-c \"fiberD={diam:.1f}\" '
                 f'-c \"deltaz={deltaz:.4f}\" '
                 f'-c \"axonnodes={axonnodes}\" '
+                f'{amp_args}'
                 '-c \"saveflag_end_ap_times=0\" '  # for backwards compatible, overwritten in launch.hoc if 1
                 '-c \"saveflag_runtime=0\" '  # for backwards compatible, overwritten in launch.hoc if 1
                 '-c \"load_file(\\\"launch.hoc\\\")\" blank.hoc\n',
@@ -429,6 +736,7 @@ def make_task(
                 f'-c \"fiberD={diam:.1f}\" '
                 f'-c \"deltaz={deltaz:.4f}\" '
                 f'-c \"axonnodes={axonnodes}\" '
+                f'{amp_args}'
                 '-c \"saveflag_end_ap_times=0\" '  # for backwards compatible, overwritten in launch.hoc if 1
                 '-c \"saveflag_runtime=0\" '  # for backwards compatible, overwritten in launch.hoc if 1
                 '-c \"saveflag_ap_loctime=0\" '  # for backwards compatible, overwritten in launch.hoc if 1
@@ -456,6 +764,171 @@ def local_submit(fiber_data: dict):
         print(f'Completed NEURON simulation for inner {fiber_data["inner"]} fiber {fiber_data["fiber"]}.')
 
 
+def estimate_fiber_memory(sim_config: dict, n_segments: int, axonnodes: int):
+    """Estimate the memory used by a fiber simulation from its size and the values recorded over time.
+
+    :param sim_config: the n_sim configuration
+    :param n_segments: the number of segments (coordinates) of the fiber
+    :param axonnodes: the number of axon nodes of the fiber
+    :return: the estimated memory in MB
+    """
+    n_tsteps = get_n_tsteps(sim_config)
+    saving_time = sim_config.get('saving', {}).get('time', {})
+    locs = saving_time.get('locs', [])
+    record_dt = saving_time.get('dt')
+
+    n_values = 2 * n_tsteps + n_segments  # Ve(t), t, and Ve(x)
+    for quantity, n_params in [('vm', 1), ('gating', N_GATING_PARAMS), ('istim', 1)]:
+        if saving_time.get(quantity) is not True:
+            continue
+        quantity_locs = locs.get(quantity, locs.get('vm', locs.get('gating'))) if isinstance(locs, dict) else locs
+        n_locs = 1 if quantity == 'istim' else axonnodes if quantity_locs == 'all' else len(quantity_locs)
+        interval = record_dt.get(quantity) if isinstance(record_dt, dict) else record_dt
+        record_step = 1 if interval is None else max(1, round(interval / sim_config['waveform']['global']['dt']))
+        n_values += n_params * n_locs * (int((n_tsteps - 1) / record_step) + 1)
+
+    return FIBER_BASE_MEMORY_MB + n_segments * SEGMENT_MEMORY_KB / 1024 + 8 * n_values / 1024**2
+
+
+def get_available_memory():
+    """Get the memory available for new processes on this machine.
+
+    :return: the available memory in MB, or None if it cannot be determined
+    """
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') / 1024**2
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def get_memory_scale():
+    """Get the factor by which to scale memory estimates, learned from the peak RSS of fibers run before.
+
+    Must be called from the n_sim directory. Peak RSS is saved to logs/peak_rss.csv for every fiber run locally.
+
+    :return: the largest ratio of peak RSS to estimated memory of the fibers run before, or 1 if none have run
+    """
+    if not os.path.exists(PEAK_RSS_FILE):
+        return 1
+    peak_rss = pd.read_csv(PEAK_RSS_FILE)
+    peak_rss = peak_rss[peak_rss['estimate_mb'] > 0]
+    if len(peak_rss) == 0:
+        return 1
+    return float((peak_rss['peak_rss_mb'] / peak_rss['estimate_mb']).max())
+
+
+def next_admissible(pending: list, memory_in_use: float, memory_budget: float, memory_scale: float):
+    """Find the next fiber that can start without exceeding the memory budget.
+
+    :param pending: the list of fiber data waiting to run
+    :param memory_in_use: the (scaled) estimated memory of the running fibers in MB
+    :param memory_budget: the total memory in MB of the fibers run at once
+    :param memory_scale: the factor by which to scale memory estimates
+    :return: the index in pending of the first fiber that fits, or None if none fit
+    """
+    for i, fiber_data in enumerate(pending):
+        if memory_in_use + memory_scale * fiber_data.get('memory_estimate', 0) <= memory_budget:
+            return i
+    return None
+
+
+def memory_aware_local_submit(runfibers: list, sim_name: str, cpus: int, memory_budget: float):
+    """Run fiber simulations on the local machine, starting a fiber only when its estimated memory is available.
+
+    Must be called from the n_sim directory. At most cpus fibers run at once, and the (scaled) memory estimates of the
+    running fibers do not exceed memory_budget, except that one fiber always runs. Estimates are scaled by the largest
+    ratio of peak RSS to estimate of the fibers run so far. The peak RSS of each fiber is appended to logs/peak_rss.csv.
+
+    :param runfibers: the list of fiber data for submission
+    :param sim_name: the string name of the n_sim
+    :param cpus: the number of fibers to run at once
+    :param memory_budget: the total memory in MB of the fibers run at once
+    """
+    prefix = 'Sample {}, Model {}, Sim {}, n_sim {}:'.format(*sim_name.split('_'))  # noqa FS002
+    memory_scale = get_memory_scale()
+    pending = list(runfibers)
+    running = {}
+    records = []
+
+    if not args.verbose:
+        print_progress_bar(0, len(runfibers), length=40, prefix=prefix)
+    while len(pending) > 0 or len(running) > 0:
+        # start as many fibers as fit in the free CPUs and memory
+        while len(pending) > 0 and len(running) < cpus:
+            memory_in_use = sum(
+                memory_scale * fiber_data.get('memory_estimate', 0) for fiber_data, *_ in running.values()
+            )
+            i = next_admissible(pending, memory_in_use, memory_budget, memory_scale)
+            if i is None and len(running) == 0:
+                warnings.warn(
+                    f'Estimated memory of fiber ({memory_scale * pending[0].get("memory_estimate", 0):.0f} MB) exceeds '
+                    f'the memory budget ({memory_budget:.0f} MB), running it alone',
+                    stacklevel=2,
+                )
+                i = 0
+            if i is None:
+                break
+            fiber_data = pending.pop(i)
+            a = fiber_data['job_number']
+            fo = open(os.path.join('logs', 'out', f'{a}.log'), 'w+')
+            fe = open(os.path.join('logs', 'err', f'{a}.log'), 'w+')
+            process = subprocess.Popen(['bash', os.path.join('start_scripts', f'start_{a}.sh')], stdout=fo, stderr=fe)
+            running[process.pid] = (fiber_data, process, fo, fe)
+
+        # wait for one of the fibers started here to finish (other children of this process are left alone); rusage
+        # includes the NEURON process started by the start script
+        finished_pid = None
+        while finished_pid is None:
+            for pid in running:
+                waited_pid, status, rusage = os.wait4(pid, os.WNOHANG)
+                if waited_pid == pid:
+                    finished_pid = pid
+                    break
+            else:
+                time.sleep(WAIT_POLL_INTERVAL)
+        fiber_data, process, fo, fe = running.pop(finished_pid)
+        # same convention as Popen.returncode (os.waitstatus_to_exitcode requires Python 3.9)
+        process.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+        fo.close()
+        fe.close()
+
+        # ru_maxrss is in bytes on macOS and in KB on Linux
+        peak_rss = rusage.ru_maxrss / 1024 ** (2 if sys.platform == 'darwin' else 1)
+        estimate = fiber_data.get('memory_estimate', 0)
+        if estimate > 0:
+            memory_scale = max(memory_scale, peak_rss / estimate)
+        records.append(
+            {
+                'job_number': fiber_data['job_number'],
+                'inner': fiber_data['inner'],
+                'fiber': fiber_data['fiber'],
+                'estimate_mb': round(estimate, 1),
+                'peak_rss_mb': round(peak_rss, 1),
+            }
+        )
+
+        if args.verbose:
+            print(
+                f'Completed NEURON simulation for inner {fiber_data["inner"]} fiber {fiber_data["fiber"]} '
+                f'(peak RSS {peak_rss:.0f} MB).'
+            )
+        else:
+            print_progress_bar(len(records), len(runfibers), length=40, prefix=prefix)
+
+    pd.DataFrame(records).to_csv(PEAK_RSS_FILE, mode='a', header=not os.path.exists(PEAK_RSS_FILE), index=False)
+    print(
+        f'Peak RSS of n_sim {sim_name} fibers: max {max(record["peak_rss_mb"] for record in records):.0f} MB '
+        f'(saved to {os.path.join("n_sims", sim_name, PEAK_RSS_FILE)})'
+    )
+
+
 def submit_fibers(submission_context, submission_data):
     """Submit fiber simulations, either locally or to a cluster.
 
@@ -468,6 +941,10 @@ def submit_fibers(submission_context, submission_data):
     sim_dir = os.path.join('n_sims')
     n_fibers = sum(len(v) for v in submission_data.values())
 
+    if submission_context == 'cluster':
+        max_queued = load(os.path.join('config', 'system', 'slurm_params.json')).get('max_queued_jobs')
+        throttle = SlurmThrottle(max_queued if args.max_queued_jobs is None else args.max_queued_jobs)
+
     for sim_name, runfibers in submission_data.items():
         if args.verbose:
             print(f'\n\n################ {sim_name} ################\n\n')
@@ -479,7 +956,10 @@ def submit_fibers(submission_context, submission_data):
         start_path_base = os.path.join(start_dir, 'start_')
 
         if submission_context == 'cluster':
-            cluster_submit(runfibers, sim_name, sim_path, start_path_base)
+            if args.bulletin_board:
+                bulletin_board_cluster_submit(runfibers, sim_name, sim_path, throttle)
+            else:
+                cluster_submit(runfibers, sim_name, sim_path, start_path_base, throttle)
             ran_fibers += len(runfibers)
             if not args.verbose:
                 print_progress_bar(ran_fibers, n_fibers, length=40, prefix=f'Fibers submitted: {ran_fibers}/{n_fibers}')
@@ -498,7 +978,22 @@ def submit_fibers(submission_context, submission_data):
                     f"You did not define number of cores to use (-n), so proceeding with cpu_core_count-1={cpus}",
                     stacklevel=2,
                 )
+            report_makespan(runfibers, sim_name, cpus)
+            if args.bulletin_board:
+                bulletin_board_local_submit(sim_name, sim_path, cpus)
+                continue
+            memory_budget = args.max_memory if args.max_memory is not None else get_available_memory()
+            if memory_budget is None:
+                warnings.warn(
+                    'Could not determine the available memory, so running fibers without a memory limit (set -M)',
+                    stacklevel=2,
+                )
+                memory_budget = float('inf')
             os.chdir(sim_path)
+            if OS == 'UNIX-LIKE':
+                memory_aware_local_submit(runfibers, sim_name, cpus, memory_budget)
+                os.chdir("../..")
+                continue
             with multiprocessing.Pool(cpus) as p:
                 for x in runfibers:
                     x['verbose'] = args.verbose
@@ -521,13 +1016,14 @@ def submit_fibers(submission_context, submission_data):
             os.chdir("../..")
 
 
-def cluster_submit(runfibers, sim_name, sim_path, start_path_base):
+def cluster_submit(runfibers, sim_name, sim_path, start_path_base, throttle):
     """Submit fiber simulations on a slurm-based high performance computing cluster.
 
     :param runfibers: the list of fiber data for submission
     :param sim_name: the string name of the n_sim
     :param sim_path: the string path to the simulation
     :param start_path_base: the string prefix for all start scripts
+    :param throttle: the SlurmThrottle limiting the rate of sbatch calls
     """
     slurm_params = load(os.path.join('config', 'system', 'slurm_params.json'))
     out_dir = os.path.abspath(os.path.join(sim_path, 'logs', 'out', '%a.log'))
@@ -536,7 +1032,10 @@ def cluster_submit(runfibers, sim_name, sim_path, start_path_base):
     partition = slurm_params['partition'] if args.partition is None else args.partition
     njobs = slurm_params['jobs_per_array'] if args.num_jobs is None else args.num_jobs
     mem = slurm_params['memory_per_fiber'] if args.job_mem is None else args.job_mem
+    # arrays are submitted in the order of runfibers, i.e., longest fibers first
     array_fibertasks = [runfibers[x : x + njobs] for x in range(0, len(runfibers), njobs)]
+    if args.verbose:
+        report_makespan(runfibers, sim_name, njobs)
     for tasklist in array_fibertasks:
         array_indices = [task['job_number'] for task in tasklist]
 
@@ -544,7 +1043,6 @@ def cluster_submit(runfibers, sim_name, sim_path, start_path_base):
         if args.verbose:
             for task in tasklist:
                 print(f"RUNNING inner ({task['inner']}) fiber ({task['fiber']})")
-                time.sleep(1)
 
         # submit batch job for fiber
 
@@ -562,17 +1060,72 @@ def cluster_submit(runfibers, sim_name, sim_path, start_path_base):
             start_path_base,
         ]
 
-        if not args.verbose:
-            exit_data = subprocess.run(command, capture_output=True, text=True)
-        else:
-            exit_data = subprocess.run(command, capture_output=True, text=True)
+        exit_data = throttle.submit(command, len(array_indices))
+        if args.verbose:
             print(exit_data.stdout)
         if exit_data.returncode != 0:
             print(exit_data.stderr)
             sys.exit('Non-zero exit code during job array submission. Exiting.')
 
-        # allow job to start before removing slurm file
-        time.sleep(1.0)
+
+def bulletin_board_local_submit(sim_name, sim_path, cpus):
+    """Run all fibers of an n_sim on the local machine in one MPI NEURON job (bulletin_board.py).
+
+    :param sim_name: the string name of the n_sim
+    :param sim_path: the string path to the simulation
+    :param cpus: the number of MPI ranks to run
+    """
+    out_path = os.path.join(sim_path, 'logs', 'out', 'bb.log')
+    err_path = os.path.join(sim_path, 'logs', 'err', 'bb.log')
+    command = ['mpiexec', '-n', str(cpus), './special', '-nobanner', '-mpi', '-python', '../../bulletin_board.py']
+
+    print(f'Running n_sim {sim_name} on {cpus} MPI ranks (log: {out_path})')
+    with open(out_path, "w+") as fo, open(err_path, "w+") as fe:
+        exit_data = subprocess.run(command, cwd=sim_path, stdout=fo, stderr=fe)
+    if exit_data.returncode != 0:
+        sys.exit(f'Non-zero exit code from MPI NEURON job for n_sim {sim_name} (see {err_path}). Exiting.')
+
+
+def bulletin_board_cluster_submit(runfibers, sim_name, sim_path, throttle):
+    """Submit all fibers of an n_sim as one MPI NEURON job (bulletin_board.py) on a slurm-based cluster.
+
+    :param runfibers: the list of fiber data for submission
+    :param sim_name: the string name of the n_sim
+    :param sim_path: the string path to the simulation
+    :param throttle: the SlurmThrottle limiting the rate of sbatch calls
+    """
+    slurm_params = load(os.path.join('config', 'system', 'slurm_params.json'))
+    out_path = os.path.abspath(os.path.join(sim_path, 'logs', 'out', 'bb.log'))
+    err_path = os.path.abspath(os.path.join(sim_path, 'logs', 'err', 'bb.log'))
+    # one rank per fiber, up to the number of jobs per array
+    partition = slurm_params['partition'] if args.partition is None else args.partition
+    njobs = slurm_params['jobs_per_array'] if args.num_jobs is None else args.num_jobs
+    mem = slurm_params['memory_per_fiber'] if args.job_mem is None else args.job_mem
+    ntasks = min(len(runfibers), njobs)
+
+    if args.verbose:
+        print(f"RUNNING {len(runfibers)} fibers on {ntasks} MPI ranks")
+
+    command = [
+        'sbatch',
+        *([args.slurm_params] if args.slurm_params else []),
+        f'--job-name={sim_name}',
+        f'--output={out_path}',
+        f'--error={err_path}',
+        f'--ntasks={ntasks}',
+        f'--mem-per-cpu={mem}',
+        f'--partition={partition}',
+        '--cpus-per-task=1',
+        'bb_launch.slurm',
+        os.path.abspath(sim_path),
+    ]
+
+    exit_data = throttle.submit(command)
+    if args.verbose:
+        print(exit_data.stdout)
+    if exit_data.returncode != 0:
+        print(exit_data.stderr)
+        sys.exit('Non-zero exit code during MPI job submission. Exiting.')
 
 
 def make_fiber_tasks(submission_list, submission_context):
@@ -602,6 +1155,9 @@ def make_fiber_tasks(submission_list, submission_context):
         ]:
             ensure_dir(cur_dir)
 
+        # fibers run by bulletin_board.py, if all fibers of the n_sim run in one MPI job
+        bb_tasks = []
+
         # ensure blank.hoc exists
         blank_path = os.path.join(sim_path, 'blank.hoc')
         if not os.path.exists(blank_path):
@@ -630,19 +1186,20 @@ def make_fiber_tasks(submission_list, submission_context):
                 diameter = get_diameter(inner_fiber_diam_key, inner_ind, fiber_ind)
             deltaz, neuron_flag = get_deltaz(fiber_model, diameter)
 
-            # get the axonnodes from data/inputs/inner{}_fiber{}.dat top line
-            fiber_ve_path = os.path.join(
-                fibers_path,
-                f'inner{inner_ind}_fiber{fiber_ind}.dat',
-            )
-            fiber_ve = np.loadtxt(fiber_ve_path)
-            n_fiber_coords = int(fiber_ve[0])
+            # get the axonnodes from data/inputs/inner{}_fiber{}.dat top line (read by make_run_sub_list)
+            n_fiber_coords = fiber_data.get('n_fiber_coords')
+            if n_fiber_coords is None:
+                n_fiber_coords = read_n_fiber_coords(
+                    os.path.join(fibers_path, f'inner{inner_ind}_fiber{fiber_ind}.dat')
+                )
 
             if neuron_flag == 2:
                 axonnodes = int(1 + (n_fiber_coords - 1) / 11)
             elif neuron_flag == 3:
                 axonnodes = int(n_fiber_coords)
 
+            fiber_data['memory_estimate'] = estimate_fiber_memory(sim_config, n_fiber_coords, axonnodes)
+
             start_path = f"{start_path_base}{fiber_data['job_number']}{'.sh' if OS == 'UNIX-LIKE' else '.bat'}"
 
             stimamp_top, stimamp_bottom = get_thresh_bounds(sim_dir, sim_name, inner_ind)
@@ -659,7 +1216,28 @@ def make_fiber_tasks(submission_list, submission_context):
                     diameter,
                     deltaz,
                     axonnodes,
+                    fiber_data.get('amp_range'),
                 )
+                bb_tasks.append(
+                    {
+                        'inner': inner_ind,
+                        'fiber': fiber_ind,
+                        'amp_range': fiber_data.get('amp_range'),
+                        'parameters': {
+                            'inner_ind': inner_ind,
+                            'fiber_ind': fiber_ind,
+                            'stimamp_top': stimamp_top,
+                            'stimamp_bottom': stimamp_bottom,
+                            'fiberD': round(diameter, 1),
+                            'deltaz': round(deltaz, 4),
+                            'axonnodes': axonnodes,
+                        },
+                    }
+                )
+
+        if args.bulletin_board:
+            with open(os.path.join(sim_path, 'bb_tasks.json'), 'w') as handle:
+                json.dump({'sim_path': sim_path, 'tasks': bb_tasks}, handle, indent=2)
 
 
 def make_run_sub_list(run_number: int):
@@ -687,6 +1265,7 @@ def make_run_sub_list(run_number: int):
                 sim_dir = os.path.join('n_sims')
                 sim_name_base = f'{sample}_{model}_{sim}_'
                 nsim_list = [x for x in os.listdir(sim_dir) if x.startswith(sim_name_base)]
+                previous_runtimes = get_previous_runtimes(sim_dir, nsim_list)
                 for sim_name in nsim_list:
                     submit_list[sim_name] = []
 
@@ -697,33 +1276,56 @@ def make_run_sub_list(run_number: int):
                     n_sim = sim_name.split('_')[-1]
                     sim_config = load(os.path.join(sim_path, f'{n_sim}.json'))
 
-                    fibers_files = [x for x in os.listdir(fibers_path) if re.match('inner[0-9]+_fiber[0-9]+\\.dat', x)]
-
-                    for i, fiber_filename in enumerate(fibers_files):
-                        master_fiber_name = str(fiber_filename.split('.')[0])
-                        inner_name, fiber_name = tuple(master_fiber_name.split('_'))
-                        inner_ind = int(inner_name.split('inner')[-1])
-                        fiber_ind = int(fiber_name.split('fiber')[-1])
-
-                        if sim_config['protocol']['mode'] == 'FINITE_AMPLITUDES':
-                            n_amp = len(sim_config['protocol']['amplitudes'])
-                            search_path = os.path.join(
-                                output_path,
-                                f'activation_inner{inner_ind}_fiber{fiber_ind}_amp{n_amp - 1}.dat',
+                    n_fiber_coords = get_n_sim_fibers(sim_path)
+                    # list once instead of probing the file system for every fiber
+                    outputs = set(os.listdir(output_path)) if os.path.isdir(output_path) else set()
+
+                    # FINITE_AMPLITUDES fibers may be split into several jobs, each running a range of amplitudes
+                    amp_ranges = get_amp_ranges(sim_config['protocol'])
+
+                    for i, (inner_ind, fiber_ind) in enumerate(n_fiber_coords):
+                        for j, amp_range in enumerate(amp_ranges):
+                            if sim_config['protocol']['mode'] == 'FINITE_AMPLITUDES':
+                                last_amp = (
+                                    len(sim_config['protocol']['amplitudes']) if amp_range is None else amp_range[1]
+                                )
+                                search_file = f'activation_inner{inner_ind}_fiber{fiber_ind}_amp{last_amp - 1}.dat'
+                            else:
+                                search_file = f"thresh_inner{inner_ind}_fiber{fiber_ind}.dat"
+                            search_path = os.path.join(output_path, search_file)
+
+                            if search_file in outputs:
+                                if args.verbose:
+                                    print(
+                                        f'Found {search_path} -->\t\tskipping inner ({inner_ind}) fiber ({fiber_ind})'
+                                    )
+                                continue
+
+                            task = {"job_number": i * len(amp_ranges) + j, "inner": inner_ind, "fiber": fiber_ind}
+                            if amp_range is not None:
+                                task['amp_range'] = amp_range
+                            submit_list[sim_name].append(task)
+
+                    # run the longest fibers first, so that the last fibers to finish are short
+                    for inner_ind, fiber_ind in {(task['inner'], task['fiber']) for task in submit_list[sim_name]}:
+                        if n_fiber_coords[(inner_ind, fiber_ind)] is None:
+                            n_fiber_coords[(inner_ind, fiber_ind)] = read_n_fiber_coords(
+                                os.path.join(fibers_path, f'inner{inner_ind}_fiber{fiber_ind}.dat')
                             )
-                        else:
-                            search_path = os.path.join(
-                                output_path,
-                                f"thresh_inner{inner_ind}_fiber{fiber_ind}.dat",
-                            )
-
-                        if os.path.exists(search_path):
-                            if args.verbose:
-                                print(f'Found {search_path} -->\t\tskipping inner ({inner_ind}) fiber ({fiber_ind})')
-                                time.sleep(1)
-                            continue
-
-                        submit_list[sim_name].append({"job_number": i, "inner": inner_ind, "fiber": fiber_ind})
+                    costs = predict_costs(
+                        submit_list[sim_name],
+                        n_fiber_coords,
+                        get_n_tsteps(sim_config),
+                        previous_runtimes[sim_name],
+                        sim_config['protocol'],
+                    )
+                    for task, cost in zip(submit_list[sim_name], costs):
+                        task['n_fiber_coords'] = n_fiber_coords[(task['inner'], task['fiber'])]
+                        task['predicted_cost'] = cost
+                    submit_list[sim_name].sort(key=lambda task: task['predicted_cost'], reverse=True)
+                    # slurm starts array tasks in index order, so the job numbers (array indices) follow the run order
+                    for job_number, task in enumerate(submit_list[sim_name]):
+                        task['job_number'] = job_number
                     # save_submit list as csv
                     pd.DataFrame(submit_list[sim_name]).to_csv(os.path.join(sim_path, 'out_err_key.csv'), index=False)
 
@@ -779,8 +1381,6 @@ def get_submission_list(run_inds):
         assert len(run.items()) > 0, f'Encountered empty run configuration: {filename}'
 
         print(f'Generating run list for run {run_number}')
-        # sleep to make it not too fast
-        time.sleep(1)
         # get list of fibers to run
         submission_addition = make_run_sub_list(run_number)
         # check for duplicate nsims
@@ -813,6 +1413,8 @@ def pre_submit_setup():
     if len(args.run_indices) == 0:
         sys.exit("Error: No run indices to use.")
     run_inds = args.run_indices
+    if args.bulletin_board and OS == 'WINDOWS':
+        sys.exit("Error: -B/--bulletin-board requires MPI, which is only supported on UNIX-like systems.")
     # compile MOD files if they have not yet been compiled
     auto_compile(args.force_recompile)
     # check for submission context
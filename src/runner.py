@@ -256,6 +256,7 @@ class Runner(Configurable):
             ).save(
                 sim_obj_file
             )
+            simulation.save_metadata(Simulation.metadata_path(sim_obj_dir))
         return simulation, sim_obj_dir
 
     def validate_supersample(self, simulation, sample_num, model_num):
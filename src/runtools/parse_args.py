@@ -122,6 +122,23 @@ nsims_group.add_argument(
     help='After importing delete n_sim folder from NSIM_EXPORT_PATH',
 )
 
+# add compare thresholds parser
+ct_parser = subparsers.add_parser(
+    'compare_thresholds',
+    help='Compare thresholds between two Sims (e.g., CVODE vs. fixed time step) for each n_sim',
+)
+ct_parser.add_argument('sample', type=int, help='Sample index')
+ct_parser.add_argument('model', type=int, help='Model index')
+ct_parser.add_argument('reference_sim', type=int, help='Index of the reference Sim (e.g., fixed time step)')
+ct_parser.add_argument('sim', type=int, help='Index of the Sim to compare (e.g., CVODE)')
+ct_parser.add_argument(
+    '-t',
+    '--tolerance',
+    type=float,
+    default=1.0,
+    help='Maximum percent difference in threshold of any fiber (default 1)',
+)
+
 # add clean samples parser
 cs_parser = subparsers.add_parser(
     'clean_samples',
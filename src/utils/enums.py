@@ -306,6 +306,14 @@ class TerminationCriteriaMode(ASCENTEnum, Enum):
     ABSOLUTE_DIFFERENCE = 1
 
 
+@unique
+class ThresholdSearchMode(ASCENTEnum, Enum):
+    config = 'mode'
+
+    BISECTION = 0
+    ILLINOIS = 1
+
+
 # %% Perineurium Impedance
 
 
@@ -0,0 +1,29 @@
+"""Tests the compare_thresholds script.
+
+The copyrights of this software are owned by Duke University. Please
+refer to the LICENSE and README.md files for licensing instructions. The
+source code can be found on the following GitHub repository:
+https://github.com/wmglab-duke/ascent
+"""
+
+import numpy as np
+import pandas as pd
+
+from scripts.compare_thresholds import compare_thresholds
+
+
+def test_compare_thresholds():
+    """Test that fibers are matched across Sims and their differences summarized per n_sim."""
+    reference = pd.DataFrame(
+        {'sample': 0, 'model': 0, 'sim': 0, 'nsim': [0, 0, 1], 'inner': [0, 1, 0], 'fiber': 0, 'threshold': 1.0}
+    )
+    # fibers are in a different order, and one fiber is missing from the compared sim
+    other = pd.DataFrame(
+        {'sample': 0, 'model': 0, 'sim': 1, 'nsim': [0, 0], 'inner': [1, 0], 'fiber': 0, 'threshold': [1.02, 0.99]}
+    )
+
+    comparison = compare_thresholds(pd.concat([reference, other]), 0, 1)
+    assert list(comparison['nsim']) == [0]
+    assert list(comparison['n_fibers']) == [2]
+    np.testing.assert_allclose(comparison['mean_percent_difference'], [1.5])
+    np.testing.assert_allclose(comparison['max_percent_difference'], [2])
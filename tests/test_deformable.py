@@ -0,0 +1,87 @@
+"""Tests the deformable module.
+
+The copyrights of this software are owned by Duke University. Please
+refer to the LICENSE and README.md files for licensing instructions. The
+source code can be found on the following GitHub repository:
+https://github.com/wmglab-duke/ascent
+"""
+
+import numpy as np
+import pymunk
+import pytest
+
+from src.core import Nerve, Trace
+from src.core.deformable import Deformable
+
+
+@pytest.fixture
+def nerve():
+    """Create a non-circular nerve trace.
+
+    :return: Nerve object.
+    """
+    t = np.linspace(0, 2 * np.pi, 300, endpoint=False)
+    radius = 1000 + 150 * np.sin(3 * t)
+    return Nerve(Trace(np.column_stack([3000 + radius * np.cos(t), 3000 + 0.6 * radius * np.sin(t)])))
+
+
+@pytest.mark.parametrize('deform_ratio, expected_count', [(1, 20), (0.5, 10), (0, 1)])
+def test_deform_steps(nerve, deform_ratio, expected_count):
+    """Test the interpolated morph steps between a nerve and its reshaped circle.
+
+    :param nerve: Nerve trace.
+    :param deform_ratio: Deform ratio.
+    :param expected_count: Expected number of morph steps.
+    """
+    end = nerve.to_circle()
+    steps = Deformable.deform_steps(nerve, end, 20, deform_ratio)
+
+    assert len(steps) == expected_count
+    assert all(isinstance(step, Nerve) for step in steps)
+    assert np.allclose(steps[0].points, nerve.points)
+    if deform_ratio == 1:
+        # every end point is matched to exactly one start point
+        assert np.allclose(np.sort(steps[-1].points, axis=0), np.sort(end.points, axis=0))
+        # interpolated traces are updated (not cached from the start trace)
+        assert np.isclose(steps[-1].area(), end.area())
+
+
+def test_deform_tolerance(nerve, monkeypatch):
+    """Test that a tolerance ends the final settling early, with fascicles within the tolerance of a full settling.
+
+    :param nerve: Nerve trace.
+    :param monkeypatch: Pytest monkeypatch fixture.
+    """
+    step = pymunk.Space.step
+    counts = []
+
+    def counting_step(space, dt):
+        counts[-1] += 1
+        step(space, dt)
+
+    monkeypatch.setattr(pymunk.Space, 'step', counting_step)
+
+    def deform(tolerance):
+        t = np.linspace(0, 2 * np.pi, 60, endpoint=False)
+        contents = [
+            Trace(np.column_stack([3000 + dx + 150 * np.cos(t), 3000 + dy + 150 * np.sin(t)]))
+            for dx, dy in [(-500, 0), (0, 0), (500, 0), (0, -350), (0, 350)]
+        ]
+        counts.append(0)
+        return Deformable(nerve, nerve.to_circle(), contents).deform(
+            morph_count=10, morph_index_step=2, render=False, progress_bar=False, tolerance=tolerance
+        )
+
+    tolerance = 5.0
+    movements, rotations = deform(None)
+    tolerance_movements, tolerance_rotations = deform(tolerance)
+
+    # 3 physics steps per boundary update, then the final settling
+    settling_steps = [count - 10 * 2 * 3 for count in counts]
+    assert settling_steps[0] == 500
+    assert settling_steps[1] < 500
+
+    # no point of a fascicle (radius 150) is further than the tolerance from its position after the full settling
+    offsets = np.linalg.norm(np.subtract(tolerance_movements, movements), axis=1)
+    offsets += 150 * np.abs(np.subtract(tolerance_rotations, rotations))
+    assert np.max(offsets) < tolerance
@@ -0,0 +1,41 @@
+"""Benchmarks the deformable module.
+
+Requires the pytest-benchmark plugin; skipped if it is not installed.
+
+The copyrights of this software are owned by Duke University. Please
+refer to the LICENSE and README.md files for licensing instructions. The
+source code can be found on the following GitHub repository:
+https://github.com/wmglab-duke/ascent
+"""
+
+import pytest
+
+from src.core.deformable import Deformable
+from src.utils import ReshapeNerveMode
+from tests.test_fiberset_benchmark import mock_slide
+
+pytest.importorskip('pytest_benchmark')
+
+
+@pytest.fixture(scope='module')
+def slide():
+    """Create a small MockSample slide.
+
+    :return: Slide object.
+    """
+    return mock_slide()
+
+
+def test_deform(benchmark, slide):
+    """Benchmark deforming a small nerve to a circle.
+
+    :param benchmark: pytest-benchmark fixture.
+    :param slide: Slide with a MockSample nerve.
+    """
+    # from_slide copies the traces, so every round starts from the original slide
+    movements, rotations = benchmark(
+        lambda: Deformable.from_slide(slide, ReshapeNerveMode.CIRCLE).deform(
+            morph_count=36, render=False, progress_bar=False
+        )
+    )
+    assert len(movements) == len(rotations) == len(slide.fascicles)
@@ -0,0 +1,110 @@
+"""Benchmarks the fiberset module.
+
+Requires the pytest-benchmark plugin; skipped if it is not installed.
+
+The copyrights of this software are owned by Duke University. Please
+refer to the LICENSE and README.md files for licensing instructions. The
+source code can be found on the following GitHub repository:
+https://github.com/wmglab-duke/ascent
+"""
+
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from shapely.affinity import scale
+from shapely.geometry import Polygon
+
+from src.core import Fascicle, FiberSet, MockSample, Nerve, Slide, Trace
+from src.utils import Config, Configurable, NerveMode, SetupMode
+
+pytest.importorskip('pytest_benchmark')
+
+XY_PARAMETERS = {
+    'CENTROID': {},
+    'UNIFORM_DENSITY': {'top_down': True, 'target_density': 0.0005, 'minimum_number': 1},
+    'UNIFORM_COUNT': {'count': 50},
+    'WHEEL': {
+        'spoke_count': 6,
+        'point_count_per_spoke': 4,
+        'find_centroid': True,
+        'angle_offset': 0,
+        'angle_offset_is_in_degrees': True,
+    },
+    'EXPLICIT': {},
+}
+
+
+def polygon_trace(polygon: Polygon) -> Trace:
+    """Convert a shapely polygon to a Trace.
+
+    :param polygon: Polygon to convert.
+    :return: Trace of the polygon exterior.
+    """
+    return Trace(np.array(polygon.exterior.coords)[:-1])
+
+
+def mock_slide(num_fascicles: int = 20) -> Slide:
+    """Create a slide from the synthetic nerve and fascicles of MockSample, without writing masks.
+
+    :param num_fascicles: Number of fascicles to attempt to place.
+    :return: Slide with one inner per fascicle.
+    """
+    config = Configurable.load(os.path.join('config', 'templates', 'mock_sample.json'))
+    config['populate']['num_fascicle_attempt'] = num_fascicles
+
+    mock = MockSample()
+    mock.add(SetupMode.OLD, Config.MOCK_SAMPLE, config)
+    mock.make_nerve().make_fascicles()
+
+    fascicles = [
+        Fascicle(polygon_trace(fascicle), [polygon_trace(scale(fascicle, 0.9, 0.9, origin='centroid'))])
+        for fascicle in mock.fascicles
+    ]
+    return Slide(fascicles, Nerve(polygon_trace(mock.nerve)), NerveMode.PRESENT)
+
+
+@pytest.fixture(scope='module')
+def sample():
+    """Create a stand-in Sample holding a MockSample slide.
+
+    :return: Object with the slides attribute of Sample.
+    """
+    return SimpleNamespace(slides=[mock_slide()])
+
+
+@pytest.mark.filterwarnings('ignore:Ignoring xy_trace_buffer')
+@pytest.mark.parametrize('xy_mode', list(XY_PARAMETERS.keys()))
+def test_generate(benchmark, sample, tmp_path, monkeypatch, xy_mode):
+    """Benchmark generating fiber locations, maps, and z coordinates for each xy mode.
+
+    :param benchmark: pytest-benchmark fixture.
+    :param sample: Stand-in Sample.
+    :param tmp_path: Temporary directory (pytest fixture).
+    :param monkeypatch: Pytest monkeypatch fixture.
+    :param xy_mode: Name of the FiberXYMode.
+    """
+    # the saved plot of fiber locations would dominate the timing
+    monkeypatch.setattr(FiberSet, 'plot_fibers_on_sample', lambda *args: None)
+
+    if xy_mode == 'EXPLICIT':
+        with open(tmp_path / 'explicit.txt', 'w') as f:
+            f.write('x y\n')
+            for fascicle in sample.slides[0].fascicles:
+                f.write('{} {}\n'.format(*fascicle.inners[0].centroid()))
+
+    model_config = {'modes': {'fiber_z': 'EXTRUSION'}, 'medium': {'proximal': {'length': 12500}}}
+    sim_config = {
+        'fibers': {
+            'mode': 'MRG_DISCRETE',
+            'xy_trace_buffer': 5.0,
+            'z_parameters': {'diameter': 5.7, 'min': 0, 'max': 12500, 'offset': 0, 'seed': 123},
+            'xy_parameters': {'mode': xy_mode, 'seed': 123, **XY_PARAMETERS[xy_mode]},
+        }
+    }
+    fiberset = FiberSet(sample)
+    fiberset.add(SetupMode.OLD, Config.MODEL, model_config).add(SetupMode.OLD, Config.SIM, sim_config)
+
+    benchmark(fiberset.generate, str(tmp_path))
+    assert len(fiberset.fibers) >= len(sample.slides[0].fascicles)
@@ -0,0 +1,160 @@
+"""Tests the hocwriter module.
+
+The copyrights of this software are owned by Duke University. Please
+refer to the LICENSE and README.md files for licensing instructions. The
+source code can be found on the following GitHub repository:
+https://github.com/wmglab-duke/ascent
+"""
+
+import io
+
+import pytest
+
+from src.core import HocWriter
+from src.utils import Config, SetupMode
+
+
+def write_protocol(protocol: dict) -> str:
+    """Write the protocol section of launch.hoc for a threshold protocol.
+
+    :param protocol: Sim protocol, added to a standard threshold protocol.
+    :return: Text written to launch.hoc.
+    """
+    sim_config = {
+        'protocol': {
+            'mode': 'ACTIVATION_THRESHOLD',
+            'threshold': {'value': -30, 'n_min_aps': 1, 'ap_detect_location': 0.9},
+            'bounds_search': {'mode': 'PERCENT_INCREMENT', 'top': -0.1, 'bottom': -0.01, 'step': 10},
+            'termination_criteria': {'mode': 'PERCENT_DIFFERENCE', 'percent': 1},
+            **protocol,
+        }
+    }
+    hocwriter = HocWriter(None, None)
+    hocwriter.add(SetupMode.OLD, Config.SIM, sim_config)
+
+    file_object = io.StringIO()
+    hocwriter.write_protocol(file_object)
+    return file_object.getvalue()
+
+
+@pytest.mark.parametrize(
+    'protocol, search_flag',
+    [
+        ({}, 0),
+        ({'threshold_search': {'mode': 'BISECTION'}}, 0),
+        ({'threshold_search': {'mode': 'ILLINOIS'}}, 1),
+    ],
+)
+def test_write_protocol_threshold_search(protocol, search_flag):
+    """Test that the threshold search mode is passed to FindThresh.hoc.
+
+    :param protocol: Sim protocol keys to add.
+    :param search_flag: Expected value of search_flag.
+    """
+    assert f'search_flag = {search_flag} //' in write_protocol(protocol)
+
+
+def test_write_protocol_threshold_search_block():
+    """Test that the Illinois search is rejected for block thresholds."""
+    with pytest.raises(ValueError):
+        write_protocol({'mode': 'BLOCK_THRESHOLD', 'threshold_search': {'mode': 'ILLINOIS'}})
+
+
+@pytest.mark.parametrize('mode', ['SECANT', 'config'])
+def test_write_protocol_threshold_search_invalid(mode):
+    """Test that an unknown threshold search mode is rejected with the valid modes.
+
+    :param mode: Threshold search mode to write.
+    """
+    with pytest.raises(ValueError, match='BISECTION'):
+        write_protocol({'threshold_search': {'mode': mode}})
+
+
+def write_base_parameters(sim_config: dict) -> str:
+    """Write the base parameters section of launch.hoc.
+
+    :param sim_config: Sim config keys, added to the time parameters of the waveform and protocol.
+    :return: Text written to launch.hoc.
+    """
+    config = {
+        'waveform': {'global': {'dt': 0.001, 'stop': 5}},
+        **sim_config,
+        'protocol': {'initSS': -200, 'dt_initSS': 10, **sim_config.get('protocol', {})},
+    }
+    hocwriter = HocWriter(None, None)
+    hocwriter.add(SetupMode.OLD, Config.MODEL, {'temperature': 37}).add(SetupMode.OLD, Config.SIM, config)
+
+    file_object = io.StringIO()
+    hocwriter.write_base_parameters(file_object, 5000)
+    return file_object.getvalue()
+
+
+def test_write_base_parameters_cvode():
+    """Test that CVODE is off by default and on (with its tolerance) if requested."""
+    assert 'flag_cvode = 0 //' in write_base_parameters({})
+    assert 'flag_cvode = 0 //' in write_base_parameters({'protocol': {'cvode': {'use': False}}})
+
+    text = write_base_parameters({'protocol': {'cvode': {'use': True, 'atol': 0.0001}}})
+    assert 'flag_cvode = 1 //' in text
+    assert 'cvode_atol = 0.0001 //' in text
+
+
+def test_write_base_parameters_cvode_saving_space():
+    """Test that CVODE is rejected with recordings made at fixed time steps."""
+    with pytest.raises(ValueError):
+        write_base_parameters({'protocol': {'cvode': {'use': True}}, 'saving': {'space': {'vm': True}}})
+
+
+@pytest.mark.parametrize(
+    'record_dt, steps',
+    [
+        (None, {'Vm': 1, 'gating': 1, 'Istim': 1}),
+        (0.01, {'Vm': 10, 'gating': 10, 'Istim': 10}),
+        ({'gating': 0.05, 'istim': 0.0001}, {'Vm': 1, 'gating': 50, 'Istim': 1}),
+    ],
+)
+def test_write_saving_record_step(record_dt, steps):
+    """Test that recording intervals are converted to (at least one) time steps for each quantity.
+
+    :param record_dt: Sim saving -> time -> dt.
+    :param steps: Expected number of time steps between recorded values of each quantity.
+    """
+    saving = {
+        'space': {'vm': False, 'gating': False, 'times': [0]},
+        'time': {'vm': True, 'gating': True, 'istim': True, 'locs': 'all'},
+    }
+    if record_dt is not None:
+        saving['time']['dt'] = record_dt
+    hocwriter = HocWriter(None, None)
+    hocwriter.add(SetupMode.OLD, Config.SIM, {'waveform': {'global': {'dt': 0.001}}, 'saving': saving})
+
+    file_object = io.StringIO()
+    hocwriter.write_saving({}, file_object)
+    for name, step in steps.items():
+        assert f'record_step_{name} = {step} //' in file_object.getvalue()
+
+
+@pytest.mark.parametrize(
+    'locs, gating_lines',
+    [
+        ([0.5], ['Nchecknodes_gating = 1', 'checknode_gating_values.x[0] = int((axonnodes-1)*deltaz*0.5/deltaz)']),
+        ({'vm': 'all', 'gating': [0, 1]}, ['Nchecknodes_gating = 2', 'checknode_gating_values.x[1] = int(']),
+        ({'vm': [0.5], 'gating': 'all'}, ['Nchecknodes_gating = axonnodes', 'checknode_gating_values.x[i] = i']),
+    ],
+)
+def test_write_classification_checkpoints_gating_locs(locs, gating_lines):
+    """Test that gating params are recorded at the Vm nodes, unless given their own nodes.
+
+    :param locs: Sim saving -> time -> locs.
+    :param gating_lines: Expected lines (or starts of lines) defining the gating nodes.
+    """
+    hocwriter = HocWriter(None, None)
+    hocwriter.add(SetupMode.OLD, Config.SIM, {'saving': {'space': {'times': [0]}, 'time': {'locs': locs}}})
+
+    file_object = io.StringIO()
+    hocwriter.write_classification_checkpoints(file_object)
+    text = file_object.getvalue()
+    for line in gating_lines:
+        assert line in text
+    vm_locs = locs['vm'] if isinstance(locs, dict) else locs
+    assert f'Nchecknodes = {"axonnodes" if vm_locs == "all" else len(vm_locs)}\n' in text
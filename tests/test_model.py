@@ -0,0 +1,49 @@
+"""Tests the model module.
+
+The copyrights of this software are owned by Duke University. Please
+refer to the LICENSE and README.md files for licensing instructions. The
+source code can be found on the following GitHub repository:
+https://github.com/wmglab-duke/ascent
+"""
+
+import numpy as np
+import pytest
+from shapely.geometry import Point
+
+from src.core import Trace
+from src.core.model import Model
+
+
+def step_until_buffer(trace: Trace, boundary, buffer: float, step) -> int:
+    """Count steps by shifting the trace one step at a time (reference implementation).
+
+    :param trace: Trace to shift.
+    :param boundary: Boundary polygon.
+    :param buffer: Minimum separation.
+    :param step: (x, y) step vector.
+    :return: Number of steps.
+    """
+    trace = trace.deepcopy()
+    n_steps = 0
+    while trace.polygon().boundary.distance(boundary.boundary) >= buffer:
+        trace.shift([step[0], step[1], 0])
+        n_steps += 1
+    return n_steps
+
+
+@pytest.mark.parametrize('theta_c', [0, 45, 137, 200, 311])
+@pytest.mark.parametrize('center', [(0, 0), (-150, 80), (220, -30)])
+def test_trace_boundary_steps(theta_c, center):
+    """Test that the solved step count matches stepping the trace.
+
+    :param theta_c: Cuff angle, as used by Model.compute_cuff_shift.
+    :param center: Center of the trace.
+    """
+    t = np.linspace(0, 2 * np.pi, 200, endpoint=False)
+    radius = 200 + 40 * np.sin(3 * t)
+    trace = Trace(np.column_stack([center[0] + radius * np.cos(t), center[1] + 0.7 * radius * np.sin(t)]))
+    boundary = Point(0, 0).buffer(600)
+    step = (np.cos(-theta_c + np.pi), np.sin(-theta_c + np.pi))
+
+    expected = step_until_buffer(trace, boundary, 76.2, step)
+    assert abs(Model.trace_boundary_steps(trace, boundary, 76.2, step) - expected) <= 1
@@ -0,0 +1,110 @@
+"""Tests the plotter module.
+
+The copyrights of this software are owned by Duke University. Please
+refer to the LICENSE and README.md files for licensing instructions. The
+source code can be found on the following GitHub repository:
+https://github.com/wmglab-duke/ascent
+"""
+
+import itertools
+from types import SimpleNamespace
+
+import matplotlib
+import numpy as np
+import pandas as pd
+import pytest
+from matplotlib.collections import PathCollection, PolyCollection
+
+from src.core import Fascicle, Nerve, Slide
+from src.core.plotter import heatmaps
+from src.utils import NerveMode
+from tests.test_slide import circle_trace
+
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+
+CENTERS = list(itertools.product(range(-200, 201, 100), repeat=2))
+
+
+@pytest.fixture
+def heatmap_kws():
+    """Build sample and sim stand-ins for a 5x5 grid of fascicles with one fiber at each center.
+
+    :return: keyword arguments for heatmaps() providing the sample and sim objects.
+    """
+    slide = Slide(
+        [Fascicle(circle_trace(x, y, 45), [circle_trace(x, y, 40)]) for x, y in CENTERS],
+        Nerve(circle_trace(0, 0, 500, 200)),
+        NerveMode.PRESENT,
+    )
+    fiberset = SimpleNamespace(xy_points=lambda: CENTERS)
+    return {'sample_object': SimpleNamespace(slides=[slide]), 'sim_object': SimpleNamespace(fibersets=[fiberset])}
+
+
+@pytest.fixture
+def threshdf():
+    """Build threshold data for one fiber per inner, with fiber indices in reverse order of inners.
+
+    :return: DataFrame as returned by Query.threshold_data().
+    """
+    n = len(CENTERS)
+    return pd.DataFrame(
+        {
+            'sample': 0,
+            'model': 0,
+            'sim': 0,
+            'nsim': 0,
+            'inner': np.arange(n),
+            'fiber': 0,
+            'index': np.arange(n)[::-1],
+            'fiberset_index': 0,
+            'threshold': np.linspace(0.1, 1, n),
+        }
+    )
+
+
+@pytest.mark.parametrize('mode', ['fibers', 'inners', 'fibers_on_off', 'inners_on_off'])
+def test_heatmaps(heatmap_kws, threshdf, mode):
+    """Test that inners are drawn as one collection and fibers as one scatter, colored by threshold.
+
+    :param heatmap_kws: sample and sim stand-ins.
+    :param threshdf: threshold data.
+    :param mode: heatmap mode.
+    """
+    fig, ax = plt.subplots()
+    heatmaps(data=threshdf, ax=ax, mode=mode, cutoff_thresh=0.5, colorbar=False, **heatmap_kws)
+
+    collections = [c for c in ax.collections if isinstance(c, PolyCollection)]
+    scatters = [c for c in ax.collections if type(c) is PathCollection]
+    assert len(collections) == 1
+    assert len(collections[0].get_paths()) == len(CENTERS)
+
+    cmap = plt.get_cmap('viridis').reversed()
+    thresholds = threshdf.threshold.to_numpy()
+    expected = cmap((thresholds - thresholds.min()) / (thresholds.max() - thresholds.min()))
+    if mode == 'fibers':
+        assert len(scatters) == 1
+        # fibers are placed by their master index, not by row order
+        np.testing.assert_allclose(scatters[0].get_offsets(), np.array(CENTERS)[threshdf['index']])
+        np.testing.assert_allclose(scatters[0].get_facecolors(), expected)
+    elif mode == 'inners':
+        assert len(scatters) == 0
+        np.testing.assert_allclose(collections[0].get_facecolors(), expected)
+    elif mode == 'inners_on_off':
+        above = thresholds > 0.5
+        np.testing.assert_allclose(collections[0].get_facecolors()[above], [[0, 0, 1, 1]] * above.sum())
+    plt.close(fig)
+
+
+def test_heatmaps_missing(heatmap_kws, threshdf):
+    """Test that missing thresholds are drawn in the missing color.
+
+    :param heatmap_kws: sample and sim stand-ins.
+    :param threshdf: threshold data.
+    """
+    threshdf.loc[3, 'threshold'] = np.nan
+    fig, ax = plt.subplots()
+    with pytest.warns(UserWarning):
+        heatmaps(data=threshdf, ax=ax, mode='inners', colorbar=False, **heatmap_kws)
+    np.testing.assert_allclose(ax.collections[0].get_facecolors()[3], [1, 0, 0, 1])
+    plt.close(fig)
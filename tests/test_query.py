@@ -0,0 +1,420 @@
+"""Tests the query module.
+
+The copyrights of this software are owned by Duke University. Please
+refer to the LICENSE and README.md files for licensing instructions. The
+source code can be found on the following GitHub repository:
+https://github.com/wmglab-duke/ascent
+"""
+
+import itertools
+import json
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core import FiberSet, Query, Simulation
+from src.utils import Config, Object, SetupMode
+
+# outer 0 holds inners 0 and 1, outer 1 holds inner 2; values are master fiber indices
+OUT_TO_FIB = [[[0, 2], [1]], [[3]]]
+OUT_TO_IN = [[0, 1], [2]]
+N_FIBERS = 4
+
+
+def write_output(path: str, value):
+    """Write a NEURON-style output file.
+
+    :param path: Path to the file.
+    :param value: Value to write.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(f'{value}\n')
+
+
+@pytest.fixture
+def sim_tree(tmp_path, monkeypatch):
+    """Build a project tree with one sim of two n_sims, in the layout written by ASCENT.
+
+    :param tmp_path: Temporary directory (pytest fixture).
+    :param monkeypatch: Pytest monkeypatch fixture.
+    :return: Simulation directory, relative to the project root.
+    """
+    fiberset = FiberSet(None)
+    fiberset.fibers = [
+        {'diam': 5.7 + i, 'fiber': [(10.0 * i, -10.0 * i, z) for z in range(3)], 'offset_ratio': 0}
+        for i in range(N_FIBERS)
+    ]
+
+    sim = Simulation(None)
+    sim.add(SetupMode.OLD, Config.SIM, {'protocol': {'mode': 'ACTIVATION_THRESHOLD'}})
+    sim.fibersets = [fiberset]
+    sim.fiberset_map_pairs = [(OUT_TO_FIB, OUT_TO_IN)]
+    sim.potentials_product = [(0, 0)]
+    sim.master_product_indices = [(0, 0), (0, 1)]
+
+    # cached objects are keyed on relative paths, which every test tree shares
+    Query._load_object.cache_clear()
+    Query._load_metadata.cache_clear()
+
+    monkeypatch.chdir(tmp_path)
+    sim_dir = os.path.join('samples', '0', 'models', '0', 'sims', '0')
+    os.makedirs(sim_dir)
+    with open(os.path.join(sim_dir, 'sim.obj'), 'wb') as f:
+        pickle.dump(sim, f)
+
+    for nsim in range(2):
+        for inner, fibers in enumerate([[0, 2], [1], [3]]):
+            for local_fiber in range(len(fibers)):
+                write_output(
+                    os.path.join(
+                        sim_dir, 'n_sims', str(nsim), 'data', 'outputs', f'thresh_inner{inner}_fiber{local_fiber}.dat'
+                    ),
+                    -(nsim + 1) * (inner + 0.1 * local_fiber + 1),
+                )
+
+    return sim_dir
+
+
+def make_query() -> Query:
+    """Run a query for sample 0, model 0, sim 0.
+
+    :return: Query that has been run.
+    """
+    criteria = {
+        'partial_matches': True,
+        'include_downstream': True,
+        'indices': {'sample': [0], 'model': [0], 'sim': [0]},
+    }
+    return Query(criteria).run()
+
+
+def test_consolidate_outputs(sim_tree):
+    """Test that the outputs table holds one row per nsim, inner, and fiber.
+
+    :param sim_tree: Simulation directory (fixture).
+    """
+    assert Simulation.outputs_table_stale(sim_tree)
+    outputs = Query.get_outputs([0, 0, 0])
+    assert not Simulation.outputs_table_stale(sim_tree)
+
+    np.testing.assert_array_equal(outputs['nsim'], [0, 0, 0, 0, 1, 1, 1, 1])
+    np.testing.assert_array_equal(outputs['inner'], [0, 0, 1, 2] * 2)
+    np.testing.assert_array_equal(outputs['fiber'], [0, 1, 0, 0] * 2)
+    np.testing.assert_array_equal(outputs['index'], [0, 2, 1, 3] * 2)
+    np.testing.assert_array_equal(outputs['waveform_index'], [0, 0, 0, 0, 1, 1, 1, 1])
+    np.testing.assert_allclose(outputs['diameter'], [5.7, 7.7, 6.7, 8.7] * 2)
+    np.testing.assert_allclose(outputs['x'], [0, 20, 10, 30] * 2)
+    np.testing.assert_allclose(outputs['threshold'], [-1, -1.1, -2, -3, -2, -2.2, -4, -6])
+    assert outputs['activations'].shape == (8, 0)
+
+
+@pytest.mark.parametrize('workers', [None, 1, 4])
+def test_threshold_data(sim_tree, workers):
+    """Test threshold_data columns and values, including meanify.
+
+    :param sim_tree: Simulation directory (fixture).
+    :param workers: Number of loading threads.
+    """
+    data = make_query().threshold_data(workers=workers)
+    assert list(data.columns) == [
+        'sample',
+        'model',
+        'sim',
+        'nsim',
+        'inner',
+        'fiber',
+        'index',
+        'fiberset_index',
+        'waveform_index',
+        'active_src_index',
+        'threshold',
+    ]
+    np.testing.assert_allclose(data['threshold'], [1, 1.1, 2, 3, 2, 2.2, 4, 6])
+
+    means = make_query().threshold_data(meanify=True)
+    np.testing.assert_allclose(means['mean'], [7.1 / 4, 14.2 / 4])
+    np.testing.assert_allclose(means['std'], [np.std([1, 1.1, 2, 3], ddof=1), np.std([2, 2.2, 4, 6], ddof=1)])
+
+
+def test_threshold_data_workers(sim_tree, monkeypatch):
+    """Test that n_sims are read concurrently for a single sim only, so that thread pools are not nested.
+
+    :param sim_tree: Simulation directory (fixture).
+    :param monkeypatch: Pytest monkeypatch fixture.
+    """
+    get_outputs = Query.get_outputs
+    calls = []
+
+    def recording_get_outputs(indices, workers=None, refresh=False):
+        calls.append(workers)
+        return get_outputs(indices, workers=workers, refresh=refresh)
+
+    monkeypatch.setattr(Query, 'get_outputs', staticmethod(recording_get_outputs))
+    make_query().threshold_data(workers=4)
+    assert calls == [4]
+
+    calls.clear()
+    data = make_query().threshold_data(sim_indices=[0, 0], workers=4)
+    assert calls == [1, 1]
+    assert len(data) == 2 * 8
+
+
+def test_threshold_data_missing(sim_tree):
+    """Test that a missing threshold raises unless ignored, and that new outputs rebuild the table.
+
+    :param sim_tree: Simulation directory (fixture).
+    """
+    outputs_dir = os.path.join(sim_tree, 'n_sims', '1', 'data', 'outputs')
+    os.remove(os.path.join(outputs_dir, 'thresh_inner2_fiber0.dat'))
+
+    with pytest.raises(FileNotFoundError):
+        make_query().threshold_data()
+
+    with pytest.warns(UserWarning):
+        data = make_query().threshold_data(ignore_missing=True)
+    assert np.isnan(data['threshold'].iloc[-1])
+
+    # rewriting the output must be picked up without manually rebuilding the table
+    write_output(os.path.join(outputs_dir, 'thresh_inner2_fiber0.dat'), 6)
+    table_mtime = os.path.getmtime(Simulation.outputs_table_path(sim_tree))
+    os.utime(outputs_dir, (table_mtime + 1, table_mtime + 1))
+    assert make_query().threshold_data()['threshold'].iloc[-1] == 6
+
+
+def test_outputs_table_rebuilt(sim_tree):
+    """Test that outputs overwritten in place (found with refresh or the outputs marker), and a partial table, cause
+    the table to be rebuilt.
+
+    :param sim_tree: Simulation directory (fixture).
+    """
+    Query.get_outputs([0, 0, 0])
+    assert not Simulation.outputs_table_stale(sim_tree)
+
+    # overwriting a file does not change the mtime of its directory, so only refresh checks the file itself
+    outputs_dir = os.path.join(sim_tree, 'n_sims', '1', 'data', 'outputs')
+    outputs_dir_mtime = os.path.getmtime(outputs_dir)
+    thresh_path = os.path.join(outputs_dir, 'thresh_inner2_fiber0.dat')
+    write_output(thresh_path, 7)
+    os.utime(outputs_dir, (outputs_dir_mtime, outputs_dir_mtime))
+    os.utime(thresh_path, (outputs_dir_mtime + 10, outputs_dir_mtime + 10))
+    assert not Simulation.outputs_table_stale(sim_tree)
+    assert Simulation.outputs_table_stale(sim_tree, refresh=True)
+    assert Query.get_outputs([0, 0, 0], refresh=True)['threshold'][-1] == 7
+
+    # e.g., an import, which touches the outputs marker
+    write_output(thresh_path, 8)
+    os.utime(outputs_dir, (outputs_dir_mtime, outputs_dir_mtime))
+    Simulation.mark_outputs_updated(sim_tree)
+    os.utime(Simulation.outputs_marker_path(sim_tree), (outputs_dir_mtime + 15, outputs_dir_mtime + 15))
+    assert Simulation.outputs_table_stale(sim_tree)
+    assert Query.get_outputs([0, 0, 0])['threshold'][-1] == 8
+
+    # e.g., an interrupted consolidation by a previous version
+    table_path = Simulation.outputs_table_path(sim_tree)
+    with open(table_path, 'r+b') as f:
+        f.truncate(10)
+    os.utime(table_path, (outputs_dir_mtime + 20, outputs_dir_mtime + 20))
+    assert Simulation.outputs_table_stale(sim_tree)
+    assert Query.get_outputs([0, 0, 0])['threshold'][-1] == 8
+    assert not [file for file in os.listdir(sim_tree) if file.startswith('outputs.npz.')]
+
+
+def test_get_object_cache(sim_tree):
+    """Test that objects are unpickled once, until they are saved again.
+
+    :param sim_tree: Simulation directory (fixture).
+    """
+    sim = Query.get_object(Object.SIMULATION, [0, 0, 0])
+    assert Query.get_object(Object.SIMULATION, [0, 0, 0]) is sim
+
+    obj_path = os.path.join(sim_tree, 'sim.obj')
+    sim.save(obj_path)
+    os.utime(obj_path, (os.path.getmtime(obj_path) + 1,) * 2)
+    assert Query.get_object(Object.SIMULATION, [0, 0, 0]) is not sim
+
+
+def test_get_metadata(sim_tree):
+    """Test that the metadata sidecar is written on demand and matches the Simulation.
+
+    :param sim_tree: Simulation directory (fixture).
+    """
+    metadata = Query.get_metadata([0, 0, 0])
+    assert os.path.isfile(Simulation.metadata_path(sim_tree))
+    assert metadata['master_product_indices'] == [[0, 0], [0, 1]]
+    assert metadata['fiberset_map_pairs'] == [[OUT_TO_FIB, OUT_TO_IN]]
+    np.testing.assert_allclose(metadata['fibersets'][0]['xy'], [[10.0 * i, -10.0 * i] for i in range(N_FIBERS)])
+    np.testing.assert_allclose(metadata['fibersets'][0]['diameters'], [5.7 + i for i in range(N_FIBERS)])
+
+
+def test_threshold_errors():
+    """Test the merged percent errors against matching each row to its reference row."""
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(
+        [
+            {'sample': sample, 'model': model, 'sim': 0, 'nsim': nsim, 'index': index, 'threshold': rng.uniform(1, 2)}
+            for sample, model, nsim, index in itertools.product([0, 1], [0, 1, 2], [0, 1], range(5))
+        ]
+    )
+
+    errors = Query.threshold_errors(data, reference={'model': 0})
+    for i, row in data.iterrows():
+        correct = data[
+            (data['model'] == 0)
+            & (data['sample'] == row['sample'])
+            & (data['index'] == row['index'])
+            & (data['sim'] == row['sim'])
+            & (data['nsim'] == row['nsim'])
+        ]['threshold'].item()
+        assert errors['error'][i] == pytest.approx(100 * abs(row['threshold'] - correct) / correct)
+
+    summary = Query.threshold_errors(data, reference={'model': 0}, by=['model'])
+    assert list(summary['model']) == [0, 1, 2]
+    assert summary['max'][0] == 0
+    assert summary['mean'][1] == pytest.approx(errors[errors['model'] == 1]['error'].mean())
+
+
+@pytest.mark.parametrize('file_format', ['xlsx', 'csv'])
+def test_excel_output(sim_tree, file_format):
+    """Test the summary rows of each nsim, including factors, config values, and threshold statistics.
+
+    :param sim_tree: Simulation directory (fixture).
+    :param file_format: Output file format.
+    """
+    with open(os.path.join(sim_tree, 'sim.obj'), 'rb') as f:
+        sim = pickle.load(f)
+    sim.wave_key, sim.wave_product = ['waveform->pulse_width'], [(0.1,), (0.2,)]
+    sim.fiberset_key, sim.fiberset_product = ['fibers->mode'], [('MRG_DISCRETE',)]
+    sim.save(os.path.join(sim_tree, 'sim.obj'))
+
+    for path, config in [
+        (os.path.join('samples', '0', 'sample.json'), {'sample': 'Rat1'}),
+        (os.path.join('samples', '0', 'models', '0', 'model.json'), {'cuff': {'rotate': {'add_ang': [0, 90]}}}),
+        (os.path.join('config', 'user', 'sims', '0.json'), {}),
+    ]:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(config, f)
+
+    make_query().excel_output(
+        'summary.xlsx',
+        sample_keys=[['sample']],
+        model_keys=[['cuff', 'rotate', 'add_ang']],
+        console_output=False,
+        file_format=file_format,
+        threshold_stats=True,
+    )
+
+    if file_format == 'xlsx':
+        sheet = pd.read_excel('summary.xlsx', sheet_name='Sim 0')
+    else:
+        sheet = pd.read_csv('summary_sim0.csv')
+
+    assert list(sheet.columns) == [
+        'Indices',
+        'Sample Index',
+        'sample->sample',
+        'Model Index',
+        'model->cuff->rotate->add_ang',
+        'Sim Index',
+        'Nsim Index',
+        'fibers->mode',
+        'waveform->pulse_width',
+        'Threshold Mean',
+        'Threshold Std',
+        'Threshold SEM',
+        'Sample Config Path',
+        'Model Config Path',
+        'Sim Config Path',
+        'NSim Path',
+    ]
+    assert list(sheet['Indices']) == ['0_0_0_0', '0_0_0_1']
+    assert list(sheet['sample->sample']) == ['Rat1'] * 2
+    assert list(sheet['model->cuff->rotate->add_ang']) == ['[0, 90]'] * 2
+    assert list(sheet['fibers->mode']) == ['MRG_DISCRETE'] * 2
+    np.testing.assert_allclose(sheet['waveform->pulse_width'], [0.1, 0.2])
+    np.testing.assert_allclose(sheet['Threshold Mean'], [7.1 / 4, 14.2 / 4])
+    assert list(sheet['NSim Path']) == [os.path.join(sim_tree, 'n_sims', str(nsim)) for nsim in range(2)]
+
+
+def test_excel_output_rows(sim_tree, monkeypatch):
+    """Test that every nsim gets a row, that outputs are only read for threshold statistics, and that factor keys
+    may not overwrite other columns.
+
+    :param sim_tree: Simulation directory (fixture).
+    :param monkeypatch: Pytest monkeypatch fixture.
+    """
+    with open(os.path.join(sim_tree, 'sim.obj'), 'rb') as f:
+        sim = pickle.load(f)
+    # a third nsim that has not been run yet
+    sim.master_product_indices = [(0, 0), (0, 1), (0, 0)]
+    sim.wave_key, sim.wave_product = ['waveform->pulse_width'], [(0.1,), (0.2,)]
+    sim.fiberset_key, sim.fiberset_product = ['fibers->mode'], [('MRG_DISCRETE',)]
+    sim.save(os.path.join(sim_tree, 'sim.obj'))
+    for path in [
+        os.path.join('samples', '0', 'sample.json'),
+        os.path.join('samples', '0', 'models', '0', 'model.json'),
+        os.path.join('config', 'user', 'sims', '0.json'),
+    ]:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({}, f)
+
+    make_query().excel_output(
+        'summary.csv', config_paths=False, console_output=False, file_format='csv', threshold_stats=True
+    )
+    sheet = pd.read_csv('summary_sim0.csv')
+    assert list(sheet['Nsim Index']) == [0, 1, 2]
+    np.testing.assert_allclose(sheet['waveform->pulse_width'], [0.1, 0.2, 0.1])
+    np.testing.assert_allclose(sheet['Threshold Mean'], [7.1 / 4, 14.2 / 4, np.nan])
+
+    def get_outputs(indices, workers=None):
+        raise AssertionError('outputs read without threshold_stats')
+
+    monkeypatch.setattr(Query, 'get_outputs', staticmethod(get_outputs))
+    make_query().excel_output('summary.csv', config_paths=False, console_output=False, file_format='csv')
+    assert 'Threshold Mean' not in pd.read_csv('summary_sim0.csv').columns
+
+    sim.wave_key = ['fibers->mode']
+    sim.save(os.path.join(sim_tree, 'sim.obj'))
+    with pytest.raises(ValueError, match='fibers->mode'):
+        make_query().excel_output('summary.csv', console_output=False, file_format='csv')
+
+
+def test_run_catalog(tmp_path, monkeypatch):
+    """Test that Query.run matches nested criteria and only re-parses configs that changed.
+
+    :param tmp_path: Temporary directory (pytest fixture).
+    :param monkeypatch: Pytest monkeypatch fixture.
+    """
+    monkeypatch.chdir(tmp_path)
+
+    def write_config(path: str, config: dict):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(config, f)
+
+    for model, add_ang in enumerate([0, 90, [0, 90]]):
+        write_config(os.path.join('samples', '0', 'models', str(model), 'model.json'), {'cuff': {'add_ang': add_ang}})
+        os.makedirs(os.path.join('samples', '0', 'models', str(model), 'sims', '0'))
+    write_config(os.path.join('samples', '0', 'sample.json'), {'sample': 'Rat1'})
+    write_config(os.path.join('config', 'user', 'sims', '0.json'), {})
+
+    criteria = {'partial_matches': True, 'include_downstream': True, 'model': {'cuff': {'add_ang': 90}}}
+
+    def matched_models() -> list:
+        return [model['index'] for model in Query(criteria).run().summary()['samples'][0]['models']]
+
+    assert sorted(matched_models()) == [1, 2]
+    assert os.path.isfile(Query.CATALOG_PATH)
+
+    # unchanged configs come from the catalog
+    with monkeypatch.context() as m:
+        m.setattr(Query, 'load', staticmethod(lambda path: pytest.fail(f'parsed {path}')))
+        assert sorted(matched_models()) == [1, 2]
+
+    write_config(os.path.join('samples', '0', 'models', '1', 'model.json'), {'cuff': {'add_ang': 180}})
+    assert matched_models() == [2]
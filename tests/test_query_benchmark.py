@@ -0,0 +1,111 @@
+"""Benchmarks the query module.
+
+Requires the pytest-benchmark plugin; skipped if it is not installed.
+
+The copyrights of this software are owned by Duke University. Please
+refer to the LICENSE and README.md files for licensing instructions. The
+source code can be found on the following GitHub repository:
+https://github.com/wmglab-duke/ascent
+"""
+
+import os
+import pickle
+
+import pytest
+
+from src.core import FiberSet, Query, Simulation
+from src.utils import Config, SetupMode
+from tests.test_query import write_output
+from tests.test_simulation import all_fibers, index_map_simulation
+
+pytest.importorskip('pytest_benchmark')
+
+N_SIMS = 4
+N_NSIMS = 5
+
+
+@pytest.fixture(scope='module')
+def result_tree(tmp_path_factory):
+    """Build a project tree with 4 sims of 5 n_sims, each with thresholds for 200 fibers (10 outers, 2 inners each).
+
+    :param tmp_path_factory: Temporary directory factory (pytest fixture).
+    :yield: Sim directories, relative to the project root (which is the working directory until teardown).
+    """
+    sim = index_map_simulation(10, 2, 10)
+    fiberset = FiberSet(None)
+    fiberset.fibers = [
+        {'diam': 8.7, 'fiber': [(float(fiber), float(fiber), 0.0)], 'offset_ratio': 0} for fiber in all_fibers(sim)
+    ]
+    sim.add(SetupMode.OLD, Config.SIM, {'protocol': {'mode': 'ACTIVATION_THRESHOLD'}})
+    sim.fibersets = [fiberset]
+    sim.potentials_product = [(0, 0)]
+    sim.master_product_indices = [(0, i) for i in range(N_NSIMS)]
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.chdir(tmp_path_factory.mktemp('project'))
+        Query._load_object.cache_clear()
+        Query._load_metadata.cache_clear()
+
+        sim_dirs = []
+        for sim_index in range(N_SIMS):
+            sim_dir = os.path.join('samples', '0', 'models', '0', 'sims', str(sim_index))
+            os.makedirs(sim_dir)
+            with open(os.path.join(sim_dir, 'sim.obj'), 'wb') as f:
+                pickle.dump(sim, f)
+            for nsim in range(N_NSIMS):
+                for fiber in all_fibers(sim):
+                    inner, local_fiber = sim.indices_fib_to_n(0, fiber)
+                    write_output(
+                        os.path.join(
+                            sim_dir,
+                            'n_sims',
+                            str(nsim),
+                            'data',
+                            'outputs',
+                            f'thresh_inner{inner}_fiber{local_fiber}.dat',
+                        ),
+                        -0.1 * (fiber + nsim + 1),
+                    )
+            sim_dirs.append(sim_dir)
+
+        yield sim_dirs
+
+        Query._load_object.cache_clear()
+        Query._load_metadata.cache_clear()
+
+
+def make_query() -> Query:
+    """Run a query for every sim of sample 0, model 0.
+
+    :return: Query that has been run.
+    """
+    criteria = {
+        'partial_matches': True,
+        'include_downstream': True,
+        'indices': {'sample': [0], 'model': [0], 'sim': list(range(N_SIMS))},
+    }
+    return Query(criteria).run()
+
+
+def test_consolidate_outputs(benchmark, result_tree):
+    """Benchmark building the outputs table of a sim from its output files.
+
+    :param benchmark: pytest-benchmark fixture.
+    :param result_tree: Sim directories.
+    """
+    with open(os.path.join(result_tree[0], 'sim.obj'), 'rb') as f:
+        sim: Simulation = pickle.load(f)
+    benchmark(sim.consolidate_outputs, result_tree[0])
+
+
+@pytest.mark.parametrize('meanify', [False, True])
+def test_threshold_data(benchmark, result_tree, meanify):
+    """Benchmark loading thresholds from the consolidated outputs tables (built on the first round).
+
+    :param benchmark: pytest-benchmark fixture.
+    :param result_tree: Sim directories.
+    :param meanify: Whether to average the thresholds of each n_sim.
+    """
+    query = make_query()
+    data = benchmark(query.threshold_data, meanify=meanify)
+    assert len(data) == N_SIMS * N_NSIMS * (1 if meanify else 200)
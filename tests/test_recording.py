@@ -0,0 +1,93 @@
+"""Tests the recording module.
+
+The copyrights of this software are owned by Duke University. Please
+refer to the LICENSE and README.md files for licensing instructions. The
+source code can be found on the following GitHub repository:
+https://github.com/wmglab-duke/ascent
+"""
+
+import numpy as np
+import pytest
+
+from src.core import Recording
+
+DT = 0.005
+N_TSTEPS = 200
+N_NODES = 7
+
+
+@pytest.fixture
+def time_course():
+    """Build a Vm(t) table as recorded at every node, with time as the first column.
+
+    :return: Column labels and table.
+    """
+    time = np.arange(N_TSTEPS) * DT
+    vm = -80 + np.sin(time[:, None] + np.arange(N_NODES)) * 10
+    labels = ['Time(ms)'] + [f'Vm_node{node}(mV)' for node in range(N_NODES)]
+    return labels, np.column_stack([time, vm])
+
+
+def write_text(path, labels, table):
+    """Write a recording as SaveTimeCourse.hoc does in text mode.
+
+    :param path: Output path.
+    :param labels: Column labels.
+    :param table: Table of values.
+    """
+    with open(path, 'w') as f:
+        f.write(' '.join(labels) + ' \n')
+        for row in table:
+            f.write(' '.join(f'{value:f}' for value in row) + ' \n')
+
+
+def write_binary(path, labels, table):
+    """Write a recording as SaveTimeCourse.hoc does in binary mode (each column with Vector.fwrite).
+
+    :param path: Output path.
+    :param labels: Column labels.
+    :param table: Table of values.
+    """
+    with open(path, 'wb') as f:
+        f.write(f'#ASCENT_BINARY float64 {table.shape[0]} {table.shape[1]}\n'.encode())
+        f.write((' '.join(labels) + ' \n').encode())
+        for column in table.T:
+            f.write(column.astype(np.float64).tobytes())
+
+
+def test_recording_binary(tmp_path, time_course):
+    """Test that binary recordings match the values written, and slicing by time and node.
+
+    :param tmp_path: Temporary directory (pytest fixture).
+    :param time_course: Column labels and table.
+    """
+    labels, table = time_course
+    path = str(tmp_path / 'Vm_time_inner0_fiber0_amp0.bin')
+    write_binary(path, labels, table)
+
+    recording = Recording(path)
+    assert isinstance(recording.values, np.memmap)
+    assert recording.labels == labels
+    np.testing.assert_array_equal(recording.index, table[:, 0])
+    np.testing.assert_array_equal(recording.values, table[:, 1:])
+
+    window = recording.select(start=0.1, stop=0.2, columns=[2, 5])
+    in_window = (table[:, 0] >= 0.1 - 1e-12) & (table[:, 0] <= 0.2 + 1e-12)
+    np.testing.assert_array_equal(window, table[in_window][:, [3, 6]])
+    np.testing.assert_array_equal(recording.select(columns=4), table[:, 5])
+
+
+def test_recording_text(tmp_path, time_course):
+    """Test that text recordings are read like binary ones (to the precision of the text format).
+
+    :param tmp_path: Temporary directory (pytest fixture).
+    :param time_course: Column labels and table.
+    """
+    labels, table = time_course
+    path = str(tmp_path / 'Vm_time_inner0_fiber0_amp0.dat')
+    write_text(path, labels, table)
+
+    recording = Recording(path)
+    assert recording.labels == labels
+    np.testing.assert_allclose(recording.values, table[:, 1:], atol=1e-6)
+    np.testing.assert_allclose(recording.select(stop=0.01), table[:3, 1:], atol=1e-6)
@@ -0,0 +1,114 @@
+"""Tests the simulation module.
+
+The copyrights of this software are owned by Duke University. Please
+refer to the LICENSE and README.md files for licensing instructions. The
+source code can be found on the following GitHub repository:
+https://github.com/wmglab-duke/ascent
+"""
+
+import os
+import pickle
+from typing import List, Tuple
+
+import numpy as np
+
+from src.core import Simulation
+
+
+def index_map_simulation(n_outers: int, inners_per_outer: int, fibers_per_inner: int) -> Simulation:
+    """Create a Simulation with one fiberset, with fiber indices interleaved across inners.
+
+    :param n_outers: Number of outers.
+    :param inners_per_outer: Number of inners in each outer.
+    :param fibers_per_inner: Number of fibers in each inner.
+    :return: Simulation object.
+    """
+    n_inners = n_outers * inners_per_outer
+    out_to_in = [list(range(i * inners_per_outer, (i + 1) * inners_per_outer)) for i in range(n_outers)]
+    out_to_fib = [[[inner + n_inners * k for k in range(fibers_per_inner)] for inner in inners] for inners in out_to_in]
+
+    sim = Simulation(None)
+    sim.fiberset_map_pairs = [(out_to_fib, out_to_in)]
+    return sim
+
+
+def reference_fib_to_n(sim: Simulation, fiberset_ind: int, fiber_ind: int) -> Tuple[int, int]:
+    """Find the inner and local fiber index by searching the fiberset maps (reference implementation).
+
+    :param sim: Simulation object.
+    :param fiberset_ind: Fiberset index.
+    :param fiber_ind: Fiber index.
+    :return: Inner and local fiber index.
+    """
+    out_fib, out_in = sim.fiberset_map_pairs[fiberset_ind]
+    for a, outer in enumerate(out_fib):
+        for b, inner in enumerate(outer):
+            if fiber_ind in inner:
+                return out_in[a][b], inner.index(fiber_ind)
+
+
+def all_fibers(sim: Simulation) -> List[int]:
+    """List every fiber index in the first fiberset.
+
+    :param sim: Simulation object.
+    :return: Fiber indices.
+    """
+    out_fib, _ = sim.fiberset_map_pairs[0]
+    return [fiber for outer in out_fib for inner in outer for fiber in inner]
+
+
+def test_index_maps():
+    """Test that the lookup tables agree with searching the fiberset maps, in both directions."""
+    sim = index_map_simulation(3, 2, 4)
+    for fiber in all_fibers(sim):
+        inner, local_fiber = sim.indices_fib_to_n(0, fiber)
+        assert (inner, local_fiber) == reference_fib_to_n(sim, 0, fiber)
+        assert sim.indices_n_to_fib(0, inner, local_fiber) == fiber
+
+
+def test_index_maps_unpickled():
+    """Test that the lookup tables are left out of pickles and rebuilt on load."""
+    sim = index_map_simulation(3, 2, 4).build_index_maps()
+    assert '_fib_to_n' not in sim.__getstate__()
+
+    loaded: Simulation = pickle.loads(pickle.dumps(sim))
+    assert loaded._fib_to_n == sim._fib_to_n
+    assert loaded._n_to_fib == sim._n_to_fib
+
+
+def test_manifest(tmp_path):
+    """Test that the fibers of an n_sim are read from its manifest, and changed inputs are detected.
+
+    :param tmp_path: Temporary directory (pytest fixture).
+    """
+    source = tmp_path / 'n_sims'
+    nsim_dir = source / '0_0_0_0'
+    (nsim_dir / 'data' / 'inputs').mkdir(parents=True)
+    (nsim_dir / 'data' / 'outputs').mkdir(parents=True)
+    fibers = []
+    for inner, fiber in [(0, 0), (0, 1), (1, 0)]:
+        filename = f'inner{inner}_fiber{fiber}.dat'
+        np.savetxt(nsim_dir / 'data' / 'inputs' / filename, np.zeros(11), header='11', comments='')
+        fibers.append({'inner': inner, 'fiber': fiber, 'master_index': len(fibers), 'input': f'data/inputs/{filename}'})
+    Simulation(None).save_manifest(str(nsim_dir), 0, fibers[::-1])
+
+    # fibers are listed by the manifest only, so an extra file in inputs is not a fiber
+    (nsim_dir / 'data' / 'inputs' / 'inner2_fiber0.dat').touch()
+    assert Simulation.n_sim_fibers(str(nsim_dir)) == [(0, 0), (0, 1), (1, 0)]
+    assert Simulation.verify_manifest(str(nsim_dir)) == []
+
+    for inner, fiber in [(0, 0), (0, 1)]:
+        (nsim_dir / 'data' / 'outputs' / f'thresh_inner{inner}_fiber{fiber}.dat').touch()
+        (nsim_dir / 'data' / 'outputs' / f'activation_inner{inner}_fiber{fiber}_amp0.dat').touch()
+    assert Simulation.thresholds_exist(0, 0, 0, str(source)) is False
+    assert Simulation.activations_exist(0, 0, 0, str(source), 1) is False
+    (nsim_dir / 'data' / 'outputs' / 'thresh_inner1_fiber0.dat').touch()
+    (nsim_dir / 'data' / 'outputs' / 'activation_inner1_fiber0_amp0.dat').touch()
+    assert Simulation.thresholds_exist(0, 0, 0, str(source)) is True
+    assert Simulation.activations_exist(0, 0, 0, str(source), 1) is True
+
+    assert Simulation.n_sims_intact(0, 0, 0, str(source)) is True
+    np.savetxt(nsim_dir / 'data' / 'inputs' / 'inner0_fiber1.dat', np.ones(11), header='11', comments='')
+    os.remove(nsim_dir / 'data' / 'inputs' / 'inner1_fiber0.dat')
+    assert len(Simulation.verify_manifest(str(nsim_dir))) == 2
+    assert Simulation.n_sims_intact(0, 0, 0, str(source)) is False
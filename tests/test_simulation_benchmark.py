@@ -0,0 +1,127 @@
+"""Benchmarks the simulation module.
+
+Requires the pytest-benchmark plugin; skipped if it is not installed.
+
+The copyrights of this software are owned by Duke University. Please
+refer to the LICENSE and README.md files for licensing instructions. The
+source code can be found on the following GitHub repository:
+https://github.com/wmglab-duke/ascent
+"""
+
+import json
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.utils import Config, Configurable, SetupMode
+from tests.test_simulation import all_fibers, index_map_simulation
+
+pytest.importorskip('pytest_benchmark')
+
+
+@pytest.fixture(scope='module')
+def large_sim():
+    """Create a Simulation whose fiberset has 10k fibers (20 outers, 5 inners each, 100 fibers per inner).
+
+    :return: Simulation object.
+    """
+    return index_map_simulation(20, 5, 100).build_index_maps()
+
+
+def test_indices_fib_to_n(benchmark, large_sim):
+    """Benchmark mapping every fiber index to its inner and local fiber index.
+
+    :param benchmark: pytest-benchmark fixture.
+    :param large_sim: Simulation with 10k fibers.
+    """
+    fibers = all_fibers(large_sim)
+    benchmark(lambda: [large_sim.indices_fib_to_n(0, fiber) for fiber in fibers])
+
+
+def test_indices_n_to_fib(benchmark, large_sim):
+    """Benchmark mapping every inner and local fiber index to its fiber index.
+
+    :param benchmark: pytest-benchmark fixture.
+    :param large_sim: Simulation with 10k fibers.
+    """
+    pairs = [large_sim.indices_fib_to_n(0, fiber) for fiber in all_fibers(large_sim)]
+    benchmark(lambda: [large_sim.indices_n_to_fib(0, inner, fiber) for inner, fiber in pairs])
+
+
+def test_build_index_maps(benchmark, large_sim):
+    """Benchmark building the lookup tables, as done after unpickling.
+
+    :param benchmark: pytest-benchmark fixture.
+    :param large_sim: Simulation with 10k fibers.
+    """
+    benchmark(large_sim.build_index_maps)
+
+
+@pytest.fixture
+def bases_simulation(tmp_path):
+    """Create a Simulation with synthetic fibers and bases on disk, ready for build_n_sims.
+
+    The sim has 2 n_sims (waveforms) of one fiberset with 100 fibers of 221 nodes, and 4 bases.
+
+    :param tmp_path: Temporary directory (pytest fixture).
+    :return: Simulation object and its sims directory.
+    """
+    n_fibers, n_nodes, n_bases, n_waveforms = 100, 221, 4, 2
+
+    sim_config = Configurable.load(os.path.join('config', 'templates', 'sim.json'))
+    sim_config['fibers']['z_parameters']['diameter'] = 5.7
+    model_config = Configurable.load(os.path.join('config', 'templates', 'model.json'))
+
+    sim = index_map_simulation(1, 1, n_fibers)
+    sim.add(SetupMode.OLD, Config.MODEL, model_config).add(SetupMode.OLD, Config.SIM, sim_config)
+    sim.add(SetupMode.OLD, Config.CLI_ARGS, {})
+    sim.src_key, sim.src_product = [], [[1, -1]]
+    sim.fiberset_key, sim.fiberset_product = [], [()]
+    sim.wave_key = ['waveform->BIPHASIC_PULSE_TRAIN->pulse_width']
+    sim.wave_product = [(0.1 * (i + 1),) for i in range(n_waveforms)]
+    sim.waveforms = [SimpleNamespace(wave=np.zeros(50)) for _ in range(n_waveforms)]
+    sim.potentials_product = [(0, 0)]
+    sim.master_product_indices = [(0, i) for i in range(n_waveforms)]
+    sim.n_bases = n_bases
+
+    # layout of samples/<sample>/models/<model>/, with sims/0 holding the sim outputs
+    (tmp_path / 'mesh').mkdir()
+    with open(tmp_path / 'mesh' / 'im.json', 'w') as f:
+        json.dump({'currentIDs': {'1': 'contact 1', '2': 'contact 2'}}, f)
+    sim_dir = tmp_path / 'sims' / '0'
+    (sim_dir / 'waveforms').mkdir(parents=True)
+    for i in range(n_waveforms):
+        np.savetxt(sim_dir / 'waveforms' / f'{i}.dat', np.zeros(50))
+
+    (sim_dir / 'fibersets' / '0').mkdir(parents=True)
+    np.savetxt(sim_dir / 'fibersets' / '0' / 'diams.txt', [5.7] * n_fibers)
+    for fiber in range(n_fibers):
+        np.savetxt(
+            sim_dir / 'fibersets' / '0' / f'{fiber}.dat', np.zeros((n_nodes, 3)), header=str(n_nodes), comments=''
+        )
+
+    rng = np.random.default_rng(0)
+    for basis in range(n_bases):
+        basis_dir = sim_dir / 'fibersets_bases' / '0' / str(basis)
+        basis_dir.mkdir(parents=True)
+        for fiber in range(n_fibers):
+            np.savetxt(basis_dir / f'{fiber}.dat', rng.normal(size=n_nodes), header=str(n_nodes), comments='')
+
+    return sim, str(tmp_path / 'sims')
+
+
+def test_build_n_sims(benchmark, bases_simulation):
+    """Benchmark weighting the bases of every fiber and writing the n_sim inputs.
+
+    :param benchmark: pytest-benchmark fixture.
+    :param bases_simulation: Simulation with synthetic bases, and its sims directory.
+    """
+    sim, sims_dir = bases_simulation
+    benchmark(sim.build_n_sims, sims_dir, 0)
+    assert len(os.listdir(os.path.join(sims_dir, '0', 'n_sims', '1', 'data', 'inputs'))) == 100 + 2
+
+    manifest = Configurable.load(os.path.join(sims_dir, '0', 'n_sims', '1', 'manifest.json'))
+    assert len(manifest['fibers']) == 100 and len(manifest['checksums']) == 100 + 2
+    assert all(fiber['n_coords'] == 221 for fiber in manifest['fibers'])
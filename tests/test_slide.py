@@ -0,0 +1,66 @@
+"""Tests the slide module.
+
+The copyrights of this software are owned by Duke University. Please
+refer to the LICENSE and README.md files for licensing instructions. The
+source code can be found on the following GitHub repository:
+https://github.com/wmglab-duke/ascent
+"""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from src.core import Fascicle, Nerve, Slide, Trace
+from src.utils import NerveMode
+
+
+def circle_trace(x: float, y: float, r: float, n: int = 50) -> Trace:
+    """Create a circular trace.
+
+    :param x: x coordinate of center.
+    :param y: y coordinate of center.
+    :param r: radius.
+    :param n: number of points.
+    :return: Trace object.
+    """
+    t = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    return Trace(np.column_stack([x + r * np.cos(t), y + r * np.sin(t)]))
+
+
+@pytest.fixture
+def grid_slide():
+    """Create a slide with a 5x5 grid of fascicles.
+
+    :return: Slide object.
+    """
+    fascicles = [Fascicle(circle_trace(x, y, 40)) for x, y in itertools.product(range(-200, 201, 100), repeat=2)]
+    return Slide(fascicles, Nerve(circle_trace(0, 0, 500, 200)), NerveMode.PRESENT)
+
+
+@pytest.mark.parametrize('distance', [0, 15, 25, 100])
+def test_fascicle_pairs(grid_slide, distance):
+    """Test that the candidate pairs include every pair within the distance, in combinations order.
+
+    :param grid_slide: Slide with a grid of fascicles.
+    :param distance: separation distance.
+    """
+    candidates = list(grid_slide.fascicle_pairs(distance))
+    close = [
+        (first, second)
+        for first, second in itertools.combinations(grid_slide.fascicles, 2)
+        if first.min_distance(second)[0] < distance
+    ]
+    assert all(pair in candidates for pair in close)
+    order = list(itertools.combinations(grid_slide.fascicles, 2))
+    assert [order.index(pair) for pair in candidates] == sorted(order.index(pair) for pair in candidates)
+
+
+def test_fascicles_too_close(grid_slide):
+    """Test the fascicle separation check.
+
+    :param grid_slide: Slide with a grid of fascicles.
+    """
+    assert not grid_slide.fascicles_too_close(10)
+    assert grid_slide.fascicles_too_close(25)
+    assert grid_slide.validate(die=False, tolerance=10)
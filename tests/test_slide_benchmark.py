@@ -0,0 +1,47 @@
+"""Benchmarks the slide module.
+
+Requires the pytest-benchmark plugin; skipped if it is not installed.
+
+The copyrights of this software are owned by Duke University. Please
+refer to the LICENSE and README.md files for licensing instructions. The
+source code can be found on the following GitHub repository:
+https://github.com/wmglab-duke/ascent
+"""
+
+import itertools
+
+import pytest
+
+from src.core import Fascicle, Nerve, Slide
+from src.utils import NerveMode
+from tests.test_slide import circle_trace
+
+pytest.importorskip('pytest_benchmark')
+
+
+@pytest.fixture(scope='module')
+def many_fascicle_slide():
+    """Create a slide with a 20x20 grid of fascicles, similar in count to a human vagus nerve.
+
+    :return: Slide object.
+    """
+    fascicles = [Fascicle(circle_trace(x, y, 40)) for x, y in itertools.product(range(-950, 951, 100), repeat=2)]
+    return Slide(fascicles, Nerve(circle_trace(0, 0, 1500, 500)), NerveMode.PRESENT, will_reposition=True)
+
+
+def test_fascicle_fascicle_intersection(benchmark, many_fascicle_slide):
+    """Benchmark the fascicle intersection check.
+
+    :param benchmark: pytest-benchmark fixture.
+    :param many_fascicle_slide: Slide with many fascicles.
+    """
+    assert not benchmark(many_fascicle_slide.fascicle_fascicle_intersection)
+
+
+def test_fascicles_too_close(benchmark, many_fascicle_slide):
+    """Benchmark the fascicle separation check.
+
+    :param benchmark: pytest-benchmark fixture.
+    :param many_fascicle_slide: Slide with many fascicles.
+    """
+    assert not benchmark(many_fascicle_slide.fascicles_too_close, 10)
@@ -0,0 +1,461 @@
+"""Tests the NEURON submission script.
+
+The copyrights of this software are owned by Duke University. Please
+refer to the LICENSE and README.md files for licensing instructions. The
+source code can be found on the following GitHub repository:
+https://github.com/wmglab-duke/ascent
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.neuron import submit
+
+
+@pytest.fixture
+def nsim_tree(tmp_path, monkeypatch):
+    """Build a NEURON export directory with one FINITE_AMPLITUDES n_sim of two fibers and five amplitudes.
+
+    :param tmp_path: Temporary directory (pytest fixture).
+    :param monkeypatch: Pytest monkeypatch fixture.
+    :return: Function that writes the n_sim protocol and returns the submission list of run 0.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(submit, 'args', argparse.Namespace(verbose=False), raising=False)
+
+    os.makedirs('runs')
+    with open(os.path.join('runs', '0.json'), 'w') as f:
+        json.dump({'sample': 0, 'models': [0], 'sims': [0]}, f)
+
+    sim_path = os.path.join('n_sims', '0_0_0_0')
+    for directory in ['inputs', 'outputs']:
+        os.makedirs(os.path.join(sim_path, 'data', directory))
+    for fiber in range(2):
+        np.savetxt(os.path.join(sim_path, 'data', 'inputs', f'inner0_fiber{fiber}.dat'), [111, *np.zeros(111)])
+
+    def make_sub_list(protocol: dict) -> list:
+        with open(os.path.join(sim_path, '0.json'), 'w') as f:
+            json.dump(
+                {
+                    'fibers': {'mode': 'MRG_DISCRETE'},
+                    'waveform': {'global': {'dt': 0.001, 'stop': 5}},
+                    'protocol': {'mode': 'FINITE_AMPLITUDES', 'amplitudes': [0.1, 0.2, 0.3, 0.4, 0.5], **protocol},
+                },
+                f,
+            )
+        tasks = submit.make_run_sub_list(0)['0_0_0_0']
+        return sorted(tasks, key=lambda task: task['job_number'])
+
+    return make_sub_list
+
+
+@pytest.mark.parametrize(
+    'protocol, expected',
+    [
+        ({'mode': 'ACTIVATION_THRESHOLD'}, [None]),
+        ({'mode': 'FINITE_AMPLITUDES', 'amplitudes': [1, 2, 3]}, [None]),
+        ({'mode': 'FINITE_AMPLITUDES', 'amplitudes': [1, 2, 3], 'amplitudes_per_job': 3}, [None]),
+        ({'mode': 'FINITE_AMPLITUDES', 'amplitudes': [1, 2, 3], 'amplitudes_per_job': 2}, [(0, 2), (2, 3)]),
+        ({'mode': 'FINITE_AMPLITUDES', 'amplitudes': [1, 2, 3], 'amplitudes_per_job': 1}, [(0, 1), (1, 2), (2, 3)]),
+    ],
+)
+def test_get_amp_ranges(protocol, expected):
+    """Test splitting the amplitudes of a fiber across jobs.
+
+    :param protocol: Sim protocol.
+    :param expected: Expected amplitude ranges.
+    """
+    assert submit.get_amp_ranges(protocol) == expected
+
+
+def test_get_amp_ranges_invalid():
+    """Test that a non-positive number of amplitudes per job is rejected."""
+    with pytest.raises(ValueError):
+        submit.get_amp_ranges({'mode': 'FINITE_AMPLITUDES', 'amplitudes': [1], 'amplitudes_per_job': 0})
+
+
+def test_make_run_sub_list_amp_ranges(nsim_tree):
+    """Test that each fiber gets one job per amplitude range, skipping ranges that already have outputs.
+
+    :param nsim_tree: Function returning the submission list for a protocol (fixture).
+    """
+    tasks = nsim_tree({})
+    assert [task['job_number'] for task in tasks] == [0, 1]
+    assert all('amp_range' not in task for task in tasks)
+
+    tasks = nsim_tree({'amplitudes_per_job': 2})
+    assert [task['job_number'] for task in tasks] == list(range(6))
+    assert sorted((task['fiber'], task['amp_range']) for task in tasks) == [
+        (fiber, amp_range) for fiber in range(2) for amp_range in [(0, 2), (2, 4), (4, 5)]
+    ]
+
+    # the last activation of a range marks the range as done
+    fiber = tasks[0]['fiber']
+    output_path = os.path.join('n_sims', '0_0_0_0', 'data', 'outputs', f'activation_inner0_fiber{fiber}_amp3.dat')
+    open(output_path, 'w').close()
+    tasks = nsim_tree({'amplitudes_per_job': 2})
+    assert [(task['fiber'], task['amp_range']) for task in tasks if task['fiber'] == fiber] == [
+        (fiber, (0, 2)),
+        (fiber, (4, 5)),
+    ]
+
+
+def test_make_fiber_tasks_bulletin_board(nsim_tree, monkeypatch):
+    """Test that the fibers run by bulletin_board.py get the same parameters as their start scripts.
+
+    :param nsim_tree: Function returning the submission list for a protocol (fixture).
+    :param monkeypatch: Pytest monkeypatch fixture.
+    """
+    monkeypatch.setattr(submit, 'args', argparse.Namespace(verbose=False, bulletin_board=True))
+    project_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    os.makedirs(os.path.join('config', 'system'))
+    shutil.copy(os.path.join(project_path, 'config', 'system', 'fiber_z.json'), os.path.join('config', 'system'))
+    os.makedirs(os.path.join('MOD_Files', 'x86_64'))
+    open(os.path.join('MOD_Files', 'x86_64', 'special'), 'w').close()
+
+    sim_path = os.path.join('n_sims', '0_0_0_0')
+    with open(os.path.join(sim_path, '0.json'), 'w') as f:
+        json.dump(
+            {
+                'fibers': {'mode': 'MRG_DISCRETE', 'z_parameters': {'diameter': 5.7}},
+                'waveform': {'global': {'dt': 0.001, 'stop': 5}},
+                'protocol': {'mode': 'FINITE_AMPLITUDES', 'amplitudes': [0.1, 0.2, 0.3], 'amplitudes_per_job': 2},
+            },
+            f,
+        )
+
+    submit.make_fiber_tasks({'0_0_0_0': submit.make_run_sub_list(0)['0_0_0_0']}, 'local')
+
+    with open(os.path.join(sim_path, 'bb_tasks.json')) as f:
+        bb_data = json.load(f)
+    assert bb_data['sim_path'] == sim_path
+    assert sorted((task['fiber'], tuple(task['amp_range'])) for task in bb_data['tasks']) == [
+        (0, (0, 2)),
+        (0, (2, 3)),
+        (1, (0, 2)),
+        (1, (2, 3)),
+    ]
+    for task in bb_data['tasks']:
+        assert task['parameters'] == {
+            'inner_ind': 0,
+            'fiber_ind': task['fiber'],
+            'stimamp_top': 0,
+            'stimamp_bottom': 0,
+            'fiberD': 5.7,
+            'deltaz': 500,
+            'axonnodes': 11,
+        }
+
+
+def test_estimate_fiber_memory():
+    """Test that the memory estimate grows with the values recorded over time."""
+    sim_config = {'waveform': {'global': {'dt': 0.001, 'stop': 10}}}
+    base = submit.estimate_fiber_memory(sim_config, 221, 21)
+
+    # Vm and gating params at all 21 nodes every time step: 5 * 21 * 10000 doubles
+    sim_config['saving'] = {'time': {'vm': True, 'gating': True, 'istim': False, 'locs': 'all'}}
+    assert submit.estimate_fiber_memory(sim_config, 221, 21) - base == pytest.approx(8 * 5 * 21 * 10000 / 1024**2)
+
+    # recording gating params at 2 nodes every 10 time steps
+    sim_config['saving']['time'].update({'locs': {'vm': 'all', 'gating': [0, 1]}, 'dt': {'gating': 0.01}})
+    assert submit.estimate_fiber_memory(sim_config, 221, 21) - base == pytest.approx(
+        8 * (21 * 10000 + 4 * 2 * 1000) / 1024**2
+    )
+
+
+@pytest.mark.parametrize(
+    'memory_in_use, memory_scale, expected',
+    [(0, 1, 0), (50, 1, 1), (50, 0.5, 0), (90, 1, None)],
+)
+def test_next_admissible(memory_in_use, memory_scale, expected):
+    """Test that the first fiber that fits in the memory budget is started next.
+
+    :param memory_in_use: Memory of the running fibers.
+    :param memory_scale: Factor by which memory estimates are scaled.
+    :param expected: Expected index of the next fiber, None if none fit.
+    """
+    pending = [{'memory_estimate': 80}, {'memory_estimate': 30}]
+    assert submit.next_admissible(pending, memory_in_use, 100, memory_scale) == expected
+
+
+@pytest.mark.skipif(not hasattr(os, 'wait4'), reason='requires os.wait4')
+def test_memory_aware_local_submit(tmp_path, monkeypatch):
+    """Test that local fibers all run and their peak RSS is saved and used to scale later estimates.
+
+    :param tmp_path: Temporary directory (pytest fixture).
+    :param monkeypatch: Pytest monkeypatch fixture.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(submit, 'args', argparse.Namespace(verbose=True), raising=False)
+    for directory in ['start_scripts', os.path.join('logs', 'out'), os.path.join('logs', 'err')]:
+        os.makedirs(directory)
+
+    runfibers = []
+    for job_number in range(3):
+        with open(os.path.join('start_scripts', f'start_{job_number}.sh'), 'w') as f:
+            f.write(f'"{sys.executable}" -c "x = bytearray(50 * 1024**2); print(len(x))"\n')
+        runfibers.append({'job_number': job_number, 'inner': 0, 'fiber': job_number, 'memory_estimate': 1})
+
+    # a child process that was not started by the scheduler must not be reaped by it
+    other_process = subprocess.Popen([sys.executable, '-c', 'pass'])
+
+    # the budget only fits one fiber at a time, and no fiber once the estimates are scaled by the first peak RSS
+    with pytest.warns(UserWarning, match='running it alone'):
+        submit.memory_aware_local_submit(runfibers, '0_0_0_0', 3, 1.5)
+
+    assert os.waitpid(other_process.pid, 0)[0] == other_process.pid
+    other_process.returncode = 0
+
+    peak_rss = pd.read_csv(submit.PEAK_RSS_FILE)
+    assert sorted(peak_rss['job_number']) == [0, 1, 2]
+    assert (peak_rss['peak_rss_mb'] >= 50).all()
+    for job_number in range(3):
+        with open(os.path.join('logs', 'out', f'{job_number}.log')) as f:
+            assert f.read().strip() == str(50 * 1024**2)
+    assert submit.get_memory_scale() >= 50
+
+
+def test_predict_costs_unread_fibers():
+    """Test that fibers whose segments were not read (not submitted) are left out of the seconds per segment."""
+    tasks = [{'inner': 0, 'fiber': 1}]
+    n_fiber_coords = {(0, 0): None, (0, 1): 100, (0, 2): 50}
+    previous_runtimes = {(0, 0): 1.0, (0, 2): 0.5}
+    costs = submit.predict_costs(tasks, n_fiber_coords, 10, previous_runtimes, {'mode': 'ACTIVATION_THRESHOLD'})
+    assert costs == pytest.approx([0.5 / 50 * 100 * 10])
+
+
+def test_predict_makespan():
+    """Test that longest-first ordering shortens the predicted makespan of a long tail."""
+    assert submit.predict_makespan([1, 1, 1, 1, 4], 2) == 6
+    assert submit.predict_makespan([4, 1, 1, 1, 1], 2) == 4
+    assert submit.predict_makespan([], 2) == 0
+
+
+def test_make_run_sub_list_longest_first(nsim_tree):
+    """Test that fibers are ordered by segments, or by their runtime in another n_sim with the same fibers.
+
+    :param nsim_tree: Function returning the submission list for a protocol (fixture).
+    """
+    inputs_path = os.path.join('n_sims', '0_0_0_0', 'data', 'inputs')
+    np.savetxt(os.path.join(inputs_path, 'inner0_fiber1.dat'), [221, *np.zeros(221)])
+    nsim_tree({})
+    tasks = submit.make_run_sub_list(0)['0_0_0_0']
+    assert [task['fiber'] for task in tasks] == [1, 0]
+    # the job numbers are the slurm array indices, which start in index order
+    assert [task['job_number'] for task in tasks] == [0, 1]
+    assert tasks[0]['predicted_cost'] / tasks[1]['predicted_cost'] == pytest.approx(221 / 111)
+
+    # fiber 0 ran for much longer per time step in n_sim 1 (with 10 times fewer time steps)
+    other_path = os.path.join('n_sims', '0_0_0_1')
+    shutil.copytree(inputs_path, os.path.join(other_path, 'data', 'inputs'))
+    os.makedirs(os.path.join(other_path, 'data', 'outputs'))
+    shutil.copy(os.path.join('n_sims', '0_0_0_0', '0.json'), os.path.join(other_path, '1.json'))
+    with open(os.path.join(other_path, '1.json')) as f:
+        other_config = json.load(f)
+    other_config['waveform']['global']['stop'] = 0.5
+    with open(os.path.join(other_path, '1.json'), 'w') as f:
+        json.dump(other_config, f)
+    for fiber, runtime in [(0, 10), (1, 1)]:
+        np.savetxt(os.path.join(other_path, 'data', 'outputs', f'runtime_inner0_fiber{fiber}_amp0.dat'), [runtime])
+
+    run_order = [task['fiber'] for task in submit.make_run_sub_list(0)['0_0_0_0']]
+    assert run_order == [0, 1]
+    costs = {task['fiber']: task['predicted_cost'] for task in submit.make_run_sub_list(0)['0_0_0_0']}
+    # runtime per amplitude x 10 times the time steps x 5 amplitudes
+    assert costs == pytest.approx({0: 10 * 10 * 5, 1: 1 * 10 * 5})
+
+
+def test_get_previous_runtimes(tmp_path, monkeypatch):
+    """Test that each n_sim gets the runtimes of the other n_sims with the same fibers, reading each file once.
+
+    :param tmp_path: Temporary directory (pytest fixture).
+    :param monkeypatch: Pytest monkeypatch fixture.
+    """
+    monkeypatch.chdir(tmp_path)
+    for n_sim, (fibers, runtimes) in enumerate(
+        [('MRG_DISCRETE', [2, 4]), ('MRG_DISCRETE', [4, 8]), ('TIGERHOLM', [1])]
+    ):
+        sim_path = os.path.join('n_sims', f'0_0_0_{n_sim}')
+        os.makedirs(os.path.join(sim_path, 'data', 'outputs'))
+        with open(os.path.join(sim_path, f'{n_sim}.json'), 'w') as f:
+            json.dump({'fibers': {'mode': fibers}, 'waveform': {'global': {'dt': 0.5, 'stop': 1}}}, f)
+        for amp, runtime in enumerate(runtimes):
+            np.savetxt(os.path.join(sim_path, 'data', 'outputs', f'runtime_inner0_fiber0_amp{amp}.dat'), [runtime])
+
+    loaded = []
+    loadtxt = np.loadtxt
+    monkeypatch.setattr(submit.np, 'loadtxt', lambda path, **kwargs: loaded.append(path) or loadtxt(path, **kwargs))
+    previous_runtimes = submit.get_previous_runtimes('n_sims', ['0_0_0_0', '0_0_0_1', '0_0_0_2'])
+    assert len(loaded) == len(set(loaded)) == 5
+    # runtimes per time step (2 time steps), of the other n_sim with the same fibers only
+    assert previous_runtimes['0_0_0_0'] == pytest.approx({(0, 0): 3})
+    assert previous_runtimes['0_0_0_1'] == pytest.approx({(0, 0): 1.5})
+    assert previous_runtimes['0_0_0_2'] == {}
+
+
+@pytest.mark.parametrize('header', ['111', '1.110000000000000000e+02'])
+def test_read_n_fiber_coords(tmp_path, header):
+    """Test that the number of fiber coordinates is read from the header line only.
+
+    :param tmp_path: Temporary directory (pytest fixture).
+    :param header: First line of the Ve file.
+    """
+    fiber_ve_path = os.path.join(tmp_path, 'inner0_fiber0.dat')
+    with open(fiber_ve_path, 'w') as f:
+        f.write(f'{header}\nnot read\n')
+    assert submit.read_n_fiber_coords(fiber_ve_path) == 111
+
+
+def test_make_run_sub_list_manifest(nsim_tree):
+    """Test that the fibers of an n_sim and their coordinates are read from its manifest, if it has one.
+
+    :param nsim_tree: Function returning the submission list for a protocol (fixture).
+    """
+    sim_path = os.path.join('n_sims', '0_0_0_0')
+    with open(os.path.join(sim_path, submit.MANIFEST_FILE), 'w') as f:
+        json.dump({'fibers': [{'inner': 0, 'fiber': 1, 'master_index': 1, 'n_coords': 221}]}, f)
+
+    tasks = nsim_tree({})
+    assert [(task['inner'], task['fiber'], task['n_fiber_coords']) for task in tasks] == [(0, 1, 221)]
+
+
+@pytest.fixture
+def slurm_shim(tmp_path, monkeypatch):
+    """Put fake sbatch and squeue commands on the PATH.
+
+    squeue lists the jobs in queue.txt. sbatch logs its arguments to sbatch.log, and fails as if the scheduler was busy
+    as many times as given in fail.txt.
+
+    :param tmp_path: Temporary directory (pytest fixture).
+    :param monkeypatch: Pytest monkeypatch fixture.
+    :return: Temporary directory with queue.txt, fail.txt, and sbatch.log.
+    """
+    monkeypatch.setattr(submit, 'args', argparse.Namespace(verbose=False), raising=False)
+    bin_path = tmp_path / 'bin'
+    bin_path.mkdir()
+    (bin_path / 'squeue').write_text(f'#!/bin/bash\ncat "{tmp_path}/queue.txt"\n')
+    (bin_path / 'sbatch').write_text(
+        '#!/bin/bash\n'
+        f'echo "$@" >> "{tmp_path}/sbatch.log"\n'
+        f'fails=$(cat "{tmp_path}/fail.txt")\n'
+        'if [ "$fails" -gt 0 ]; then\n'
+        f'  echo $((fails - 1)) > "{tmp_path}/fail.txt"\n'
+        '  echo "sbatch: error: Batch job submission failed: Resource temporarily unavailable" >&2\n'
+        '  exit 1\n'
+        'fi\n'
+        'echo "Submitted batch job 1"\n'
+    )
+    for command in ['squeue', 'sbatch']:
+        os.chmod(bin_path / command, 0o755)
+    monkeypatch.setenv('PATH', f'{bin_path}{os.pathsep}{os.environ["PATH"]}')
+    (tmp_path / 'queue.txt').write_text('')
+    (tmp_path / 'fail.txt').write_text('0')
+    return tmp_path
+
+
+def n_sbatch_calls(shim_path) -> int:
+    """Count the calls to the fake sbatch.
+
+    :param shim_path: Directory of the fake sbatch (slurm_shim fixture).
+    :return: Number of calls.
+    """
+    log_path = shim_path / 'sbatch.log'
+    return len(log_path.read_text().splitlines()) if log_path.exists() else 0
+
+
+@pytest.mark.skipif(submit.OS != 'UNIX-LIKE', reason='requires bash')
+def test_slurm_throttle_backpressure(slurm_shim):
+    """Test that sbatch waits for room in the queue, and squeue is only polled when the queue may be full.
+
+    :param slurm_shim: Directory of the fake sbatch and squeue (fixture).
+    """
+    (slurm_shim / 'queue.txt').write_text('\n'.join(str(job) for job in range(8)))
+    throttle = submit.SlurmThrottle(max_queued=10)
+    waits = []
+
+    def sleep(seconds):
+        # half of the queued jobs finish during each wait
+        waits.append(seconds)
+        queue = (slurm_shim / 'queue.txt').read_text().split()
+        (slurm_shim / 'queue.txt').write_text('\n'.join(queue[: len(queue) // 2]))
+
+    throttle.sleep = sleep
+    assert throttle.submit(['sbatch', 'a'], 5).returncode == 0
+    assert waits == [1.0]
+    assert throttle.queued == 4 + 5
+
+    # 9 + 1 fits without polling; 10 + 1 does not, but squeue (still 4 jobs, the fake does not add any) leaves room
+    throttle.submit(['sbatch', 'b'], 1)
+    (slurm_shim / 'queue.txt').write_text('')
+    throttle.submit(['sbatch', 'c'], 1)
+    assert throttle.queued == 1
+    assert waits == [1.0]
+    assert n_sbatch_calls(slurm_shim) == 3
+
+    # a submission larger than the maximum waits for an empty queue only
+    assert throttle.submit(['sbatch', 'd'], 20).returncode == 0
+
+
+@pytest.mark.skipif(submit.OS != 'UNIX-LIKE', reason='requires bash')
+def test_cluster_submit_longest_first(nsim_tree, slurm_shim, monkeypatch):
+    """Test that slurm array indices follow the predicted cost of the fibers, longest first.
+
+    :param nsim_tree: Function returning the submission list for a protocol (fixture).
+    :param slurm_shim: Directory of the fake sbatch and squeue (fixture).
+    :param monkeypatch: Pytest monkeypatch fixture.
+    """
+    inputs_path = os.path.join('n_sims', '0_0_0_0', 'data', 'inputs')
+    for fiber, n_coords in [(1, 221), (2, 51), (3, 331)]:
+        np.savetxt(os.path.join(inputs_path, f'inner0_fiber{fiber}.dat'), [n_coords, *np.zeros(n_coords)])
+    nsim_tree({})
+    tasks = submit.make_run_sub_list(0)['0_0_0_0']
+
+    monkeypatch.setattr(
+        submit,
+        'args',
+        argparse.Namespace(verbose=False, partition=None, num_jobs=None, job_mem=None, slurm_params=None),
+    )
+    os.makedirs(os.path.join('config', 'system'))
+    with open(os.path.join('config', 'system', 'slurm_params.json'), 'w') as f:
+        json.dump({'partition': 'common', 'jobs_per_array': 2, 'memory_per_fiber': 2000}, f)
+    submit.cluster_submit(tasks, '0_0_0_0', 'n_sims/0_0_0_0', 'start_', submit.SlurmThrottle())
+
+    array_indices = [
+        int(index)
+        for line in (slurm_shim / 'sbatch.log').read_text().splitlines()
+        for index in re.search('--array=([0-9,]+)', line).group(1).split(',')
+    ]
+    assert array_indices == list(range(4))
+    costs = {task['job_number']: task['predicted_cost'] for task in tasks}
+    assert [costs[index] for index in array_indices] == sorted(costs.values(), reverse=True)
+    assert [task['fiber'] for task in sorted(tasks, key=lambda task: task['job_number'])] == [3, 1, 0, 2]
+
+
+@pytest.mark.skipif(submit.OS != 'UNIX-LIKE', reason='requires bash')
+def test_slurm_throttle_retry(slurm_shim):
+    """Test that sbatch is retried with backoff while the scheduler is busy, without squeue if there is no maximum.
+
+    :param slurm_shim: Directory of the fake sbatch and squeue (fixture).
+    """
+    os.remove(slurm_shim / 'bin' / 'squeue')
+    throttle = submit.SlurmThrottle(max_retries=3)
+    waits = []
+    throttle.sleep = waits.append
+
+    (slurm_shim / 'fail.txt').write_text('2')
+    assert throttle.submit(['sbatch', 'a']).returncode == 0
+    assert waits == [1.0, 2.0]
+    assert n_sbatch_calls(slurm_shim) == 3
+
+    (slurm_shim / 'fail.txt').write_text('10')
+    assert throttle.submit(['sbatch', 'b']).returncode != 0
+    assert n_sbatch_calls(slurm_shim) == 3 + 4
@@ -10,6 +10,7 @@ import numpy as np
 import pytest
 
 from src.core.trace import Trace
+from src.utils import DownSampleMode
 
 
 @pytest.fixture
@@ -43,3 +44,21 @@ def test_append(basic_trace):
         basic_trace.points,
         [(0.0, 0.0, 0.0), (0.0, 1.0, 0.0), (1.0, 1.0, 0.0), (2.0, -1.0, 0.0), (0.0, 0.0, 0.0), (1.0, 1.0, 0.0)],
     )
+
+
+@pytest.mark.parametrize('step', [1, 2, 3, 4])
+def test_down_sample(step):
+    """Test down sampling a trace in KEEP and REMOVE modes.
+
+    :param step: spacing between each selected point.
+    """
+    points = np.column_stack([np.arange(10.0), np.arange(10.0) ** 2])
+    keep = Trace(points)
+    keep.down_sample(DownSampleMode.KEEP, step)
+    remove = Trace(points)
+    remove.down_sample(DownSampleMode.REMOVE, step)
+
+    keep_ii = list(range(step - 1, 10, step))
+    remove_ii = [i for i in range(10) if i not in keep_ii]
+    assert np.array_equal(keep.points[:, :2], points[keep_ii])
+    assert np.array_equal(remove.points[:, :2], points[remove_ii])
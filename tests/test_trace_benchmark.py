@@ -0,0 +1,76 @@
+"""Benchmarks the trace module.
+
+Requires the pytest-benchmark plugin; skipped if it is not installed.
+
+The copyrights of this software are owned by Duke University. Please
+refer to the LICENSE and README.md files for licensing instructions. The
+source code can be found on the following GitHub repository:
+https://github.com/wmglab-duke/ascent
+"""
+
+import numpy as np
+import pytest
+
+from src.core.trace import Trace
+from src.utils import DownSampleMode
+
+pytest.importorskip('pytest_benchmark')
+
+
+@pytest.fixture
+def dense_trace():
+    """Create a dense circular trace, as found on high-resolution masks.
+
+    :return: Trace object with 50k points.
+    """
+    t = np.linspace(0, 2 * np.pi, 50000, endpoint=False)
+    return Trace(np.column_stack([1000 * np.cos(t), 1000 * np.sin(t)]))
+
+
+@pytest.mark.parametrize('mode', [DownSampleMode.KEEP, DownSampleMode.REMOVE])
+def test_down_sample(benchmark, dense_trace, mode):
+    """Benchmark down sampling a dense trace.
+
+    :param benchmark: pytest-benchmark fixture.
+    :param dense_trace: Dense trace.
+    :param mode: Down sample mode.
+    """
+    benchmark(lambda: dense_trace.deepcopy().down_sample(mode, 4))
+
+
+def test_offset(benchmark, dense_trace):
+    """Benchmark offsetting a dense trace, as done for perineurium thickness and fiber buffers.
+
+    :param benchmark: pytest-benchmark fixture.
+    :param dense_trace: Dense trace.
+    """
+    benchmark(lambda: dense_trace.deepcopy().offset(distance=-20))
+
+
+def test_smooth(benchmark, dense_trace):
+    """Benchmark smoothing a dense trace.
+
+    :param benchmark: pytest-benchmark fixture.
+    :param dense_trace: Dense trace.
+    """
+    benchmark(lambda: dense_trace.deepcopy().smooth(20))
+
+
+def test_random_points(benchmark, dense_trace):
+    """Benchmark placing random points in a dense trace, as done for fiber locations.
+
+    :param benchmark: pytest-benchmark fixture.
+    :param dense_trace: Dense trace.
+    """
+    points = benchmark(dense_trace.random_points, 500, buffer=5)
+    assert len(points) == 500
+
+
+@pytest.mark.filterwarnings('ignore:`np.math` is a deprecated alias:DeprecationWarning')
+def test_make_circle(benchmark, dense_trace):
+    """Benchmark finding the minimum enclosing circle of a dense trace.
+
+    :param benchmark: pytest-benchmark fixture.
+    :param dense_trace: Dense trace.
+    """
+    benchmark(dense_trace.make_circle)